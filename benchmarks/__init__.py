@@ -0,0 +1 @@
+"""Module containing performance benchmarks for the API."""
@@ -0,0 +1,373 @@
+"""Load test of the whole API with a configurable mix of scenarios.
+
+Concurrent virtual users each register an account and a few models, then run scenarios picked
+at random according to the weights of the mix until the test ends. Every request is timed, and
+the throughput, latency percentiles and error rate of each scenario are reported.
+
+Without --url, the app is served in-process by uvicorn on a localhost port, with a SQLite file
+standing in for PostgreSQL unless DATABASE_URL is set, and the local storage backend standing
+in for blob storage. With --url, an already running server is tested instead.
+
+Usage:
+    PYTHONPATH=canvass_api_model_store python -m benchmarks.load_test --users 20 --duration 30 \
+        --mix login=1,list=4,read=8,patch=2,upload=1,predict=4,download=1
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import aiohttp
+
+DEFAULT_MIX = "login=1,list=4,read=8,patch=2,upload=1,predict=4,download=1"
+PASSWORD = "load-test"
+
+MODEL_PARAMS = {
+    "tags": "load-test,scenario",
+    "custom_functions": "{}",
+    "pre_model_order": "scale",
+    "post_model_order": "round",
+    "predict_function": "predict",
+    "storage_options": "{}",
+    "container_options": "{}",
+    "model_metadata": '{"team": "load-test"}',
+    "model_version": "1",
+    "input_features_and_types": '{"x": "float"}',
+    "output_names_and_types": '{"y": "float"}',
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a scenario mix such as `read=8,patch=2`.
+
+    Args:
+        mix (str): Comma separated pairs of scenario names and weights.
+
+    Returns:
+        Dict[str, float]: The weight of each scenario.
+
+    Raises:
+        argparse.ArgumentTypeError: If a scenario is unknown or a weight is not a number.
+    """
+    weights = {}
+    for pair in filter(None, (part.strip() for part in mix.split(","))):
+        name, _, weight = pair.partition("=")
+        if name not in VirtualUser.scenarios:
+            raise argparse.ArgumentTypeError(
+                f"Unknown scenario {name!r}, expected one of {', '.join(VirtualUser.scenarios)}"
+            )
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for scenario {name!r}: {weight!r}")
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("The mix must give a positive weight to a scenario")
+    return weights
+
+
+def percentile(samples: List[float], percent: int) -> float:
+    """Return a percentile of sorted latency samples, by nearest rank."""
+    index = max(0, min(len(samples) - 1, round(percent / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+class Recorder:
+    """Latencies and errors of the requests of each scenario."""
+
+    def __init__(self):
+        """Initialize an empty recorder."""
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, scenario: str, seconds: float, error: Optional[str] = None) -> None:
+        """Record a request.
+
+        Args:
+            scenario (str): The name of the scenario.
+            seconds (float): The duration of the request.
+            error (Optional[str]): The status code or exception of a failed request.
+        """
+        self.latencies[scenario].append(seconds)
+        if error is not None:
+            self.errors[scenario][error] += 1
+
+    def report(self, duration: float) -> List[dict]:
+        """Summarize the requests of each scenario.
+
+        Args:
+            duration (float): The duration of the test in seconds.
+
+        Returns:
+            List[dict]: The throughput, latency percentiles in milliseconds and errors of each
+            scenario, then of every request.
+        """
+        everything = list(itertools.chain.from_iterable(self.latencies.values()))
+        summaries = []
+        for scenario, latencies in [*sorted(self.latencies.items()), ("total", everything)]:
+            if scenario == "total":
+                errors: Dict[str, int] = defaultdict(int)
+                for counts in self.errors.values():
+                    for error, count in counts.items():
+                        errors[error] += count
+            else:
+                errors = self.errors[scenario]
+            latencies = sorted(latencies)
+            error_count = sum(errors.values())
+            summaries.append(
+                {
+                    "scenario": scenario,
+                    "requests": len(latencies),
+                    "requests_per_sec": len(latencies) / duration,
+                    "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+                    "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+                    "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+                    "errors": error_count,
+                    "error_rate": error_count / len(latencies) if latencies else 0,
+                    "errors_by_cause": dict(errors),
+                }
+            )
+        return summaries
+
+
+class VirtualUser:
+    """User of the API running scenarios one after the other.
+
+    Attributes:
+        scenarios (Tuple[str, ...]): The names of the scenarios a user can run.
+    """
+
+    scenarios = ("login", "list", "read", "patch", "upload", "predict", "download")
+
+    def __init__(self, index: int, session: aiohttp.ClientSession, recorder: Recorder, args):
+        """Initialize the user.
+
+        Args:
+            index (int): The number of the user, unique within the test.
+            session (aiohttp.ClientSession): The HTTP session of the user.
+            recorder (Recorder): The recorder of the requests.
+            args (argparse.Namespace): The parsed command line arguments.
+        """
+        self.email = f"load-test-{os.getpid()}-{index}@example.com"
+        self.session = session
+        self.recorder = recorder
+        self.args = args
+        self.random = random.Random(index)
+        self.headers: Dict[str, str] = {}
+        self.model_ids: List[int] = []
+        self.uploads = 0
+
+    async def request(self, scenario: str, method: str, path: str, **kwargs) -> Optional[bytes]:
+        """Send a request, record its duration and return its body unless it failed.
+
+        The body is read in full, so the duration covers the whole response.
+        """
+        started_at = time.perf_counter()
+        try:
+            async with self.session.request(method, path, headers=self.headers, **kwargs) as r:
+                body = await r.read()
+                error = str(r.status) if r.status >= 400 else None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            body, error = None, type(e).__name__
+        if scenario:
+            self.recorder.record(scenario, time.perf_counter() - started_at, error)
+        return None if error else body
+
+    async def setup(self) -> None:
+        """Register the user and the models the scenarios read and update."""
+        body = await self.request(
+            "",
+            "POST",
+            "/auth/api/users",
+            json={"email": self.email, "name": "load", "org": "test", "hashed_password": PASSWORD},
+        )
+        if body is None:
+            raise RuntimeError(f"Could not register {self.email}")
+        self.headers = {"Authorization": f"Bearer {json.loads(body)['access_token']}"}
+        for _ in range(self.args.models_per_user):
+            await self.upload(scenario="")
+        if not self.model_ids:
+            raise RuntimeError(f"Could not register models of {self.email}")
+
+    async def run(self, deadline: float, weights: Dict[str, float]) -> None:
+        """Run scenarios until the deadline.
+
+        Args:
+            deadline (float): The `time.monotonic` value at which to stop.
+            weights (Dict[str, float]): The weight of each scenario.
+        """
+        names, values = list(weights), list(weights.values())
+        while time.monotonic() < deadline:
+            scenario = self.random.choices(names, values)[0]
+            await getattr(self, scenario)()
+
+    async def login(self) -> None:
+        """Log in with a password."""
+        await self.request(
+            "login",
+            "POST",
+            "/auth/api/token",
+            data={"username": self.email, "password": PASSWORD},
+        )
+
+    async def list(self) -> None:
+        """Read a page of the models of the user, filtered by tag every other time."""
+        params = {"limit": str(self.args.page_size)}
+        if self.random.random() < 0.5:
+            params["tags"] = "scenario"
+        await self.request("list", "GET", "/api/models/", params=params)
+
+    async def read(self) -> None:
+        """Read a model."""
+        await self.request("read", "GET", f"/api/models/{self.random.choice(self.model_ids)}")
+
+    async def patch(self) -> None:
+        """Update the predict function and metadata of a model."""
+        await self.request(
+            "patch",
+            "PATCH",
+            f"/api/models/{self.random.choice(self.model_ids)}",
+            json={
+                "predict_function": f"predict_{self.random.randrange(100)}",
+                "model_metadata": {"team": "load-test", "run": self.random.randrange(100)},
+            },
+        )
+
+    async def upload(self, scenario: str = "upload") -> None:
+        """Register a model with a new artifact."""
+        self.uploads += 1
+        data = aiohttp.FormData()
+        data.add_field(
+            "file",
+            os.urandom(self.args.artifact_kb * 1024),
+            filename=f"model-{self.uploads}.bin",
+            content_type="application/octet-stream",
+        )
+        body = await self.request(scenario, "POST", "/api/models", params=MODEL_PARAMS, data=data)
+        if body is not None:
+            self.model_ids.append(json.loads(body)["model_id"])
+
+    async def predict(self) -> None:
+        """Log a batch of predictions for a model."""
+        model_id = self.random.choice(self.model_ids)
+        predictions = [
+            {"model_id": model_id, "version": 1, "input": {"x": x}, "output": {"y": 2 * x}}
+            for x in range(self.args.predictions_per_batch)
+        ]
+        await self.request(
+            "predict", "POST", f"/api/models/{model_id}/predictions", json=predictions
+        )
+
+    async def download(self) -> None:
+        """Download the artifact of a model."""
+        model_id = self.random.choice(self.model_ids)
+        await self.request("download", "GET", f"/api/models/{model_id}/artifact")
+
+
+async def serve_app() -> tuple:
+    """Serve the app in-process on a free localhost port.
+
+    Returns:
+        tuple: The uvicorn server, the task serving requests and the URL it listens on.
+    """
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{workdir}/load-test.sqlite")
+    os.environ.setdefault("LOCAL_STORAGE_PATH", os.path.join(workdir, "artifacts"))
+    os.environ.setdefault("JWT_SECRET", "load-test")
+    os.environ.setdefault("TOKEN_TYPE", "bearer")
+
+    import uvicorn
+
+    import models.models as _models
+    from canvass_api_model_store.core.app import create_app
+    from canvass_api_model_store.core.db import async_engine
+
+    if async_engine.dialect.name == "sqlite":
+        # A fresh SQLite stand-in has no tables; real databases are migrated with alembic
+        async with async_engine.begin() as conn:
+            await conn.run_sync(_models.Base.metadata.create_all)
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(create_app(), log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    host, port = sock.getsockname()
+    return server, task, f"http://{host}:{port}"
+
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    """Set up the virtual users, run the scenarios and summarize the requests.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        List[dict]: The summary of each scenario, then of every request.
+    """
+    server, task, url = (None, None, args.url) if args.url else await serve_app()
+    recorder = Recorder()
+    connector = aiohttp.TCPConnector(limit=args.users)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    try:
+        async with aiohttp.ClientSession(url, connector=connector, timeout=timeout) as session:
+            users = [VirtualUser(index, session, recorder, args) for index in range(args.users)]
+            await asyncio.gather(*(user.setup() for user in users))
+
+            started_at = time.monotonic()
+            deadline = started_at + args.duration
+            await asyncio.gather(*(user.run(deadline, args.mix) for user in users))
+            duration = time.monotonic() - started_at
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await task
+
+    return recorder.report(duration)
+
+
+def main() -> None:
+    """Parse the command line arguments, run the load test and print the summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Test a running server instead of an in-process one")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--models-per-user", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--predictions-per-batch", type=int, default=100)
+    parser.add_argument("--artifact-kb", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Write the summary to this JSON file")
+    args = parser.parse_args()
+
+    summaries = asyncio.run(run(args))
+
+    print(
+        f"{'scenario':>10}  {'requests':>8}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}"
+        f"  {'p99 ms':>8}  {'errors':>7}"
+    )
+    for summary in summaries:
+        if summary["requests"]:
+            print(
+                f"{summary['scenario']:>10}  {summary['requests']:>8}"
+                f"  {summary['requests_per_sec']:>8.1f}  {summary['p50_ms']:>8.2f}"
+                f"  {summary['p95_ms']:>8.2f}  {summary['p99_ms']:>8.2f}"
+                f"  {summary['error_rate']:>7.2%}"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
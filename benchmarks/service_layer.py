@@ -0,0 +1,350 @@
+"""Benchmark of the service layer hot paths against local stand-ins.
+
+Each service function is called directly, one session per call as a request would, against a
+registry seeded with a given number of models. A SQLite file stands in for PostgreSQL unless
+DATABASE_URL is set, and the local storage backend stands in for blob storage. DATABASE_URL must
+point at a throwaway database: its tables are dropped and recreated for every registry size.
+
+Results are written as JSON with the throughput and latency percentiles of each benchmark. When
+a baseline written by an earlier run is given, every benchmark whose throughput dropped or whose
+p95 latency grew by more than the tolerance is reported, and the exit status is 1.
+
+Usage:
+    PYTHONPATH=canvass_api_model_store python -m benchmarks.service_layer \
+        --rows 10 1000 100000 --output results.json --baseline baseline.json
+"""
+import argparse
+import asyncio
+import datetime as dt
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List, Optional
+
+_workdir = tempfile.mkdtemp(prefix="service-layer-benchmark-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_workdir}/benchmark.sqlite")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("TOKEN_TYPE", "bearer")
+
+import jwt  # noqa: E402
+import models.models as _models  # noqa: E402
+import models.schemas as _schemas  # noqa: E402
+from api.v1.auth import services as auth_serv  # noqa: E402
+from api.v1.model_store import services as model_serv  # noqa: E402
+from fastapi import UploadFile  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from canvass_api_model_store.core.config import settings  # noqa: E402
+from canvass_api_model_store.core.db import async_engine, async_session  # noqa: E402
+from canvass_api_model_store.core.storage import LocalStorageBackend  # noqa: E402
+
+SEED_BATCH_SIZE = 5000
+TAGS = [f"tag{i}" for i in range(10)]
+
+Operation = Callable[[int], Awaitable]
+
+
+def percentile(samples: List[float], percent: int) -> float:
+    """Return a percentile of sorted latency samples, by nearest rank."""
+    index = max(0, min(len(samples) - 1, round(percent / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+async def measure(name: str, rows: Optional[int], operation: Operation, args) -> dict:
+    """Call an operation repeatedly and summarize its latency.
+
+    Args:
+        name (str): The name of the benchmark.
+        rows (Optional[int]): The number of models in the registry, if relevant.
+        operation (Operation): The coroutine function to call with the iteration number.
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        dict: The throughput and latency percentiles of the operation, in milliseconds.
+    """
+    for i in range(args.warmup):
+        await operation(i)
+
+    latencies = []
+    started_at = time.perf_counter()
+    for i in range(args.iterations):
+        call_started_at = time.perf_counter()
+        await operation(args.warmup + i)
+        latencies.append(time.perf_counter() - call_started_at)
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    result = {
+        "name": name,
+        "rows": rows,
+        "iterations": args.iterations,
+        "ops_per_sec": args.iterations / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+    print(
+        f"{name:>24}  {rows if rows is not None else '-':>8}  {result['ops_per_sec']:>10.1f}"
+        f"  {result['p50_ms']:>8.2f}  {result['p95_ms']:>8.2f}  {result['p99_ms']:>8.2f}"
+    )
+    return result
+
+
+async def reset_database() -> None:
+    """Drop and recreate every table."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(_models.Base.metadata.drop_all)
+        await conn.run_sync(_models.Base.metadata.create_all)
+
+
+def model_row(user_id: int, index: int, artifact: _models.Artifact) -> dict:
+    """Return the column values of a seeded model."""
+    return {
+        "user_id": user_id,
+        "tags": f"{TAGS[index % len(TAGS)]},{TAGS[(index + 1) % len(TAGS)]}",
+        "custom_functions": {"f": index},
+        "pre_model_order": ["scale"],
+        "post_model_order": ["round"],
+        "predict_function": "predict",
+        "storage_options": {},
+        "container_options": {},
+        "model_metadata": {"team": f"team{index % 7}", "index": index},
+        "model_version": 1,
+        "input_features_and_types": {"x": "float"},
+        "output_names_and_types": {"y": "float"},
+        "artifact_name": artifact.blob_name,
+        "artifact_digest": artifact.digest,
+    }
+
+
+async def seed(rows: int) -> _schemas.User:
+    """Recreate the tables and register a user owning a number of models.
+
+    Args:
+        rows (int): The number of models to register.
+
+    Returns:
+        _schemas.User: The owner of the models.
+    """
+    await reset_database()
+    async with async_session() as db:
+        user = _models.User(email="benchmark@example.com", name="benchmark", org="benchmark")
+        user.hashed_password = "not-a-hash"
+        artifact = _models.Artifact(digest="0" * 64, blob_name="seed.bin", size=0)
+        db.add_all([user, artifact])
+        await db.flush()
+
+        # The tables are new, so the seeded models get the ids 1 to rows
+        models = [model_row(user.id, index, artifact) for index in range(rows)]
+        tags = [
+            {"model_id": index + 1, "tag": tag, "user_id": user.id}
+            for index, model in enumerate(models)
+            for tag in model_serv.parse_tags(model["tags"])
+        ]
+        for table, values in ((_models.Model, models), (_models.ModelTag, tags)):
+            for start in range(0, len(values), SEED_BATCH_SIZE):
+                await db.execute(insert(table), values[start : start + SEED_BATCH_SIZE])
+        await db.commit()
+        return _schemas.User.from_orm(user)
+
+
+async def benchmark_registry(rows: int, storage: LocalStorageBackend, args) -> List[dict]:
+    """Run the model benchmarks against a registry of a given size.
+
+    Args:
+        rows (int): The number of models in the registry.
+        storage (LocalStorageBackend): The blob storage stand-in.
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        List[dict]: The result of each benchmark.
+    """
+    user = await seed(rows)
+    pick = random.Random(rows)
+
+    async def select_model(i: int):
+        async with async_session() as db:
+            await model_serv.model_selector(pick.randint(1, rows), user, db)
+
+    async def update_model(i: int):
+        async with async_session() as db:
+            update = _schemas.ModelUpdate(predict_function=f"predict{i}")
+            await model_serv.update_model(user, db, update, pick.randint(1, rows))
+
+    async def read_page(i: int):
+        async with async_session() as db:
+            cursor = pick.randint(0, rows - 1) or None
+            await model_serv.read_all_models(user.id, db, settings.default_page_size, cursor)
+
+    async def read_tagged_page(i: int):
+        async with async_session() as db:
+            tags = [pick.choice(TAGS)]
+            await model_serv.read_all_models(user.id, db, settings.default_page_size, None, tags)
+
+    async def create_model(i: int):
+        model = _schemas.ModelCreate(
+            tags="benchmark",
+            custom_functions="{}",
+            pre_model_order=["scale"],
+            post_model_order=["round"],
+            predict_function="predict",
+            storage_options="{}",
+            container_options="{}",
+            model_metadata='{"team": "benchmark"}',
+            model_version=1,
+            input_features_and_types='{"x": "float"}',
+            output_names_and_types='{"y": "float"}',
+        )
+        # Unique content, so every call stores a new artifact
+        content = i.to_bytes(8, "big") + os.urandom(args.artifact_kb * 1024 - 8)
+        async with async_session() as db:
+            await model_serv.create_model(
+                user, db, model, UploadFile(f"model{i}.bin", io.BytesIO(content)), storage
+            )
+
+    # Reads run before writes, so they all see a registry of the seeded size
+    return [
+        await measure("model_selector", rows, select_model, args),
+        await measure("read_all_models", rows, read_page, args),
+        await measure("read_all_models_tagged", rows, read_tagged_page, args),
+        await measure("update_model", rows, update_model, args),
+        await measure("create_model", rows, create_model, args),
+    ]
+
+
+async def benchmark_auth(args) -> List[dict]:
+    """Run the authentication benchmarks.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        List[dict]: The result of each benchmark.
+    """
+    await reset_database()
+    async with async_session() as db:
+        user = _models.User(email="benchmark@example.com", name="benchmark", org="benchmark")
+        user.hashed_password = "not-a-hash"
+        db.add(user)
+        await db.commit()
+    token = (await auth_serv.create_token(user))["access_token"]
+
+    async def create_token(i: int):
+        await auth_serv.create_token(user)
+
+    async def get_current_user(i: int):
+        auth_serv.user_cache.clear()
+        async with async_session() as db:
+            await auth_serv.get_current_user(db, token)
+
+    async def get_cached_user(i: int):
+        async with async_session() as db:
+            await auth_serv.get_current_user(db, token)
+
+    async def decode_token(i: int):
+        jwt.decode(token, auth_serv.JWT_SECRET, algorithms=["HS256"])
+
+    return [
+        await measure("create_token", None, create_token, args),
+        await measure("decode_token", None, decode_token, args),
+        await measure("get_current_user", None, get_current_user, args),
+        await measure("get_current_user_cached", None, get_cached_user, args),
+    ]
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Compare results with a baseline.
+
+    Args:
+        results (List[dict]): The results of this run.
+        baseline (List[dict]): The results of the baseline run.
+        tolerance (float): The relative slowdown allowed before reporting a regression.
+
+    Returns:
+        List[str]: A description of every regression.
+    """
+    reference = {(result["name"], result["rows"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get((result["name"], result["rows"]))
+        if base is None:
+            continue
+        label = f"{result['name']} ({result['rows'] if result['rows'] is not None else '-'} rows)"
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: {result['ops_per_sec']:.1f} ops/s, "
+                f"baseline {base['ops_per_sec']:.1f} ops/s"
+            )
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p95 {result['p95_ms']:.2f} ms, baseline {base['p95_ms']:.2f} ms"
+            )
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    """Run every benchmark and print a summary line per benchmark.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        List[dict]: The result of each benchmark.
+    """
+    storage = LocalStorageBackend(os.path.join(_workdir, "artifacts"))
+    print(
+        f"{'benchmark':>24}  {'rows':>8}  {'ops/s':>10}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}"
+    )
+    try:
+        results = await benchmark_auth(args)
+        for rows in args.rows:
+            results.extend(await benchmark_registry(rows, storage, args))
+    finally:
+        await storage.close()
+        await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    """Parse the command line arguments, run the benchmarks and compare with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--artifact-kb", type=int, default=64)
+    parser.add_argument("--output", default="service-layer-benchmark.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "created_at": dt.datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "database": async_engine.dialect.name,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark of the artifact block upload engine at different concurrency levels.
+
+The local storage backend stands in for blob storage. Each staged block pays a simulated round
+trip latency and is throttled to a per connection bandwidth, which is what caps a single
+sequential upload against real blob storage.
+
+Usage:
+    python -m benchmarks.upload_throughput --size-mb 256 --concurrency 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# The settings require a database, which the upload engine never connects to
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///")
+
+from fastapi import UploadFile  # noqa: E402
+
+from canvass_api_model_store.core.storage import BlockUploader, LocalStorageBackend  # noqa: E402
+
+
+class SimulatedBlobStorage(LocalStorageBackend):
+    """Local storage backend paying a simulated network cost for every request."""
+
+    def __init__(self, root: str, latency: float, bandwidth: float):
+        """Initialize the blob stand-in.
+
+        Args:
+            root (str): The directory where blobs are written.
+            latency (float): The simulated round trip latency in seconds per request.
+            bandwidth (float): The simulated bandwidth in bytes per second per connection.
+        """
+        super().__init__(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    async def stage_block(self, blob_name: str, block_id: str, data: bytes) -> None:
+        """Stage a block after the simulated transfer time."""
+        await asyncio.sleep(self.latency + len(data) / self.bandwidth)
+        await super().stage_block(blob_name, block_id, data)
+
+    async def commit_blocks(self, blob_name: str, block_ids: list[str]) -> None:
+        """Commit the staged blocks after the simulated round trip."""
+        await asyncio.sleep(self.latency)
+        await super().commit_blocks(blob_name, block_ids)
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Upload the same artifact once per concurrency level and print the throughput.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    size = args.size_mb * 1024**2
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_path = os.path.join(directory, "artifact.bin")
+        with open(artifact_path, "wb") as f:
+            f.write(os.urandom(size))
+
+        print(f"{'concurrency':>11}  {'seconds':>8}  {'MB/s':>8}")
+        for concurrency in args.concurrency:
+            storage = SimulatedBlobStorage(
+                tempfile.mkdtemp(dir=directory),
+                args.latency_ms / 1000,
+                args.bandwidth_mbps * 1024**2,
+            )
+            uploader = BlockUploader(
+                block_size=args.block_size_mb * 1024**2, max_size=size, concurrency=concurrency
+            )
+
+            with open(artifact_path, "rb") as f:
+                start = time.perf_counter()
+                await uploader.upload(UploadFile("artifact.bin", f), storage, "artifact.bin")
+                elapsed = time.perf_counter() - start
+
+            print(f"{concurrency:>11}  {elapsed:>8.2f}  {args.size_mb / elapsed:>8.1f}")
+
+
+def main() -> None:
+    """Parse the command line arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--block-size-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--bandwidth-mbps", type=float, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Module containing the administration routes defined for this API.
+
+Attributes:
+    admin_router (fastapi.APIRouter): The router for the administration routes.
+"""
+
+from api.v1.auth import services as auth_serv
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from models import schemas
+
+from canvass_api_model_store.core import profiling
+from canvass_api_model_store.core.config import settings
+
+admin_router = APIRouter(prefix="/api/admin")
+
+
+def check_profile_duration(seconds: float):
+    """Function to check that a profile fits in the configured maximum duration.
+
+    Args:
+        seconds (float): The requested duration of the profile.
+
+    Raises:
+        HTTPException: If the duration exceeds the `profile_max_seconds` setting.
+    """
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"A profile lasts at most {settings.profile_max_seconds} seconds",
+        )
+
+
+@admin_router.post("/profile", response_class=PlainTextResponse)
+async def profile_stacks(
+    seconds: float = Query(10, gt=0),
+    interval: float = Query(0.01, ge=0.001, le=1),
+    user: schemas.User = Depends(auth_serv.get_admin_user),
+):
+    """Sample the stacks of every thread of this worker for a while.
+
+    The event loop thread and the executor threads, such as the password hashing and thread
+    pool workers, are sampled alike. The body can be rendered with any flamegraph tool that
+    reads collapsed stacks.
+
+    Args:
+        seconds (float): How long to sample for.
+        interval (float): The number of seconds between two samples.
+        user (schemas.User): The current logged-in administrator.
+
+    Returns:
+        PlainTextResponse: One `thread;frame;...;frame count` line per sampled stack.
+
+    Raises:
+        HTTPException: If the duration is too long or another profile is running.
+    """
+    check_profile_duration(seconds)
+    try:
+        return await profiling.profile_stacks(seconds, interval)
+    except profiling.ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@admin_router.post("/profile/memory")
+async def trace_allocations(
+    seconds: float = Query(10, gt=0),
+    top: int = Query(25, ge=1, le=1000),
+    frames: int = Query(1, ge=1, le=64),
+    user: schemas.User = Depends(auth_serv.get_admin_user),
+) -> dict:
+    """Trace the memory allocations of this worker for a while and report the largest sites.
+
+    Args:
+        seconds (float): How long to trace for.
+        top (int): The number of allocation sites to report.
+        frames (int): The number of frames recorded per allocation site.
+        user (schemas.User): The current logged-in administrator.
+
+    Returns:
+        dict: The bytes held by traced allocations and the largest allocation sites.
+
+    Raises:
+        HTTPException: If the duration is too long or another profile is running.
+    """
+    check_profile_duration(seconds)
+    try:
+        return await profiling.trace_allocations(seconds, top, frames)
+    except profiling.ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -9,19 +9,19 @@ from typing import List
 from api.v1.auth import services
 from fastapi import APIRouter, Depends, HTTPException, security, status
 from models import schemas
-from sqlalchemy import orm
+from sqlalchemy.ext.asyncio import AsyncSession
 
 auth_router = APIRouter(prefix="/auth")
 
 
 @auth_router.post("/api/users")
-async def create_user(new_user: schemas.UserCreate, db: orm.Session = Depends(services.get_db)):
+async def create_user(new_user: schemas.UserCreate, db: AsyncSession = Depends(services.get_db)):
     """
     Route to create users.
 
     Args:
         user (schemas.UserCreate): User object to be created.
-        db (orm.Session): SQLAlchemy session to connect to the database.
+        db (AsyncSession): SQLAlchemy session to connect to the database.
 
     Raises:
         HTTPException: If email is already in use.
@@ -49,14 +49,14 @@ async def create_user(new_user: schemas.UserCreate, db: orm.Session = Depends(se
 @auth_router.post("/api/token")
 async def generate_token(
     form_data: security.OAuth2PasswordRequestForm = Depends(),
-    db: orm.Session = Depends(services.get_db),
+    db: AsyncSession = Depends(services.get_db),
 ):
     """
     Route to create tokens.
 
     Args:
         form_data (security.OAuth2PasswordRequestForm): Form data containing username and password.
-        db (orm.Session): SQLAlchemy session to connect to the database.
+        db (AsyncSession): SQLAlchemy session to connect to the database.
 
     Raises:
         HTTPException: If credentials are invalid.
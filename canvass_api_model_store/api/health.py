@@ -1,5 +1,7 @@
 """Module containing health routes defined for this API."""
 
+from api.v1.auth import services as auth_serv
+from api.v1.model_store import services as model_serv
 from fastapi import APIRouter, status
 
 health_router = APIRouter(prefix="/health")
@@ -23,3 +25,17 @@ def check_readiness():
         dict showing readiness
     """
     return {"status": "ready"}
+
+
+@health_router.get("/caches", status_code=status.HTTP_200_OK)
+def read_cache_stats():
+    """In-process cache statistics.
+
+    Returns:
+        dict showing the size, hits, misses and hit rate of each cache of this worker
+    """
+    return {
+        "users": auth_serv.user_cache.stats(),
+        "models": model_serv.model_cache.stats(),
+        "model_versions": model_serv.model_versions.stats(),
+    }
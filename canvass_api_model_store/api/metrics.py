@@ -0,0 +1,21 @@
+"""Module containing the metrics route defined for this API.
+
+Attributes:
+    metrics_router (fastapi.APIRouter): The router for the metrics route.
+"""
+
+from fastapi import APIRouter, Response
+
+from canvass_api_model_store.core import metrics
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", response_class=Response)
+def read_metrics():
+    """Metrics of this worker in the Prometheus text format.
+
+    Returns:
+        Response showing request, SQL, pool, artifact storage and password hashing metrics
+    """
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
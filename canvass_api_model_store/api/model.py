@@ -4,26 +4,38 @@ Attributes:
     model_router (fastapi.APIRouter): The router for the model routes.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import models.models as _models
 from api.v1.auth import services as auth_serv
 from api.v1.model_store import services as model_serv
-from fastapi import APIRouter, Body, Depends, Form, HTTPException, status, UploadFile, File
+from api.v1.model_store.purge import ModelPurger, get_purger
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    status,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
 from models import schemas
-from sqlalchemy import orm
+from sqlalchemy.ext.asyncio import AsyncSession
 
-import os
-from azure.storage.blob import BlobServiceClient
+from canvass_api_model_store.core.config import settings
+from canvass_api_model_store.core.storage import StorageBackend, get_storage
 
 model_router = APIRouter(prefix="/api/models")
 
-AZURE_STORAGE_CONNECTION_STRING = os.environ.get("AZURE_STORAGE_CONNECTION_STRING")
-AZURE_STORAGE_CONTAINER_NAME = "models"
-
 
 @model_router.post("/upload-file/")
-async def upload_file(file: UploadFile = File(...)):
-    return await model_serv.upload_file(file=file)
+async def upload_file(file: UploadFile = File(...), storage: StorageBackend = Depends(get_storage)):
+    return await model_serv.upload_file(file=file, storage=storage)
 
 
 @model_router.post("", status_code=status.HTTP_201_CREATED)
@@ -32,14 +44,17 @@ async def create_model(
     model: schemas.ModelCreate = Depends(),
     file: UploadFile = File(...),
     user: schemas.User = Depends(auth_serv.get_current_user),
-    db: orm.Session = Depends(auth_serv.get_db),
+    db: AsyncSession = Depends(auth_serv.get_db),
+    storage: StorageBackend = Depends(get_storage),
 ):
     """Create a new model.
 
     Args:
         model (schemas.ModelCreate): The model data.
+        file (UploadFile): The model artifact.
         user (schemas.User): The current user.
-        db (orm.Session): The database session.
+        db (AsyncSession): The database session.
+        storage (StorageBackend): The storage backend holding model artifacts.
 
     Returns:
         schemas.Model: The id of the created model.
@@ -49,21 +64,103 @@ async def create_model(
     """
 
     # Add more validation checks as needed
-    return await model_serv.create_model(user=user, db=db, model=model, file=file)
+    return await model_serv.create_model(user=user, db=db, model=model, file=file, storage=storage)
+
+
+@model_router.post("/bulk", response_model=schemas.BulkResult)
+async def bulk_create_models(
+    models: str = Form(..., description="JSON array of models, in the order of the files"),
+    files: List[UploadFile] = File(...),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    """Register many models in one transaction.
+
+    Args:
+        models (str): The models, with the fields of a single registration.
+        files (List[UploadFile]): The artifact of each model, in the same order.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+        storage (StorageBackend): The storage backend holding model artifacts.
+
+    Returns:
+        schemas.BulkResult: The id and artifact digest of each registered model.
+
+    Raises:
+        HTTPException: If the body is malformed, there is a database error, or the request is
+        unauthorized.
+    """
+    return await model_serv.bulk_create_models(
+        user, db, model_serv.parse_bulk_models(models), files, storage
+    )
+
+
+@model_router.patch("/bulk", response_model=schemas.BulkResult)
+async def bulk_update_models(
+    updates: List[schemas.ModelBulkUpdate],
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+):
+    """Update many models in one transaction.
+
+    Args:
+        updates (List[schemas.ModelBulkUpdate]): The id and changes of each model, with the
+            version the changes are based on, if any.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        schemas.BulkResult: The new version of each updated model.
+
+    Raises:
+        HTTPException: If there is a database error or the request is unauthorized.
+    """
+    return await model_serv.bulk_update_models(user, db, updates)
+
+
+@model_router.delete("/bulk", response_model=schemas.BulkResult)
+async def bulk_delete_models(
+    model_id: List[int] = Query(...),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+    purger: ModelPurger = Depends(get_purger),
+):
+    """Delete many models in one transaction.
+
+    Args:
+        model_id (List[int]): The IDs of the models to delete.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+        purger (ModelPurger): The purger of deleted models.
+
+    Returns:
+        schemas.BulkResult: The outcome of each deletion.
+
+    Raises:
+        HTTPException: If there is a database error or the request is unauthorized.
+    """
+    result = await model_serv.bulk_delete_models(user, db, model_id)
+    purger.wake()
+    return result
 
 
 @model_router.delete("/{model_id}", status_code=status.HTTP_200_OK)
 async def delete_model(
     model_id: int,
     user: schemas.User = Depends(auth_serv.get_current_user),
-    db: orm.Session = Depends(auth_serv.get_db),
+    db: AsyncSession = Depends(auth_serv.get_db),
+    purger: ModelPurger = Depends(get_purger),
 ):
     """Delete an existing model.
 
+    The model disappears right away, its predictions and artifact are purged in the background.
+
     Args:
         model_id (int): The ID of the model to delete.
         user (schemas.User): The current user.
-        db (orm.Session): The database session.
+        db (AsyncSession): The database session.
+        purger (ModelPurger): The purger of deleted models.
 
     Returns:
         dict: A message indicating success.
@@ -72,6 +169,7 @@ async def delete_model(
         HTTPException: If the model does not exist, there is a database error, or the request is unauthorized.
     """
     await model_serv.delete_model(model_id, user, db)
+    purger.wake()
     return {"message": f"Successfully Deleted Model with id: {model_id}"}
 
 
@@ -79,43 +177,279 @@ async def delete_model(
 async def update_model(
     model_id: int,
     model: schemas.ModelUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     user: schemas.User = Depends(auth_serv.get_current_user),
-    db: orm.Session = Depends(auth_serv.get_db),
-) -> schemas.Model:
+    db: AsyncSession = Depends(auth_serv.get_db),
+) -> dict:
     """Update an existing model.
 
+    With an `If-Match` header holding the ETag of a model read (or a bare version), the update
+    is only applied if the model is still at that version, and fails with 412 otherwise.
+
     Args:
         model_id (int): The ID of the model to be updated.
         model (schemas.ModelUpdate): The updated model data.
+        response (Response): The response, to set the ETag of the new version on.
+        if_match (Optional[str]): The version the update is based on.
         user (schemas.User): The current user.
-        db (orm.Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
-        schemas.Model: The updated model.
+        dict: The updated model.
 
     Raises:
-        HTTPException: If the model does not exist, there is a database error, or the request is unauthorized.
+        HTTPException: If the model does not exist, was changed since the version in `If-Match`,
+        there is a database error, or the request is unauthorized.
+    """
+    updated = await model_serv.update_model(
+        user=user,
+        db=db,
+        model=model,
+        model_id=model_id,
+        expected_version=model_serv.parse_if_match(if_match),
+    )
+    response.headers["ETag"] = model_serv.make_etag(model_id, updated["model_version"])
+    return updated
+
+
+@model_router.patch("/{model_id}/json")
+async def patch_model(
+    model_id: int,
+    request: Request,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+) -> dict:
+    """Patch the JSON fields of a model in place.
+
+    The body is either a JSON Patch (`Content-Type: application/json-patch+json`) whose paths
+    start with the field they change, as in `/model_metadata/owner`, or a merge patch
+    (`Content-Type: application/merge-patch+json`) keyed by field.
+
+    Args:
+        model_id (int): The ID of the model to be patched.
+        request (Request): The request holding the patch.
+        response (Response): The response, to set the ETag of the new version on.
+        if_match (Optional[str]): The version the patch is based on.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        dict: The updated model.
+
+    Raises:
+        HTTPException: If the patch is malformed or cannot be applied, or the model does not
+        exist or was changed since the version in `If-Match`.
     """
-    return await model_serv.update_model(user=user, db=db, model=model, model_id=model_id)
+    content_type, document = await model_serv.read_patch(request)
+    updated = await model_serv.patch_model(
+        user,
+        db,
+        model_id,
+        content_type,
+        document,
+        expected_version=model_serv.parse_if_match(if_match),
+    )
+    response.headers["ETag"] = model_serv.make_etag(model_id, updated["model_version"])
+    return updated
+
+
+@model_router.get("/{model_id}/artifact", response_class=StreamingResponse)
+async def download_artifact(
+    model_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+    storage: StorageBackend = Depends(get_storage),
+):
+    """Download the artifact of a model.
+
+    Single byte ranges are supported through the `Range` header, for resumable and parallel
+    downloads.
+
+    Args:
+        model_id (int): The ID of the model.
+        range_header (Optional[str]): The requested byte range.
+        if_range (Optional[str]): The ETag the range is conditional on.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+        storage (StorageBackend): The storage backend holding model artifacts.
+
+    Returns:
+        StreamingResponse: The artifact or the requested range of it.
+
+    Raises:
+        HTTPException: If the model or its artifact does not exist, or the range is not satisfiable.
+    """
+    return await model_serv.stream_artifact(
+        model_id, user, db, storage, range_header=range_header, if_range=if_range
+    )
 
 
 """added get models to get models"""
 
 
+@model_router.get("/search", status_code=status.HTTP_200_OK)
+async def search_models(
+    model_metadata: Optional[str] = Query(None, description="JSON object the metadata contains"),
+    input_features_and_types: Optional[str] = Query(
+        None, description="JSON object the input features contain"
+    ),
+    output_names_and_types: Optional[str] = Query(
+        None, description="JSON object the outputs contain"
+    ),
+    metadata_key: Optional[List[str]] = Query(None, description="Keys of the metadata"),
+    input_feature: Optional[List[str]] = Query(None, description="Input features consumed"),
+    output_name: Optional[List[str]] = Query(None, description="Outputs produced"),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[int] = Query(None, description="Id of the last model of the previous page"),
+    view: schemas.ModelView = schemas.ModelView.full,
+    fields: Optional[List[str]] = Query(None),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+):
+    """Search the models of the current user by their metadata and feature schemas.
+
+    Every condition must hold: a JSON object parameter must be contained in its field, as in
+    `input_features_and_types={"temperature": "float"}`, and every listed key must be present.
+
+    Args:
+        model_metadata (Optional[str]): JSON object the metadata must contain.
+        input_features_and_types (Optional[str]): JSON object the input features must contain.
+        output_names_and_types (Optional[str]): JSON object the outputs must contain.
+        metadata_key (Optional[List[str]]): Keys the metadata must have.
+        input_feature (Optional[List[str]]): Input features the models must consume.
+        output_name (Optional[List[str]]): Outputs the models must produce.
+        limit (int): The maximum number of models to return.
+        cursor (Optional[int]): The `next_cursor` returned with the previous page.
+        view (schemas.ModelView): Whether to return full models or their summary.
+        fields (Optional[List[str]]): Columns to return, taking precedence over the view.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        dict: The matching models of the page and the cursor of the next page.
+
+    Raises:
+        HTTPException: If a JSON object parameter is malformed or an unknown field is requested.
+    """
+    fields = model_serv.resolve_fields(view, fields)
+    contains = {
+        field: model_serv.parse_search_document(field, document)
+        for field, document in (
+            ("model_metadata", model_metadata),
+            ("input_features_and_types", input_features_and_types),
+            ("output_names_and_types", output_names_and_types),
+        )
+    }
+    keys = {
+        "model_metadata": metadata_key,
+        "input_features_and_types": input_feature,
+        "output_names_and_types": output_name,
+    }
+    model_display, next_cursor = await model_serv.search_models(
+        user.id, db, limit=limit, cursor=cursor, contains=contains, keys=keys, fields=fields
+    )
+    return {"model": model_display, "next_cursor": next_cursor}
+
+
 @model_router.get("/{model_id}", status_code=status.HTTP_200_OK)
 async def read_model(
     model_id: int,
+    response: Response,
+    view: schemas.ModelView = schemas.ModelView.full,
+    fields: Optional[List[str]] = Query(None),
+    if_none_match: Optional[str] = Header(None),
     user: schemas.User = Depends(auth_serv.get_current_user),
-    db: orm.Session = Depends(auth_serv.get_db),
+    db: AsyncSession = Depends(auth_serv.get_db),
 ):
-    model_display = await model_serv.read_model(user.id, model_id, db)
+    """Read a model of the current user.
+
+    The response is tagged with the current version of the model, read from the database at
+    most every `model_version_ttl` seconds, and a request whose `If-None-Match` holds the
+    current tag gets a 304 without the model being loaded.
+
+    Args:
+        model_id (int): The ID of the model to read.
+        response (Response): The response, to set the ETag on.
+        view (schemas.ModelView): Whether to return the full model or its summary.
+        fields (Optional[List[str]]): Columns to return, taking precedence over the view.
+        if_none_match (Optional[str]): The ETags of the representations the client has.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        dict: The model, or None if it does not exist.
+    """
+    fields = model_serv.resolve_fields(view, fields)
+    version = await model_serv.read_model_version(user.id, model_id, db)
+    if version is None:
+        return {"model": None}
+
+    etag = model_serv.make_etag(model_id, version)
+    if model_serv.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    model_display = await model_serv.read_model(
+        user.id, model_id, db, fields=fields, version=version
+    )
+    response.headers["ETag"] = etag
     return {"model": model_display}
 
 
 @model_router.get("/", status_code=status.HTTP_200_OK)
 async def read_all_models(
+    response: Response,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[int] = Query(None, description="Id of the last model of the previous page"),
+    tags: Optional[List[str]] = Query(None),
+    tag_match: schemas.TagMatch = schemas.TagMatch.all,
+    predict_function: Optional[str] = None,
+    view: schemas.ModelView = schemas.ModelView.full,
+    fields: Optional[List[str]] = Query(None),
+    if_none_match: Optional[str] = Header(None),
     user: schemas.User = Depends(auth_serv.get_current_user),
-    db: orm.Session = Depends(auth_serv.get_db),
+    db: AsyncSession = Depends(auth_serv.get_db),
 ):
-    model_display = await model_serv.read_all_models(user.id, db)
-    return {"model": model_display}
+    """List the models of the current user, one page at a time.
+
+    Listings are tagged with a counter bumped by every change to the models of the user, and a
+    request whose `If-None-Match` holds the current tag gets a 304 without any model being
+    loaded.
+
+    Args:
+        response (Response): The response, to set the ETag on.
+        limit (int): The maximum number of models to return.
+        cursor (Optional[int]): The `next_cursor` returned with the previous page.
+        tags (Optional[List[str]]): Tags the returned models must have.
+        tag_match (schemas.TagMatch): Whether models must have all or any of the tags.
+        predict_function (Optional[str]): The predict function of the returned models.
+        view (schemas.ModelView): Whether to return full models or their summary.
+        fields (Optional[List[str]]): Columns to return, taking precedence over the view.
+        if_none_match (Optional[str]): The ETags of the listings the client has.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        dict: The models of the page and the cursor of the next page.
+    """
+    fields = model_serv.resolve_fields(view, fields)
+    etag = model_serv.make_etag("models", user.id, await model_serv.read_model_changes(user.id, db))
+    if model_serv.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    model_display, next_cursor = await model_serv.read_all_models(
+        user.id,
+        db,
+        limit=limit,
+        cursor=cursor,
+        tags=tags,
+        predict_function=predict_function,
+        fields=fields,
+        tag_match=tag_match,
+    )
+    return {"model": model_display, "next_cursor": next_cursor}
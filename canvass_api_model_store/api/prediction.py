@@ -0,0 +1,112 @@
+"""Module containing prediction routes defined for this API.
+
+Attributes:
+    prediction_router (fastapi.APIRouter): The router for the prediction routes.
+"""
+
+import datetime as dt
+from typing import List, Optional
+
+from api.v1.auth import services as auth_serv
+from api.v1.model_store import services as model_serv
+from api.v1.prediction import services as prediction_serv
+from fastapi import APIRouter, Depends, Query, Request, status
+from models import schemas
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from canvass_api_model_store.core.config import settings
+
+prediction_router = APIRouter(prefix="/api/models")
+
+
+@prediction_router.post(
+    "/{model_id}/predictions",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.PredictionIngestResult,
+)
+async def ingest_predictions(
+    model_id: int,
+    request: Request,
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+):
+    """Log a batch of predictions for a model.
+
+    The body is either a JSON array of predictions or an NDJSON stream with one prediction per
+    line (`Content-Type: application/x-ndjson`). The ownership check is committed before the
+    body is read, so slow uploads do not hold a database connection while they stream.
+
+    Args:
+        model_id (int): The ID of the model the predictions belong to.
+        request (Request): The request holding the predictions.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        schemas.PredictionIngestResult: The accepted and rejected counts, per batch and total.
+
+    Raises:
+        HTTPException: If the model does not exist or the body is not a list of predictions.
+    """
+    await model_serv.model_selector(model_id, user, db)
+    await db.commit()
+    return await prediction_serv.ingest_predictions(
+        model_id,
+        prediction_serv.iter_records(request),
+        db,
+        batch_size=settings.prediction_batch_size,
+    )
+
+
+@prediction_router.get("/predictions/latest", response_model=List[schemas.Prediction])
+async def read_latest_predictions(
+    model_id: Optional[List[int]] = Query(None),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+):
+    """Get the latest prediction of each model of the current user.
+
+    Args:
+        model_id (Optional[List[int]]): The IDs of the models to look up, all models if omitted.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[schemas.Prediction]: The latest prediction of every model having one.
+    """
+    return await prediction_serv.read_latest_predictions(user.id, db, model_id)
+
+
+@prediction_router.get("/{model_id}/predictions", response_model=schemas.PredictionPage)
+async def read_predictions(
+    model_id: int,
+    start: Optional[dt.datetime] = Query(None, description="Start of the window, inclusive"),
+    end: Optional[dt.datetime] = Query(None, description="End of the window, exclusive"),
+    version: Optional[int] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+    user: schemas.User = Depends(auth_serv.get_current_user),
+    db: AsyncSession = Depends(auth_serv.get_db),
+):
+    """Get the predictions of a model over a time window, newest first.
+
+    Args:
+        model_id (int): The ID of the model.
+        start (Optional[dt.datetime]): The start of the window.
+        end (Optional[dt.datetime]): The end of the window.
+        version (Optional[int]): The model version of the returned predictions.
+        limit (int): The maximum number of predictions to return.
+        cursor (Optional[str]): The cursor returned with the previous page.
+        user (schemas.User): The current user.
+        db (AsyncSession): The database session.
+
+    Returns:
+        schemas.PredictionPage: The predictions of the page and the cursor of the next page.
+
+    Raises:
+        HTTPException: If the model does not exist or the cursor is malformed.
+    """
+    await model_serv.model_selector(model_id, user, db)
+    return await prediction_serv.read_predictions(
+        model_id, db, limit, start=start, end=end, version=version, cursor=cursor
+    )
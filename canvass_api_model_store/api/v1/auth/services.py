@@ -4,6 +4,7 @@ Attributes:
     oauth2schema: An instance of `security.OAuth2PasswordBearer` for retrieving OAuth2 tokens.
     JWT_SECRET (str): The secret key used for JWT encoding.
     TOKEN_TYPE (str): The type of token used for authentication.
+    user_cache (TTLCache): Cache of authenticated users keyed by user id and token.
 
 """
 
@@ -12,56 +13,76 @@ import jwt
 import models.models as _models
 import models.schemas as _schemas
 from fastapi import Depends, HTTPException, security, status
-from models.database import SessionLocal
-from passlib import hash
-from sqlalchemy import orm
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from canvass_api_model_store.core.cache import TTLCache
+from canvass_api_model_store.core.config import settings
+from canvass_api_model_store.core.db import async_session
+from canvass_api_model_store.core.hashing import password_hasher
 
 oauth2schema = security.OAuth2PasswordBearer(tokenUrl="/auth/api/token")
 
 JWT_SECRET = os.environ.get("JWT_SECRET")
 TOKEN_TYPE = os.environ.get("TOKEN_TYPE")
 
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+
+
+def invalidate_user(user_id: int):
+    """Function to drop every cached lookup of a user from the cache of this worker.
+
+    Paths changing the email, name or org of a user, or deleting it, must call this once their
+    change is committed. Other workers keep serving their entries for up to `user_cache_ttl`.
+
+    Args:
+        user_id (int): The id of the user.
+    """
+    user_cache.invalidate_where(lambda key: key[0] == user_id)
+
 
-def get_db():
+async def get_db():
     """Function to get the database session object.
 
+    Sessions come from the process wide async engine, so requests share one connection pool
+    and never block the event loop while waiting on the database.
+
     Returns:
-        sqlalchemy.orm.Session: A SQLAlchemy database session object.
+        AsyncSession: A SQLAlchemy async database session object.
 
     Raises:
         HTTPException: If there is an error accessing the database.
     """
-    db = SessionLocal()
-    try:
-        yield db
-    except SQLAlchemyError as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database Error"
-        )
-    finally:
-        db.close()
+    async with async_session() as db:
+        try:
+            yield db
+        except SQLAlchemyError as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database Error"
+            )
 
 
-async def get_user_by_email(email: str, db: orm.Session):
+async def get_user_by_email(email: str, db: AsyncSession):
     """Function get user by email.
     Args:
         email (str): The email address of the user to retrieve.
-        db (sqlalchemy.orm.Session): The database session object.
+        db (AsyncSession): The database session object.
 
     Returns:
         models.models.User: The user object matching the specified email address.
     """
-    return db.query(_models.User).filter(_models.User.email == email).one_or_none()
+    result = await db.execute(select(_models.User).where(_models.User.email == email))
+    return result.scalars().one_or_none()
 
 
-async def create_user(user: _schemas.UserCreate, db: orm.Session):
+async def create_user(user: _schemas.UserCreate, db: AsyncSession):
     """Function to create new user.
 
     Args:
         user (models.schemas.UserCreate): The user object to create.
-        db (sqlalchemy.orm.Session): The database session object.
+        db (AsyncSession): The database session object.
 
     Returns:
         models.models.User: The newly created user object.
@@ -70,21 +91,21 @@ async def create_user(user: _schemas.UserCreate, db: orm.Session):
         email=user.email,
         name=user.name,
         org=user.org,
-        hashed_password=hash.bcrypt.hash(user.hashed_password),
+        hashed_password=await password_hasher.hash(user.hashed_password),
     )
     db.add(user_obj)
-    db.commit()
-    db.refresh(user_obj)
+    await db.commit()
+    await db.refresh(user_obj)
     return user_obj
 
 
-async def authenticate_user(email: str, password: str, db: orm.Session):
+async def authenticate_user(email: str, password: str, db: AsyncSession):
     """Function to authenticate user.
 
     Args:
         email (str): The email address of the user to authenticate.
         password (str): The password of the user to authenticate.
-        db (sqlalchemy.orm.Session): The database session object.
+        db (AsyncSession): The database session object.
 
     Returns:
         models.models.User: The authenticated user object.
@@ -94,7 +115,7 @@ async def authenticate_user(email: str, password: str, db: orm.Session):
     if not user:
         return False
 
-    if not user.verify_password(password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
 
     return user
@@ -117,13 +138,16 @@ async def create_token(user: _models.User):
 
 
 async def get_current_user(
-    db: orm.Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2schema),
 ):
     """Function to get current loggedin user.
 
+    Resolved users are cached per user id and token, so authenticated requests only hit the
+    database on a cache miss.
+
     Args:
-        db (orm.Session): The SQLAlchemy session object.
+        db (AsyncSession): The SQLAlchemy session object.
         token (str): The JSON Web Token (JWT) for authentication.
 
     Returns:
@@ -134,10 +158,41 @@ async def get_current_user(
     """
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        user = db.query(_models.User).get(payload["id"])
     except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Email or Password"
         )
 
-    return _schemas.User.from_orm(user)
+    cache_key = (payload["id"], token)
+    cached_user = user_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
+    user = await db.get(_models.User, payload["id"])
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Email or Password"
+        )
+
+    user_obj = _schemas.User.from_orm(user)
+    user_cache.set(cache_key, user_obj)
+    return user_obj
+
+
+async def get_admin_user(user: _schemas.User = Depends(get_current_user)):
+    """Function to get the current logged-in user, provided it is an administrator.
+
+    Administrators are the users whose email is listed in the `admin_emails` setting.
+
+    Args:
+        user (_schemas.User): The current logged-in user.
+
+    Returns:
+        _schemas.User: The current logged-in administrator.
+
+    Raises:
+        HTTPException: If the user is not an administrator.
+    """
+    if user.email.lower() not in {email.lower() for email in settings.admin_emails}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administrators only")
+    return user
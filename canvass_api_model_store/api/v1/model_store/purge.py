@@ -0,0 +1,257 @@
+"""Module containing the background purger of deleted models.
+
+Deleting a model only tombstones it by setting `deleted_at`, which hides it from every read.
+Once a grace period has passed, letting requests that were writing to the model finish, the
+purger removes its predictions in bounded batches, each committed on its own, before deleting
+the model row and, once no other model shares it, its artifact blob. A delete request
+therefore costs a single row update whatever the number of predictions.
+
+Classes:
+    ModelPurger: Background task purging tombstoned models.
+
+Attributes:
+    logger: Instance of logging to show FastAPI messages
+"""
+
+import asyncio
+import datetime as dt
+import logging
+import os
+from typing import List, Optional
+
+import models.models as _models
+from fastapi import Request
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from canvass_api_model_store.core.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPurger:
+    """Background task purging tombstoned models.
+
+    The purger wakes up every `interval` seconds, or as soon as `wake` is called after a
+    delete. Purging is idempotent, so several workers can run a purger on the same database;
+    a model whose purge fails is retried on the next round.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        storage: StorageBackend,
+        batch_size: int,
+        interval: float,
+        grace_period: float = 0,
+    ):
+        """Initialize the purger.
+
+        Args:
+            session_factory: The factory of the database sessions used by the purger.
+            storage (StorageBackend): The storage backend holding model artifacts.
+            batch_size (int): The maximum number of predictions deleted per statement.
+            interval (float): The number of seconds between two purge rounds.
+            grace_period (float): The number of seconds a model stays tombstoned before it is
+                purged.
+        """
+        self.session_factory = session_factory
+        self.storage = storage
+        self.batch_size = batch_size
+        self.interval = interval
+        self.grace_period = grace_period
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start purging in the background of the running event loop."""
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop purging, abandoning the current batch, which is rolled back."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Start a purge round without waiting for the interval to elapse."""
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Run purge rounds until the purger is stopped."""
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.purge()
+            except Exception:
+                logger.exception("Error during model purge")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def purge(self) -> int:
+        """Purge every model tombstoned for longer than the grace period.
+
+        Returns:
+            int: The number of models purged.
+        """
+        model = _models.Model
+        deleted_before = dt.datetime.utcnow() - dt.timedelta(seconds=self.grace_period)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(model.id)
+                .where(model.deleted_at.isnot(None), model.deleted_at <= deleted_before)
+                .order_by(model.deleted_at)
+            )
+            model_ids = result.scalars().all()
+
+        purged = 0
+        for model_id in model_ids:
+            try:
+                await self.purge_model(model_id)
+                purged += 1
+            except SQLAlchemyError:
+                logger.exception(f"Error during purge of model with id: {model_id}")
+        return purged
+
+    async def delete_predictions(self, model_id: int) -> int:
+        """Delete the predictions of a model in batches of at most `batch_size` rows.
+
+        Args:
+            model_id (int): The id of the model.
+
+        Returns:
+            int: The number of predictions deleted.
+        """
+        prediction = _models.Prediction
+        batch = (
+            select(prediction.id)
+            .where(prediction.model_id == model_id)
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+        deleted = 0
+        while True:
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    delete(prediction)
+                    .where(prediction.model_id == model_id, prediction.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                return deleted
+            # Let requests run between batches
+            await asyncio.sleep(0)
+
+    async def lock_unshared_artifact(self, db, digest: str) -> bool:
+        """Lock an artifact and check that no model references it anymore.
+
+        Registrations reusing an artifact hold a share lock on it until their model is
+        committed, so the references are only counted once the lock is granted.
+
+        Args:
+            db: The database session of the purge.
+            digest (str): The digest of the artifact.
+
+        Returns:
+            bool: True if the artifact exists and no model references it.
+        """
+        artifact = _models.Artifact
+        model = _models.Model
+        locked = await db.execute(
+            select(artifact.digest).where(artifact.digest == digest).with_for_update()
+        )
+        if locked.one_or_none() is None:
+            return False
+        shared = await db.execute(select(exists().where(model.artifact_digest == digest)))
+        return not shared.scalar()
+
+    async def legacy_blob_names(self, model_id: int) -> List[str]:
+        """Find the blob of a model registered before artifact names were recorded.
+
+        Such models stored their artifact as `model-{id}{ext}`, and their extension is not
+        recorded, so the blob is looked up by name.
+
+        Args:
+            model_id (int): The id of the model.
+
+        Returns:
+            List[str]: The names of the blobs of the model.
+        """
+        stem = f"model-{model_id}"
+        names = await self.storage.list_blobs(stem)
+        return [name for name in names if os.path.splitext(name)[0] == stem]
+
+    async def purge_model(self, model_id: int) -> None:
+        """Purge a tombstoned model, its predictions and its unshared artifact.
+
+        The model row is locked before its last predictions, tags and row are deleted in one
+        transaction, so predictions written while the batches were deleted are removed with it
+        and later writes wait for the lock and then fail to find the model. The artifact row is
+        deleted in the same transaction, and the blob only once it is committed, so a failure
+        never leaves a row pointing at a deleted blob. Models registered before artifact names
+        were recorded have their blob looked up by name.
+
+        Args:
+            model_id (int): The id of the model.
+        """
+        deleted = await self.delete_predictions(model_id)
+
+        model = _models.Model
+        artifact = _models.Artifact
+        prediction = _models.Prediction
+        blob_names = []
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(model.artifact_name, model.artifact_digest)
+                .where(model.id == model_id, model.deleted_at.isnot(None))
+                .with_for_update()
+            )
+            row = result.one_or_none()
+            if row is None:
+                return
+
+            result = await db.execute(
+                delete(prediction)
+                .where(prediction.model_id == model_id)
+                .execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount
+            await db.execute(
+                delete(_models.ModelTag)
+                .where(_models.ModelTag.model_id == model_id)
+                .execution_options(synchronize_session=False)
+            )
+            await db.execute(delete(model).where(model.id == model_id))
+            if row.artifact_digest is None and row.artifact_name is not None:
+                # Models registered before artifacts were deduplicated own their blob
+                blob_names = [row.artifact_name]
+            elif await self.lock_unshared_artifact(db, row.artifact_digest):
+                await db.execute(delete(artifact).where(artifact.digest == row.artifact_digest))
+                blob_names = [row.artifact_name]
+            await db.commit()
+
+        if row.artifact_digest is None and row.artifact_name is None:
+            blob_names = await self.legacy_blob_names(model_id)
+        for blob_name in blob_names:
+            await self.storage.delete(blob_name)
+        logger.info(f"Model purged with id: {model_id}, {deleted} predictions deleted")
+
+
+def get_purger(request: Request) -> ModelPurger:
+    """Function to get the model purger of the application.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        ModelPurger: The purger opened at startup.
+    """
+    return request.app.state.purger
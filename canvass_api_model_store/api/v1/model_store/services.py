@@ -4,43 +4,340 @@ This module provides functions for creating a new model, selecting, updating,
 retrieving and deleting a model.
 
 Functions:
+    store_artifact: Function to store an artifact once per distinct content.
     create_model: Function to create a new model.
     model_selector: Function to select a model.
-    delete_model: Function to delete a model.
+    stream_artifact: Function to stream the artifact of a model.
+    record_model_change: Function to bump the model change counter of a user.
+    delete_model: Function to tombstone a model.
+    bulk_create_models: Function to register many models in one transaction.
+    bulk_update_models: Function to update many models in one transaction.
+    bulk_delete_models: Function to tombstone many models in one transaction.
 
 Attributes:
     logger: Instance of logging to show FastAPI messages
+    model_cache (TTLCache): Cache of serialized models keyed by user id, model id and version.
+    model_versions (TTLCache): Cache of the current version of models keyed by user id and model
+        id, trusted for `model_version_ttl` seconds.
 """
 
 import logging
 from operator import and_
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 import models.models as _models
 import models.schemas as _schemas
-from fastapi import HTTPException, status, UploadFile, File
-from sqlalchemy import orm
-from sqlalchemy.exc import NoResultFound, SQLAlchemyError
+from fastapi import HTTPException, Request, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import bindparam, delete, func, insert, literal, null, select, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import IntegrityError, NoResultFound, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from canvass_api_model_store.core.cache import TTLCache
+from canvass_api_model_store.core.config import settings
+from canvass_api_model_store.core.json_patch import (
+    JSON_PATCH_CONTENT_TYPE,
+    MERGE_PATCH_CONTENT_TYPE,
+    JsonPatchError,
+    apply_json_patch,
+    apply_merge_patch,
+    parse_json_patch,
+)
+from canvass_api_model_store.core.metrics import meter_download
+from canvass_api_model_store.core.storage import (
+    ArtifactTooLargeError,
+    BlobNotFoundError,
+    BlockUploader,
+    InvalidBlobNameError,
+    StagedBlob,
+    StorageBackend,
+)
 
 logger = logging.getLogger(__name__)
 
+import asyncio
+import base64
+import datetime as dt
 import json
 import os
-from azure.storage.blob import BlobServiceClient
+import uuid
+
+block_uploader = BlockUploader(
+    block_size=settings.upload_block_size,
+    max_size=settings.max_artifact_size,
+    concurrency=settings.upload_concurrency,
+    max_retries=settings.upload_max_retries,
+)
+
+# Columns of models holding JSON documents, which can be patched
+JSON_FIELDS = [
+    "custom_functions",
+    "storage_options",
+    "container_options",
+    "model_metadata",
+    "input_features_and_types",
+    "output_names_and_types",
+]
+
+# Inserts supporting ON CONFLICT, used to register artifacts uploaded concurrently
+ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# SQLSTATE raised by the database patch functions when a patch cannot be applied
+PATCH_FAILED_SQLSTATE = "22000"
+
+model_cache = TTLCache(maxsize=settings.model_cache_size, ttl=settings.model_cache_ttl)
+model_versions = TTLCache(maxsize=settings.model_cache_size, ttl=settings.model_version_ttl)
+
+
+def serialize_model(model: _models.Model) -> dict:
+    """Function to serialize a model row into the record returned by the read endpoints.
+
+    Args:
+        model (_models.Model): The model row.
+
+    Returns:
+        dict: The columns of the model.
+    """
+    return {column.key: getattr(model, column.key) for column in _models.Model.__table__.columns}
+
+
+def cache_model(record: dict) -> None:
+    """Function to cache a serialized model under its version.
+
+    Args:
+        record (dict): The serialized model.
+    """
+    model_cache.set((record["user_id"], record["id"], record["model_version"]), record)
+
+
+def invalidate_model(user_id: int, model_id: int, model_version: int) -> None:
+    """Function to drop the version of a model replaced by a change from the caches.
+
+    The current version of the model is forgotten, so the next read of this worker sees the
+    change. Records are only served for the current version, so dropping the record only frees
+    the entry.
+
+    Args:
+        user_id (int): The id of the user owning the model.
+        model_id (int): The id of the model.
+        model_version (int): The version of the model before the change.
+    """
+    model_versions.invalidate((user_id, model_id))
+    model_cache.invalidate((user_id, model_id, model_version))
+
+
+def make_etag(*parts) -> str:
+    """Function to build a weak entity tag.
+
+    Args:
+        *parts: The values identifying the state of the resource.
+
+    Returns:
+        str: The quoted weak entity tag.
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Function to check an `If-None-Match` header against an entity tag.
+
+    Entity tags are compared weakly, as required for `If-None-Match`.
+
+    Args:
+        if_none_match (Optional[str]): The value of the `If-None-Match` header.
+        etag (str): The current entity tag of the resource.
+
+    Returns:
+        bool: True if the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
+
+
+def parse_tags(tags: Optional[str]) -> List[str]:
+    """Function to split the comma separated tags of a model.
+
+    Args:
+        tags (Optional[str]): The tags of the model.
+
+    Returns:
+        List[str]: The distinct tags, stripped of surrounding spaces, in order.
+    """
+    return list(dict.fromkeys(tag.strip() for tag in (tags or "").split(",") if tag.strip()))
+
+
+async def insert_tags(db: AsyncSession, user_id: int, tags: Dict[int, Optional[str]]) -> None:
+    """Function to write the tag rows of new models with one statement.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session object.
+        user_id (int): The id of the user owning the models.
+        tags (Dict[int, Optional[str]]): The comma separated tags of each model, by model id.
+    """
+    rows = [
+        {"model_id": model_id, "tag": tag, "user_id": user_id}
+        for model_id, model_tags in tags.items()
+        for tag in parse_tags(model_tags)
+    ]
+    if rows:
+        await db.execute(insert(_models.ModelTag.__table__).values(rows))
+
+
+async def replace_tags(db: AsyncSession, user_id: int, tags: Dict[int, Optional[str]]) -> None:
+    """Function to replace the tag rows of models whose tags changed.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session object.
+        user_id (int): The id of the user owning the models.
+        tags (Dict[int, Optional[str]]): The new comma separated tags of each model, by model id.
+    """
+    await db.execute(
+        delete(_models.ModelTag)
+        .where(_models.ModelTag.model_id.in_(tags))
+        .execution_options(synchronize_session=False)
+    )
+    await insert_tags(db, user_id, tags)
 
-AZURE_STORAGE_CONNECTION_STRING = os.environ.get("AZURE_STORAGE_CONNECTION_STRING")
-AZURE_STORAGE_CONTAINER_NAME = "models"
+
+async def record_model_change(db: AsyncSession, user_id: int) -> None:
+    """Function to bump the model change counter of a user, in the caller's transaction.
+
+    The counter tags the model listings of the user, so every statement adding, changing or
+    removing models must be committed along with a call to this function.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session object.
+        user_id (int): The id of the user owning the changed models.
+    """
+    await db.execute(
+        update(_models.User)
+        .where(_models.User.id == user_id)
+        .values(model_changes=_models.User.model_changes + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def read_model_version(user_id: int, model_id: int, db: AsyncSession) -> Optional[int]:
+    """Function to read the current version of a model.
+
+    Every change to a model bumps its version, so this single row lookup tells whether a
+    cached record or an entity tag is still current, whichever worker made the change. The
+    version is then trusted for `model_version_ttl` seconds, so repeated reads are served from
+    memory and see the changes of other workers once that window has passed.
+
+    Args:
+        user_id (int): The id of the user owning the model.
+        model_id (int): The id of the model.
+        db (AsyncSession): SQLAlchemy database session object.
+
+    Returns:
+        Optional[int]: The version of the model, or None if it does not exist.
+    """
+    version = model_versions.get((user_id, model_id))
+    if version is not None:
+        return version
+
+    result = await db.execute(
+        select(_models.Model.model_version).where(
+            _models.Model.id == model_id,
+            _models.Model.user_id == user_id,
+            _models.Model.deleted_at.is_(None),
+        )
+    )
+    version = result.scalar_one_or_none()
+    if version is not None:
+        model_versions.set((user_id, model_id), version)
+    return version
+
+
+async def read_model_changes(user_id: int, db: AsyncSession) -> int:
+    """Function to read the model change counter of a user.
+
+    Args:
+        user_id (int): The id of the user.
+        db (AsyncSession): SQLAlchemy database session object.
+
+    Returns:
+        int: The number of changes made to the models of the user.
+    """
+    result = await db.execute(select(_models.User.model_changes).where(_models.User.id == user_id))
+    return result.scalar_one_or_none() or 0
+
+
+async def store_artifact(
+    db: AsyncSession, storage: StorageBackend, file: UploadFile
+) -> Tuple[_models.Artifact, Optional[str]]:
+    """Function to store an artifact once per distinct content.
+
+    The file is staged as blocks under a fresh blob name while its SHA-256 digest is computed,
+    before the session is used, so no database connection is held during the upload. The blocks
+    are only committed into a blob once the digest is known to be new. If an artifact with the
+    same digest is already stored, it is reused and the uncommitted blocks are returned to be
+    discarded. The reused artifact is locked until the end of the transaction, so the purger can
+    not delete it before the model referencing it is committed.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session object.
+        storage (StorageBackend): The storage backend holding model artifacts.
+        file (UploadFile): The model artifact.
+
+    Returns:
+        Tuple[_models.Artifact, Optional[str]]: The stored artifact, added to the session if new,
+        and the name of the blob to delete once the transaction ends, if any.
+
+    Raises:
+        ArtifactTooLargeError: If the artifact exceeds the maximum artifact size.
+    """
+    _, extension = os.path.splitext(file.filename)
+    blob_name = f"artifact-{uuid.uuid4().hex}{extension}"
+    try:
+        staged = await block_uploader.stage(file, storage, blob_name)
+    except ArtifactTooLargeError:
+        await storage.delete(blob_name)
+        raise
+
+    shared = select(_models.Artifact).where(_models.Artifact.digest == staged.digest)
+    artifact = (await db.execute(shared.with_for_update(read=True))).scalar_one_or_none()
+    if artifact is None:
+        await storage.commit_blocks(blob_name, staged.block_ids)
+        artifact = _models.Artifact(digest=staged.digest, blob_name=blob_name, size=staged.size)
+        try:
+            async with db.begin_nested():
+                db.add(artifact)
+            return artifact, None
+        except IntegrityError:
+            # A concurrent upload of the same content was registered first
+            artifact = (await db.execute(shared.with_for_update(read=True))).scalar_one()
+
+    logger.info(f"Reusing stored artifact {staged.digest}")
+    return artifact, blob_name
 
 
 async def create_model(
-    user: _schemas.User, db: orm.Session, model: _schemas.ModelCreate, file: UploadFile
+    user: _schemas.User,
+    db: AsyncSession,
+    model: _schemas.ModelCreate,
+    file: UploadFile,
+    storage: StorageBackend,
 ):
     """Function to create new model.
 
+    The artifact is uploaded before the model row is written, so no database connection is
+    held open during the upload.
+
     Args:
         user (_schemas.User): The user object.
-        db (orm.Session): SQLAlchemy database session object.
+        db (AsyncSession): SQLAlchemy database session object.
         model (_schemas.ModelCreate): The model to be created.
+        file (UploadFile): The model artifact.
+        storage (StorageBackend): The storage backend holding model artifacts.
 
     Returns:
         _schemas.Model: The created model object.
@@ -49,44 +346,36 @@ async def create_model(
         HTTPException: If there is an error during the database operation.
 
     """
+    discarded = None
     try:
         # Create model in database
         db_model = _models.Model(**model.dict(), user_id=user.id)
 
-        for attr_name in [
-            "custom_functions",
-            "storage_options",
-            "container_options",
-            "model_metadata",
-            "input_features_and_types",
-            "output_names_and_types",
-        ]:
+        for attr_name in JSON_FIELDS:
             attr_value = getattr(db_model, attr_name)
             if attr_value:
                 setattr(db_model, attr_name, json.loads(attr_value))
 
+        artifact, discarded = await store_artifact(db, storage, file)
+        db_model.artifact_name = artifact.blob_name
+        db_model.artifact_digest = artifact.digest
         db.add(db_model)
-        db.commit()
-        db.refresh(db_model)
+        await db.flush()
+        await insert_tags(db, user.id, {db_model.id: db_model.tags})
+        await record_model_change(db, user.id)
+        await db.commit()
         model_id = db_model.id
-        filename, extension = os.path.splitext(file.filename)
-        blob_name = f"model-{model_id}{extension}"
-
-        blob_service_client = BlobServiceClient.from_connection_string(
-            AZURE_STORAGE_CONNECTION_STRING
-        )
-        container_client = blob_service_client.get_container_client(AZURE_STORAGE_CONTAINER_NAME)
-        blob_client = container_client.get_blob_client(blob_name)
-        data = await file.read()
-        blob_client.upload_blob(data, overwrite=True)
 
         # Log success and return model ID
         logger.info(f"Model created with id: {model_id}")
-        return {"model_id": model_id}
+        return {"model_id": model_id, "digest": artifact.digest}
 
+    except ArtifactTooLargeError as e:
+        logger.warning(f"Rejected artifact for new model: {e}")
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except SQLAlchemyError:
         logger.exception("Error during model create SQL execution")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Database error occurred during create model",
@@ -96,29 +385,30 @@ async def create_model(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error."
         )
+    finally:
+        if discarded:
+            await storage.delete(discarded)
 
 
-async def upload_file(file: UploadFile):
+async def upload_file(file: UploadFile, storage: StorageBackend):
     try:
-        blob_service_client = BlobServiceClient.from_connection_string(
-            AZURE_STORAGE_CONNECTION_STRING
-        )
-        container_client = blob_service_client.get_container_client(AZURE_STORAGE_CONTAINER_NAME)
-        blob_client = container_client.get_blob_client(file.filename)
-        data = await file.read()
-        blob_client.upload_blob(data, overwrite=True)
+        await block_uploader.upload(file, storage, file.filename)
         return {"message": "File uploaded successfully."}
+    except ArtifactTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidBlobNameError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         return {"message": f"Error uploading file: {e}"}
 
 
-async def model_selector(model_id: int, user: _schemas.User, db: orm.Session) -> _schemas.Model:
+async def model_selector(model_id: int, user: _schemas.User, db: AsyncSession) -> _schemas.Model:
     """Function to select a model.
 
     Args:
         model_id (int): The ID of the model to be selected.
         user (_schemas.User): The user object.
-        db (orm.Session): SQLAlchemy database session object.
+        db (AsyncSession): SQLAlchemy database session object.
 
     Returns:
         The selected model object.
@@ -127,11 +417,14 @@ async def model_selector(model_id: int, user: _schemas.User, db: orm.Session) ->
         HTTPException: If the model does not exist or there is an error during the database operation.
     """
     try:
-        model = (
-            db.query(_models.Model)
-            .filter(_models.Model.user_id == user.id, _models.Model.id == model_id)
-            .one_or_none()
+        result = await db.execute(
+            select(_models.Model).where(
+                _models.Model.user_id == user.id,
+                _models.Model.id == model_id,
+                _models.Model.deleted_at.is_(None),
+            )
         )
+        model = result.scalars().one_or_none()
 
         if not model:
             raise NoResultFound
@@ -149,13 +442,143 @@ async def model_selector(model_id: int, user: _schemas.User, db: orm.Session) ->
     return model
 
 
-async def delete_model(model_id: int, user: _schemas.User, db: orm.Session):
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Function to parse the `Range` header of an artifact download.
+
+    Only single byte ranges are served partially; other ranges fall back to the whole artifact,
+    as HTTP allows.
+
+    Args:
+        range_header (Optional[str]): The value of the `Range` header.
+        size (int): The size of the artifact in bytes.
+
+    Returns:
+        Optional[Tuple[int, int]]: The first and last byte of the range, both inclusive, or None
+        to send the whole artifact.
+
+    Raises:
+        HTTPException: If the range starts past the end of the artifact.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    first, _, last = range_header[len("bytes=") :].strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last `last` bytes
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def stream_artifact(
+    model_id: int,
+    user: _schemas.User,
+    db: AsyncSession,
+    storage: StorageBackend,
+    range_header: Optional[str] = None,
+    if_range: Optional[str] = None,
+) -> StreamingResponse:
+    """Function to stream the artifact of a model, in whole or as a byte range.
+
+    The artifact is relayed chunk by chunk from the storage backend, so memory use does not
+    depend on its size. Artifacts stored with a digest send it as their ETag and in a
+    `Repr-Digest` header. The download is pinned to the entity tag sent in the headers, so a
+    concurrent re-upload aborts the stream instead of mixing two artifacts.
+
+    Args:
+        model_id (int): The ID of the model.
+        user (_schemas.User): The user object.
+        db (AsyncSession): SQLAlchemy database session object.
+        storage (StorageBackend): The storage backend holding model artifacts.
+        range_header (Optional[str]): The `Range` header of the request.
+        if_range (Optional[str]): The `If-Range` header of the request.
+
+    Returns:
+        StreamingResponse: The artifact, with status 206 when a range is served.
+
+    Raises:
+        HTTPException: If the model or its artifact does not exist, or the range is not
+        satisfiable.
+    """
+    model = await model_selector(model_id, user, db)
+    artifact_name = model.artifact_name
+    digest = model.artifact_digest
+    # Release the connection now, the stream can outlive the handler by minutes
+    await db.close()
+
+    if not artifact_name:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model with id {model_id} has no artifact",
+        )
+    try:
+        properties = await storage.get_properties(artifact_name)
+    except BlobNotFoundError:
+        logger.exception(f"Artifact of model with id {model_id} not found")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model with id {model_id} has no artifact",
+        )
+
+    # Content-addressed artifacts never change, so their digest is a strong entity tag
+    etag = f'"{digest}"' if digest else properties.etag
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="{artifact_name}"',
+    }
+    if digest:
+        # Lets clients verify the whole artifact against the checksum stored at upload time
+        headers["Repr-Digest"] = f"sha-256=:{base64.b64encode(bytes.fromhex(digest)).decode()}:"
+
+    # A stale If-Range means the client's partial copy is outdated, so it gets the whole artifact
+    byte_range = None
+    if not if_range or if_range == etag:
+        byte_range = parse_range(range_header, properties.size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(properties.size)
+        return StreamingResponse(
+            meter_download(storage.download(artifact_name, etag=properties.etag)),
+            media_type="application/octet-stream",
+            headers=headers,
+        )
+
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{properties.size}"
+    download = storage.download(
+        artifact_name, offset=start, length=end - start + 1, etag=properties.etag
+    )
+    return StreamingResponse(
+        meter_download(download),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+async def delete_model(model_id: int, user: _schemas.User, db: AsyncSession):
     """Deletes a model from the database for a given user.
 
+    The model is only tombstoned, which hides it from every read right away. Its predictions,
+    row and artifact are removed later by the background purger.
+
     Args:
         model_id (int): The id of the model to be deleted.
         user (_schemas.User): The user instance for whom the model is being deleted.
-        db (orm.Session): The database session object.
+        db (AsyncSession): The database session object.
 
     Raises:
         HTTPException: If there is an error during the database operation.
@@ -163,12 +586,14 @@ async def delete_model(model_id: int, user: _schemas.User, db: orm.Session):
     model = await model_selector(model_id, user, db)
 
     try:
-        db.delete(model)
-        db.commit()
+        model.deleted_at = dt.datetime.utcnow()
+        await record_model_change(db, model.user_id)
+        await db.commit()
+        invalidate_model(model.user_id, model.id, model.model_version)
         logger.info(f"Model deleted with id: {model.id}")
     except SQLAlchemyError:
         logger.exception("Error during model delete SQL execution")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Database error occurred during model delete",
@@ -180,63 +605,1097 @@ async def delete_model(model_id: int, user: _schemas.User, db: orm.Session):
         )
 
 
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Function to read the expected model version from an `If-Match` header.
+
+    The header holds either an ETag returned by a model read or a bare version number.
+
+    Args:
+        if_match (Optional[str]): The value of the `If-Match` header.
+
+    Returns:
+        Optional[int]: The expected version, or None if any version is accepted.
+
+    Raises:
+        HTTPException: If the header holds neither an ETag of a model nor a version.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    try:
+        return int(tag.rsplit("-", 1)[-1])
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must hold a model ETag or version",
+        )
+
+
 async def update_model(
-    user: _schemas.User, db: orm.Session, model: _schemas.ModelUpdate, model_id: int
-) -> _schemas.Model:
+    user: _schemas.User,
+    db: AsyncSession,
+    model: _schemas.ModelUpdate,
+    model_id: int,
+    expected_version: Optional[int] = None,
+) -> dict:
     """Function to update a model.
 
     Args:
         user (_schemas.User): The user object.
-        db (orm.Session): The database session object.
+        db (AsyncSession): The database session object.
         model (_schemas.ModelUpdate): The update model object.
         model_id (int): The model id.
+        expected_version (Optional[int]): The version the update is based on, if any.
+
+    Returns:
+        dict: The updated model.
+
+    Raises:
+        HTTPException: If the model does not exist, its version is not the expected one, or
+        there is a database error.
+    """
+    return await write_model_update(
+        user, db, model_id, model.dict(exclude_unset=True), expected_version
+    )
+
+
+async def execute_model_update(db: AsyncSession, statement, conditions: list):
+    """Function to run a model update and return the updated row.
+
+    Args:
+        db (AsyncSession): The database session object.
+        statement: The `UPDATE` statement of the model.
+        conditions (list): The conditions selecting the model, without the expected version.
+
+    Returns:
+        Optional[RowMapping]: The updated row, or None if the update matched no model.
+    """
+    table = _models.Model.__table__
+    if db.bind.dialect.full_returning:
+        result = await db.execute(statement.returning(*table.columns))
+        return result.mappings().one_or_none()
+
+    # Dialects without RETURNING read the row back in the same transaction
+    result = await db.execute(statement)
+    if not result.rowcount:
+        return None
+    result = await db.execute(select(*table.columns).where(*conditions))
+    return result.mappings().one()
+
+
+async def update_precondition_failed(
+    db: AsyncSession, user_id: int, model_id: int, expected_version: Optional[int]
+) -> HTTPException:
+    """Function to tell why an update matched no model.
+
+    The model is read in the transaction of the update, bypassing the cache, so the answer
+    reflects changes made by other workers.
+
+    Args:
+        db (AsyncSession): The database session object.
+        user_id (int): The id of the user owning the model.
+        model_id (int): The model id.
+        expected_version (Optional[int]): The version the update was based on, if any.
+
+    Returns:
+        HTTPException: A 404 if the model does not exist or is deleted, a 412 otherwise.
+    """
+    model = _models.Model
+    result = await db.execute(
+        select(model.model_version, model.deleted_at).where(
+            model.id == model_id, model.user_id == user_id
+        )
+    )
+    row = result.one_or_none()
+    if row is None or row.deleted_at is not None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Model with id {model_id} does not exist",
+        )
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=(
+            f"Model with id {model_id} is not at version {expected_version}, "
+            f"but at version {row.model_version}"
+        ),
+    )
+
+
+def update_failed(error: SQLAlchemyError) -> HTTPException:
+    """Function to map a database error raised by a model update to a response.
+
+    Args:
+        error (SQLAlchemyError): The database error.
+
+    Returns:
+        HTTPException: A 409 if a patch could not be applied, a 500 otherwise.
+    """
+    if getattr(getattr(error, "orig", None), "pgcode", None) == PATCH_FAILED_SQLSTATE:
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error.orig))
+    logger.exception(f"Database Error: {error}")
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database Error: {error}"
+    )
+
+
+async def write_model_update(
+    user: _schemas.User,
+    db: AsyncSession,
+    model_id: int,
+    values: dict,
+    expected_version: Optional[int] = None,
+) -> dict:
+    """Function to update a model with a single statement.
+
+    The new values and the version increment are written by one `UPDATE ... RETURNING`
+    filtered on the owner and, when given, the expected version. Concurrent updates are
+    serialized by the database without holding locks across requests, and an update based on
+    a stale version matches no row instead of overwriting a newer one.
+
+    Args:
+        user (_schemas.User): The user object.
+        db (AsyncSession): The database session object.
+        model_id (int): The model id.
+        values (dict): The new values of the updated columns, either values or SQL expressions.
+        expected_version (Optional[int]): The version the update is based on, if any.
+
+    Returns:
+        dict: The updated model.
+
+    Raises:
+        HTTPException: If the model does not exist, its version is not the expected one, a
+        patch cannot be applied, or there is a database error.
+    """
+    table = _models.Model.__table__
+    conditions = [table.c.id == model_id, table.c.user_id == user.id, table.c.deleted_at.is_(None)]
+    if expected_version is not None:
+        conditions.append(table.c.model_version == expected_version)
+    statement = (
+        update(table).where(*conditions).values(**values, model_version=table.c.model_version + 1)
+    )
+
+    try:
+        row = await execute_model_update(db, statement, conditions[:3])
+        if row is None:
+            error = await update_precondition_failed(db, user.id, model_id, expected_version)
+            await db.rollback()
+            raise error
+
+        if "tags" in values:
+            await replace_tags(db, user.id, {model_id: values["tags"]})
+        await record_model_change(db, user.id)
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise update_failed(e)
+
+    # Replace the cached model, pollers are likely to read the new version right away
+    record = dict(row)
+    invalidate_model(user.id, model_id, record["model_version"] - 1)
+    cache_model(record)
+    logger.info(f"Model updated with id: {model_id} to version {record['model_version']}")
+    return record
+
+
+async def read_patch(request: Request) -> Tuple[str, Any]:
+    """Function to read the patch sent in the body of a request.
+
+    Args:
+        request (Request): The patch request.
+
+    Returns:
+        Tuple[str, Any]: The media type of the patch and the decoded patch.
+
+    Raises:
+        HTTPException: If the body is not a JSON Patch or merge patch document.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in (JSON_PATCH_CONTENT_TYPE, MERGE_PATCH_CONTENT_TYPE):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected {JSON_PATCH_CONTENT_TYPE} or {MERGE_PATCH_CONTENT_TYPE}",
+        )
+    try:
+        return content_type, await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+
+
+def split_patch(content_type: str, document: Any) -> Dict[str, Any]:
+    """Function to split a patch of the JSON fields of a model into one patch per field.
+
+    JSON Patch paths start with the field they change, as in `/model_metadata/owner`. Merge
+    patches are objects keyed by field.
+
+    Args:
+        content_type (str): The media type of the patch.
+        document (Any): The decoded patch.
+
+    Returns:
+        Dict[str, Any]: The JSON Patch operations or merge patch of each changed field.
+
+    Raises:
+        HTTPException: If the patch is malformed or changes anything but the JSON fields.
+    """
+    try:
+        if content_type == MERGE_PATCH_CONTENT_TYPE:
+            if not isinstance(document, dict):
+                raise JsonPatchError("A merge patch of a model must be an object")
+            patches = document
+        else:
+            patches = {}
+            for operation in parse_json_patch(document):
+                field = operation["path"][0] if operation["path"] else None
+                if "from" in operation and operation["from"][:1] != [field]:
+                    raise JsonPatchError("Values can only be moved or copied within a field")
+                operation["path"] = operation["path"][1:]
+                if "from" in operation:
+                    operation["from"] = operation["from"][1:]
+                patches.setdefault(field, []).append(operation)
+    except JsonPatchError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    unknown = set(patches) - set(JSON_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only JSON fields can be patched: {', '.join(sorted(map(str, unknown)))}",
+        )
+    return patches
+
+
+async def patch_model(
+    user: _schemas.User,
+    db: AsyncSession,
+    model_id: int,
+    content_type: str,
+    document: Any,
+    expected_version: Optional[int] = None,
+) -> dict:
+    """Function to apply a JSON Patch or merge patch to the JSON fields of a model.
+
+    On PostgreSQL the patches are applied by the database within the update statement, so the
+    row is never fetched and only the patch is sent. Other databases fetch the patched fields,
+    apply the patches in Python and write them back if the model did not change meanwhile.
+
+    Args:
+        user (_schemas.User): The user object.
+        db (AsyncSession): The database session object.
+        model_id (int): The model id.
+        content_type (str): Either `application/json-patch+json` or
+            `application/merge-patch+json`.
+        document (Any): The decoded patch.
+        expected_version (Optional[int]): The version the patch is based on, if any.
+
+    Returns:
+        dict: The updated model.
+
+    Raises:
+        HTTPException: If the patch is malformed or cannot be applied, the model does not
+        exist or is not at the expected version, or there is a database error.
+    """
+    patches = split_patch(content_type, document)
+    table = _models.Model.__table__
+    # A merge patch of null removes the field, which every backend stores as SQL NULL
+    removed = {field: null() for field, patch in patches.items() if patch is None}
+    patches = {field: patch for field, patch in patches.items() if patch is not None}
+    if db.bind.dialect.name == "postgresql":
+        if content_type == MERGE_PATCH_CONTENT_TYPE:
+            function = func.jsonb_merge_patch
+        else:
+            function = func.jsonb_patch
+        values = {
+            field: function(
+                func.coalesce(table.c[field], literal({}, JSONB)), literal(patch, JSONB)
+            )
+            for field, patch in patches.items()
+        }
+        return await write_model_update(user, db, model_id, {**removed, **values}, expected_version)
+
+    result = await db.execute(
+        select(table.c.model_version, *(table.c[field] for field in patches)).where(
+            table.c.id == model_id, table.c.user_id == user.id, table.c.deleted_at.is_(None)
+        )
+    )
+    row = result.mappings().one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Model with id {model_id} does not exist"
+        )
+    if expected_version is not None and row["model_version"] != expected_version:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Model with id {model_id} is not at version {expected_version}",
+        )
+
+    values = dict(removed)
+    try:
+        for field, patch in patches.items():
+            current = row[field] if row[field] is not None else {}
+            if content_type == MERGE_PATCH_CONTENT_TYPE:
+                values[field] = apply_merge_patch(current, patch)
+            else:
+                values[field] = apply_json_patch(current, patch)
+    except JsonPatchError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    # Pin the version that was read, so a concurrent update is not overwritten
+    return await write_model_update(user, db, model_id, values, row["model_version"])
+
+
+def check_bulk_size(count: int) -> None:
+    """Function to check the number of items of a bulk request.
+
+    Args:
+        count (int): The number of items.
+
+    Raises:
+        HTTPException: If the request is empty or holds more than `max_bulk_size` items.
+    """
+    if not 0 < count <= settings.max_bulk_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A bulk request must hold between 1 and {settings.max_bulk_size} models",
+        )
+
+
+def bulk_result(results: List[_schemas.BulkItemResult]) -> _schemas.BulkResult:
+    """Function to summarize the per-item results of a bulk operation.
+
+    Args:
+        results (List[_schemas.BulkItemResult]): The result of each item, in request order.
+
+    Returns:
+        _schemas.BulkResult: The results with the number of applied and rejected items.
+    """
+    succeeded = sum(result.status < status.HTTP_400_BAD_REQUEST for result in results)
+    return _schemas.BulkResult(
+        succeeded=succeeded, failed=len(results) - succeeded, results=results
+    )
+
+
+async def store_artifacts(
+    db: AsyncSession, storage: StorageBackend, files: List[UploadFile]
+) -> Tuple[list, List[str]]:
+    """Function to store the artifacts of a bulk registration once per distinct content.
+
+    Files are staged concurrently, up to `upload_concurrency` at a time. The digests are then
+    looked up with one query, the blocks of new content are committed and the new artifacts are
+    inserted with one statement. Staged copies of content already stored, or sent twice, are
+    discarded.
+
+    Args:
+        db (AsyncSession): SQLAlchemy database session object.
+        storage (StorageBackend): The storage backend holding model artifacts.
+        files (List[UploadFile]): The model artifacts.
+
+    Returns:
+        Tuple[list, List[str]]: The stored artifact of each file, or the exception raised while
+        staging it, and the names of the blobs committed by this call.
+    """
+    semaphore = asyncio.Semaphore(settings.upload_concurrency)
+
+    async def stage(file: UploadFile) -> StagedBlob:
+        _, extension = os.path.splitext(file.filename)
+        blob_name = f"artifact-{uuid.uuid4().hex}{extension}"
+        async with semaphore:
+            try:
+                return await block_uploader.stage(file, storage, blob_name)
+            except Exception:
+                await storage.delete(blob_name)
+                raise
+
+    staged = await asyncio.gather(*(stage(file) for file in files), return_exceptions=True)
+    uploads = [blob for blob in staged if isinstance(blob, StagedBlob)]
+
+    artifact = _models.Artifact
+    # Locked like a single registration, so the purger keeps the artifacts reused here
+    result = await db.execute(
+        select(artifact)
+        .where(artifact.digest.in_({blob.digest for blob in uploads}))
+        .with_for_update(read=True)
+    )
+    artifacts = {stored.digest: stored for stored in result.scalars()}
+    new, discarded = {}, []
+    for blob in uploads:
+        if blob.digest in artifacts or blob.digest in new:
+            discarded.append(blob.blob_name)
+        else:
+            new[blob.digest] = blob
+
+    await asyncio.gather(
+        *(storage.commit_blocks(blob.blob_name, blob.block_ids) for blob in new.values()),
+        *(storage.delete(blob_name) for blob_name in discarded),
+    )
+    committed = [blob.blob_name for blob in new.values()]
+
+    if new:
+        dialect_insert = ON_CONFLICT_INSERTS.get(db.bind.dialect.name)
+        if dialect_insert is None:
+            statement = insert(artifact.__table__)
+        else:
+            statement = dialect_insert(artifact.__table__).on_conflict_do_nothing(
+                index_elements=["digest"]
+            )
+        await db.execute(
+            statement.values(
+                [
+                    {"digest": b.digest, "blob_name": b.blob_name, "size": b.size}
+                    for b in new.values()
+                ]
+            )
+        )
+        result = await db.execute(select(artifact).where(artifact.digest.in_(new)))
+        for stored in result.scalars():
+            artifacts[stored.digest] = stored
+            if stored.blob_name != new[stored.digest].blob_name:
+                # A concurrent upload of the same content was registered first
+                await storage.delete(new[stored.digest].blob_name)
+                committed.remove(new[stored.digest].blob_name)
+
+    stored = [
+        blob if isinstance(blob, BaseException) else artifacts[blob.digest] for blob in staged
+    ]
+    return stored, committed
+
+
+def parse_bulk_models(document: str) -> list:
+    """Function to parse the models of a bulk registration.
+
+    Args:
+        document (str): A JSON array of models, with the fields of a single registration.
 
     Returns:
-        Dict[str, int]: A dictionary containing the model id and updated model version.
+        list: The validated model, or the validation error, of each item.
 
     Raises:
-        HTTPException: If the model does not exist, there is a database error, or the request is unauthorized.
+        HTTPException: If the document is not a JSON array.
     """
     try:
-        # Find if model for user exists
-        db_model = await model_selector(model_id, user, db)
+        items = json.loads(document)
+    except json.JSONDecodeError:
+        items = None
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of models"
+        )
+
+    models = []
+    for item in items:
+        try:
+            model = _schemas.ModelCreate.parse_obj(item)
+            values = model.dict()
+            for field in JSON_FIELDS:
+                if values[field]:
+                    values[field] = json.loads(values[field])
+            models.append(values)
+        except (ValueError, ValidationError) as e:
+            models.append(e)
+    return models
+
 
-        # Update model with new values
-        for attr, value in model.dict(exclude_unset=True).items():
-            setattr(db_model, attr, value)
+async def bulk_create_models(
+    user: _schemas.User,
+    db: AsyncSession,
+    models: list,
+    files: List[UploadFile],
+    storage: StorageBackend,
+) -> _schemas.BulkResult:
+    """Function to register many models in one transaction.
 
-        # Auto increment model version
-        db_model.model_version += 1
+    The artifacts are uploaded concurrently before the models are written, then every valid
+    model is inserted with one multi-row statement and committed along with a single bump of
+    the change counter. Invalid models and failed uploads are reported without failing the
+    other items.
+
+    Args:
+        user (_schemas.User): The user object.
+        db (AsyncSession): SQLAlchemy database session object.
+        models (list): The values of each model, or its validation error, as returned by
+            `parse_bulk_models`.
+        files (List[UploadFile]): The artifact of each model, in the same order.
+        storage (StorageBackend): The storage backend holding model artifacts.
+
+    Returns:
+        _schemas.BulkResult: The id and artifact digest of each registered model.
+
+    Raises:
+        HTTPException: If the files do not match the models or there is a database error.
+    """
+    check_bulk_size(len(models))
+    if len(files) != len(models):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Expected one artifact per model, got {len(files)} for {len(models)} models",
+        )
+
+    valid = [index for index, values in enumerate(models) if isinstance(values, dict)]
+    artifacts, committed = await store_artifacts(db, storage, [files[index] for index in valid])
+
+    results = [
+        _schemas.BulkItemResult(
+            index=index, status=status.HTTP_422_UNPROCESSABLE_ENTITY, error=str(values)
+        )
+        for index, values in enumerate(models)
+    ]
+    rows, created = [], []
+    for index, artifact in zip(valid, artifacts):
+        if isinstance(artifact, ArtifactTooLargeError):
+            results[index].status = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            results[index].error = str(artifact)
+        elif isinstance(artifact, BaseException):
+            logger.error(f"Artifact upload failed for bulk item {index}: {artifact!r}")
+            results[index].status = status.HTTP_500_INTERNAL_SERVER_ERROR
+            results[index].error = "Artifact upload failed"
+        else:
+            rows.append(
+                {
+                    **models[index],
+                    "user_id": user.id,
+                    "artifact_name": artifact.blob_name,
+                    "artifact_digest": artifact.digest,
+                }
+            )
+            created.append(index)
 
-        # Commit the changes to the database
-        db.commit()
+    try:
+        if rows:
+            table = _models.Model.__table__
+            if db.bind.dialect.full_returning:
+                result = await db.execute(insert(table).values(rows).returning(table.c.id))
+                model_ids = result.scalars().all()
+            else:
+                db_models = [_models.Model(**row) for row in rows]
+                db.add_all(db_models)
+                await db.flush()
+                model_ids = [db_model.id for db_model in db_models]
+            await insert_tags(
+                db, user.id, {model_id: row["tags"] for model_id, row in zip(model_ids, rows)}
+            )
+            await record_model_change(db, user.id)
+        await db.commit()
+    except SQLAlchemyError:
+        logger.exception("Error during bulk model create SQL execution")
+        await db.rollback()
+        await asyncio.gather(*(storage.delete(blob_name) for blob_name in committed))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Database error occurred during bulk model create",
+        )
+
+    for index, model_id, row in zip(created, model_ids if rows else [], rows):
+        results[index].status = status.HTTP_201_CREATED
+        results[index].model_id = model_id
+        results[index].model_version = row["model_version"]
+        results[index].digest = row["artifact_digest"]
+        results[index].error = None
+    logger.info(f"Bulk created {len(rows)} models")
+    return bulk_result(results)
+
+
+async def lock_models(
+    user: _schemas.User, db: AsyncSession, model_ids: List[int]
+) -> Dict[int, int]:
+    """Function to lock the live models of a user for the rest of the transaction.
+
+    Args:
+        user (_schemas.User): The user object.
+        db (AsyncSession): SQLAlchemy database session object.
+        model_ids (List[int]): The ids of the models.
+
+    Returns:
+        Dict[int, int]: The current version of each model found.
+    """
+    model = _models.Model
+    result = await db.execute(
+        select(model.id, model.model_version)
+        .where(model.id.in_(set(model_ids)), model.user_id == user.id, model.deleted_at.is_(None))
+        .with_for_update()
+    )
+    return dict(result.all())
+
+
+def bulk_update_result(
+    index: int, item: _schemas.ModelBulkUpdate, version: Optional[int], updated: Dict[int, int]
+) -> _schemas.BulkItemResult:
+    """Function to check an item of a bulk update against the locked version of its model.
+
+    Args:
+        index (int): The position of the item in the request.
+        item (_schemas.ModelBulkUpdate): The changes of the model.
+        version (Optional[int]): The current version of the model, or None if it does not exist.
+        updated (Dict[int, int]): The index of each model already updated by the request.
+
+    Returns:
+        _schemas.BulkItemResult: The result of the item, with an error if it can not be applied.
+    """
+    result = _schemas.BulkItemResult(index=index, status=status.HTTP_200_OK, model_id=item.id)
+    if version is None:
+        result.status = status.HTTP_404_NOT_FOUND
+        result.error = f"Model with id {item.id} does not exist"
+    elif item.id in updated:
+        result.status = status.HTTP_409_CONFLICT
+        result.error = f"Model with id {item.id} is updated twice"
+    elif item.expected_version is not None and item.expected_version != version:
+        result.status = status.HTTP_412_PRECONDITION_FAILED
+        result.error = f"Model with id {item.id} is not at version {item.expected_version}"
+    return result
+
+
+async def bulk_update_models(
+    user: _schemas.User, db: AsyncSession, updates: List[_schemas.ModelBulkUpdate]
+) -> _schemas.BulkResult:
+    """Function to update many models in one transaction.
+
+    The models are locked and their versions read with one query, which settles the missing
+    and stale items. The others are written by one executemany statement per set of changed
+    columns, read back with one query and committed along with a single bump of the change
+    counter.
+
+    Args:
+        user (_schemas.User): The user object.
+        db (AsyncSession): The database session object.
+        updates (List[_schemas.ModelBulkUpdate]): The changes of each model, with the version
+            they are based on, if any.
 
-        # Return updated model
-        return db_model
-    except HTTPException as e:
-        raise e
+    Returns:
+        _schemas.BulkResult: The new version of each updated model.
+
+    Raises:
+        HTTPException: If there is a database error.
+    """
+    check_bulk_size(len(updates))
+    table = _models.Model.__table__
+    results = []
+
+    try:
+        versions = await lock_models(user, db, [item.id for item in updates])
+
+        groups: Dict[Tuple[str, ...], list] = {}
+        updated, tags = {}, {}
+        for index, item in enumerate(updates):
+            version = versions.get(item.id)
+            results.append(bulk_update_result(index, item, version, updated))
+            if results[index].error is None:
+                values = item.dict(exclude_unset=True, exclude={"id", "expected_version"})
+                params = {f"b_{column}": value for column, value in values.items()}
+                groups.setdefault(tuple(sorted(values)), []).append(
+                    {**params, "b_id": item.id, "b_version": version}
+                )
+                updated[item.id] = index
+                if "tags" in values:
+                    tags[item.id] = values["tags"]
+
+        for columns, params in groups.items():
+            statement = (
+                update(table)
+                .where(
+                    table.c.id == bindparam("b_id"), table.c.model_version == bindparam("b_version")
+                )
+                .values(
+                    {
+                        **{column: bindparam(f"b_{column}") for column in columns},
+                        "model_version": table.c.model_version + 1,
+                    }
+                )
+            )
+            await db.execute(statement, params)
+        if tags:
+            await replace_tags(db, user.id, tags)
+
+        records = []
+        if updated:
+            result = await db.execute(select(*table.columns).where(table.c.id.in_(updated)))
+            records = [dict(row) for row in result.mappings()]
+            await record_model_change(db, user.id)
+        await db.commit()
     except SQLAlchemyError as e:
         logger.exception(f"Database Error: {e}")
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database Error: {e}"
         )
-    except Exception as e:
-        logger.exception(f"Internal Server Error: {e}")
+
+    for record in records:
+        invalidate_model(user.id, record["id"], versions[record["id"]])
+        cache_model(record)
+        results[updated[record["id"]]].model_version = record["model_version"]
+    logger.info(f"Bulk updated {len(records)} models")
+    return bulk_result(results)
+
+
+async def bulk_delete_models(
+    user: _schemas.User, db: AsyncSession, model_ids: List[int]
+) -> _schemas.BulkResult:
+    """Function to tombstone many models in one transaction.
+
+    The models are locked with one query and tombstoned with one statement, so the request
+    costs the same as a single delete. The background purger removes them later.
+
+    Args:
+        user (_schemas.User): The user object.
+        db (AsyncSession): The database session object.
+        model_ids (List[int]): The ids of the models to delete.
+
+    Returns:
+        _schemas.BulkResult: The outcome of each deletion.
+
+    Raises:
+        HTTPException: If there is a database error.
+    """
+    check_bulk_size(len(model_ids))
+    model = _models.Model
+    try:
+        versions = await lock_models(user, db, model_ids)
+        if versions:
+            await db.execute(
+                update(model)
+                .where(model.id.in_(versions))
+                .values(deleted_at=dt.datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await record_model_change(db, user.id)
+        await db.commit()
+    except SQLAlchemyError:
+        logger.exception("Error during bulk model delete SQL execution")
+        await db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Internal Server Error: {e}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Database error occurred during bulk model delete",
         )
 
+    results = []
+    for index, model_id in enumerate(model_ids):
+        if model_id in versions:
+            invalidate_model(user.id, model_id, versions[model_id])
+            results.append(
+                _schemas.BulkItemResult(index=index, status=status.HTTP_200_OK, model_id=model_id)
+            )
+        else:
+            results.append(
+                _schemas.BulkItemResult(
+                    index=index,
+                    status=status.HTTP_404_NOT_FOUND,
+                    model_id=model_id,
+                    error=f"Model with id {model_id} does not exist",
+                )
+            )
+    logger.info(f"Bulk deleted {len(versions)} models")
+    return bulk_result(results)
+
 
 """Added get models functions"""
 
+# Columns returned by the summary view of the model read endpoints
+SUMMARY_FIELDS = ["id", "tags", "model_version", "predict_function"]
 
-async def read_model(user_id: int, id: int, db: orm.Session):
-    return (
-        db.query(_models.Model)
-        .filter(and_(_models.Model.id == id, _models.Model.user_id == user_id))
-        .first()
+
+def resolve_fields(
+    view: _schemas.ModelView, fields: Optional[List[str]] = None
+) -> Optional[List[str]]:
+    """Function to resolve the columns a model read endpoint should load.
+
+    Args:
+        view (_schemas.ModelView): The requested view of the models.
+        fields (Optional[List[str]]): Explicitly requested columns, taking precedence over the view.
+
+    Returns:
+        Optional[List[str]]: The columns to load, always starting with the id, or None to load
+        full models.
+
+    Raises:
+        HTTPException: If an unknown column is requested.
+    """
+    if fields:
+        unknown = set(fields) - set(_models.Model.__table__.columns.keys())
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown model fields: {', '.join(sorted(unknown))}",
+            )
+        return list(dict.fromkeys(["id", *fields]))
+
+    if view == _schemas.ModelView.summary:
+        return SUMMARY_FIELDS
+
+    return None
+
+
+def select_models(fields: Optional[List[str]] = None):
+    """Function to build the select statement of a model read.
+
+    When columns are given only those are selected, so the large JSON columns are neither
+    transferred nor hydrated into ORM objects.
+
+    Args:
+        fields (Optional[List[str]]): The columns to load, or None to load full models.
+
+    Returns:
+        sqlalchemy.sql.Select: The select statement.
+    """
+    if fields is None:
+        return select(_models.Model)
+    return select(*(getattr(_models.Model, field) for field in fields))
+
+
+async def fetch_models(db: AsyncSession, query, fields: Optional[List[str]] = None) -> list:
+    """Function to run a model read built by `select_models`.
+
+    Args:
+        db (AsyncSession): The database session object.
+        query (sqlalchemy.sql.Select): The select statement.
+        fields (Optional[List[str]]): The columns selected by the statement.
+
+    Returns:
+        list: ORM models when no columns are given, dicts of the selected columns otherwise.
+    """
+    result = await db.execute(query)
+    if fields is None:
+        return result.scalars().all()
+    return [row._asdict() for row in result]
+
+
+async def read_model(
+    user_id: int,
+    id: int,
+    db: AsyncSession,
+    fields: Optional[List[str]] = None,
+    version: Optional[int] = None,
+):
+    """Function to read a model of a user through the model cache.
+
+    The cache is keyed by model version and only the current version, read from the database,
+    is served from it, so a model changed or deleted by another worker is never served stale.
+    A miss loads and caches the full model, and projections are taken from the cached record.
+
+    Args:
+        user_id (int): The id of the user owning the model.
+        id (int): The id of the model.
+        db (AsyncSession): The database session object.
+        fields (Optional[List[str]]): The columns to return, or None to return the full model.
+        version (Optional[int]): The current version of the model, if the caller just read it.
+
+    Returns:
+        Optional[dict]: The model, or None if it does not exist.
+    """
+    if version is None:
+        version = await read_model_version(user_id, id, db)
+        if version is None:
+            return None
+
+    record = model_cache.get((user_id, id, version))
+    if record is None:
+        query = select_models().where(
+            and_(_models.Model.id == id, _models.Model.user_id == user_id),
+            _models.Model.deleted_at.is_(None),
+        )
+        models = await fetch_models(db, query.limit(1))
+        if not models:
+            return None
+        record = serialize_model(models[0])
+        cache_model(record)
+
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields}
+
+
+async def read_all_models(
+    user_id: int,
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[int] = None,
+    tags: Optional[List[str]] = None,
+    predict_function: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    tag_match: _schemas.TagMatch = _schemas.TagMatch.all,
+) -> Tuple[list, Optional[int]]:
+    """Function to read a page of the models of a user.
+
+    Models are ordered by id and paginated with a keyset on the id, so reading a page costs
+    the same whatever its position in the registry. Tags are looked up in the
+    `(user_id, tag, model_id)` index of `model_tags`, which only reads the entries of the
+    requested tags after the cursor.
+
+    Args:
+        user_id (int): The id of the user owning the models.
+        db (AsyncSession): The database session object.
+        limit (int): The maximum number of models to return.
+        cursor (Optional[int]): The id of the last model of the previous page.
+        tags (Optional[List[str]]): Tags the returned models must have.
+        predict_function (Optional[str]): The predict function of the returned models.
+        fields (Optional[List[str]]): The columns to load, or None to load full models.
+        tag_match (_schemas.TagMatch): Whether models must have all or any of the tags.
+
+    Returns:
+        Tuple[list, Optional[int]]: The models of the page and the cursor of the next page, or
+        None if this is the last page.
+    """
+    query = select_models(fields).where(
+        _models.Model.user_id == user_id, _models.Model.deleted_at.is_(None)
     )
 
+    if cursor is not None:
+        query = query.where(_models.Model.id > cursor)
+    if predict_function is not None:
+        query = query.where(_models.Model.predict_function == predict_function)
+    tags = parse_tags(",".join(tags or []))
+    if tags:
+        model_tag = _models.ModelTag
+        tagged = select(model_tag.model_id).where(
+            model_tag.user_id == user_id, model_tag.tag.in_(tags)
+        )
+        if cursor is not None:
+            tagged = tagged.where(model_tag.model_id > cursor)
+        if tag_match == _schemas.TagMatch.all:
+            # Tags are distinct per model, so a model has them all when every one matched
+            tagged = tagged.group_by(model_tag.model_id).having(func.count() == len(tags))
+        query = query.where(_models.Model.id.in_(tagged))
+
+    return await fetch_page(db, query, limit, fields)
+
+
+async def fetch_page(
+    db: AsyncSession, query, limit: int, fields: Optional[List[str]] = None
+) -> Tuple[list, Optional[int]]:
+    """Function to run a model read built by `select_models` one page at a time.
+
+    Args:
+        db (AsyncSession): The database session object.
+        query (sqlalchemy.sql.Select): The select statement, already filtered on the cursor.
+        limit (int): The maximum number of models to return.
+        fields (Optional[List[str]]): The columns selected by the statement.
+
+    Returns:
+        Tuple[list, Optional[int]]: The models of the page and the cursor of the next page, or
+        None if this is the last page.
+    """
+    # Fetch one extra row to know whether another page follows
+    models = await fetch_models(db, query.order_by(_models.Model.id).limit(limit + 1), fields)
+
+    next_cursor = None
+    if len(models) > limit:
+        last = models[limit - 1]
+        next_cursor = last.id if fields is None else last["id"]
+    return models[:limit], next_cursor
+
+
+def parse_search_document(field: str, document: Optional[str]) -> Optional[dict]:
+    """Function to decode a JSON object sent as a search parameter.
+
+    Args:
+        field (str): The column searched, for error messages.
+        document (Optional[str]): The JSON object the column must contain.
+
+    Returns:
+        Optional[dict]: The decoded object, or None if no document was sent.
+
+    Raises:
+        HTTPException: If the document is not a JSON object.
+    """
+    if document is None:
+        return None
+    try:
+        decoded = json.loads(document)
+    except json.JSONDecodeError:
+        decoded = None
+    if not isinstance(decoded, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field} must be a JSON object"
+        )
+    return decoded
+
+
+def json_contains(document: Any, pattern: Any) -> bool:
+    """Function to check whether a JSON document contains another, as the JSONB `@>` operator.
+
+    Objects contain the members of the pattern with contained values, arrays contain each
+    element of the pattern in some element of theirs, and numbers are compared by value.
+
+    Args:
+        document (Any): The JSON document.
+        pattern (Any): The JSON document that must be contained.
+
+    Returns:
+        bool: True if the document contains the pattern.
+    """
+    if isinstance(pattern, dict):
+        return isinstance(document, dict) and all(
+            key in document and json_contains(document[key], value)
+            for key, value in pattern.items()
+        )
+    if isinstance(pattern, list):
+        return isinstance(document, list) and all(
+            any(json_contains(item, element) for item in document) for element in pattern
+        )
+    if type(pattern) in (int, float):
+        return type(document) in (int, float) and document == pattern
+    return type(document) is type(pattern) and document == pattern
+
+
+async def search_models(
+    user_id: int,
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[int] = None,
+    contains: Optional[Dict[str, dict]] = None,
+    keys: Optional[Dict[str, List[str]]] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[list, Optional[int]]:
+    """Function to search the models of a user by the content of their JSON fields.
+
+    On PostgreSQL containment and key existence are tested with the JSONB `@>` and `?&`
+    operators, served by the GIN indexes of the searched columns. Other databases scan the
+    models of the user in pages and test them in Python.
+
+    Args:
+        user_id (int): The id of the user owning the models.
+        db (AsyncSession): The database session object.
+        limit (int): The maximum number of models to return.
+        cursor (Optional[int]): The id of the last model of the previous page.
+        contains (Optional[Dict[str, dict]]): The JSON object each searched column must contain.
+        keys (Optional[Dict[str, List[str]]]): The top-level keys each searched column must have.
+        fields (Optional[List[str]]): The columns to load, or None to load full models.
+
+    Returns:
+        Tuple[list, Optional[int]]: The matching models of the page and the cursor of the next
+        page, or None if this is the last page.
+    """
+    contains = {field: value for field, value in (contains or {}).items() if value}
+    keys = {field: value for field, value in (keys or {}).items() if value}
+    model = _models.Model
+    query = select_models(fields).where(model.user_id == user_id, model.deleted_at.is_(None))
+
+    if db.bind.dialect.name == "postgresql":
+        if cursor is not None:
+            query = query.where(model.id > cursor)
+        for field, value in contains.items():
+            query = query.where(type_coerce(getattr(model, field), JSONB).contains(value))
+        for field, value in keys.items():
+            query = query.where(type_coerce(getattr(model, field), JSONB).has_all(value))
+        return await fetch_page(db, query, limit, fields)
+
+    searched = [*contains, *keys]
+    loaded = fields if fields is None else list(dict.fromkeys([*fields, *searched]))
+    query = select_models(loaded).where(model.user_id == user_id, model.deleted_at.is_(None))
+    batch_size = max(limit + 1, settings.default_page_size)
+    matches = []
+    while len(matches) <= limit:
+        batch = query if cursor is None else query.where(model.id > cursor)
+        rows = await fetch_models(db, batch.order_by(model.id).limit(batch_size), loaded)
+        for row in rows:
+            record = serialize_model(row) if fields is None else row
+            if all(json_contains(record[f], value) for f, value in contains.items()) and all(
+                isinstance(record[f], dict) and set(value) <= set(record[f])
+                for f, value in keys.items()
+            ):
+                matches.append(row if fields is None else {f: row[f] for f in fields})
+        if len(rows) < batch_size:
+            break
+        cursor = rows[-1].id if fields is None else rows[-1]["id"]
 
-async def read_all_models(user_id: int, db: orm.Session):
-    return db.query(_models.Model).filter(_models.Model.user_id == user_id).all()
+    next_cursor = None
+    if len(matches) > limit:
+        last = matches[limit - 1]
+        next_cursor = last.id if fields is None else last["id"]
+    return matches[:limit], next_cursor
@@ -0,0 +1 @@
+"""Module containing prediction routes defined for this API."""
@@ -0,0 +1,328 @@
+"""Module containing services for prediction routes.
+
+This module provides functions for ingesting and querying the predictions logged for a model.
+
+Functions:
+    iter_records: Function to parse the predictions of a request body.
+    ingest_predictions: Function to write predictions in bounded batches.
+    read_predictions: Function to read the predictions of a model over a time window.
+    read_latest_predictions: Function to read the latest prediction of each model of a user.
+
+Attributes:
+    logger: Instance of logging to show FastAPI messages
+    MAX_ERRORS_PER_BATCH (int): The maximum number of errors reported per batch.
+"""
+
+import base64
+import datetime as dt
+import json
+import logging
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+import models.models as _models
+import models.schemas as _schemas
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import func, insert, lateral, select, true, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+MAX_ERRORS_PER_BATCH = 10
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+
+async def iter_records(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """Function to parse the predictions of a request body.
+
+    NDJSON bodies are parsed line by line as they stream in, so they are never held in memory
+    whole. Any other body must be a JSON array.
+
+    Args:
+        request (Request): The ingestion request.
+
+    Yields:
+        Tuple[int, Any]: The position of each prediction and its raw value, which is the
+        undecoded line for NDJSON bodies.
+
+    Raises:
+        HTTPException: If a JSON body is not an array.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith(NDJSON_CONTENT_TYPES):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        records = await request.json()
+    except json.JSONDecodeError:
+        records = None
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array or an NDJSON stream of predictions",
+        )
+    for index, record in enumerate(records):
+        yield index, record
+
+
+def parse_record(raw: Any) -> _schemas.PredictionRecord:
+    """Function to validate a single prediction.
+
+    Args:
+        raw (Any): The raw prediction, either decoded JSON or an undecoded NDJSON line.
+
+    Returns:
+        _schemas.PredictionRecord: The validated prediction.
+
+    Raises:
+        ValueError: If the prediction is not valid JSON or does not match the schema.
+    """
+    if isinstance(raw, bytes):
+        raw = json.loads(raw)
+    return _schemas.PredictionRecord.parse_obj(raw)
+
+
+async def write_batch(
+    db: AsyncSession, rows: list[dict], batch: _schemas.PredictionBatchResult
+) -> _schemas.PredictionBatchResult:
+    """Function to write a batch of predictions in a single transaction.
+
+    The whole batch is sent as one multi-row INSERT.
+
+    Args:
+        db (AsyncSession): The database session object.
+        rows (list[dict]): The validated predictions of the batch.
+        batch (_schemas.PredictionBatchResult): The result of the batch, holding its rejections.
+
+    Returns:
+        _schemas.PredictionBatchResult: The result of the batch.
+    """
+    if not rows:
+        return batch
+
+    try:
+        await db.execute(insert(_models.Prediction.__table__).values(rows))
+        await db.commit()
+        batch.accepted = len(rows)
+    except SQLAlchemyError:
+        logger.exception("Error during prediction batch insert")
+        await db.rollback()
+        batch.rejected += len(rows)
+        batch.errors.append(
+            _schemas.PredictionError(index=-1, error="Database error occurred during batch insert")
+        )
+
+    return batch
+
+
+async def ingest_predictions(
+    model_id: int,
+    records: AsyncIterator[Tuple[int, Any]],
+    db: AsyncSession,
+    batch_size: int,
+) -> _schemas.PredictionIngestResult:
+    """Function to write the predictions of a model in bounded batches.
+
+    Each batch of `batch_size` predictions is validated, written with one statement and
+    committed on its own, so memory and transaction size stay bounded whatever the number of
+    predictions. Invalid predictions are rejected without failing their batch.
+
+    Args:
+        model_id (int): The id of the model the predictions belong to.
+        records (AsyncIterator[Tuple[int, Any]]): The raw predictions and their positions.
+        db (AsyncSession): The database session object.
+        batch_size (int): The number of predictions per batch.
+
+    Returns:
+        _schemas.PredictionIngestResult: The accepted and rejected counts, per batch and total.
+    """
+    result = _schemas.PredictionIngestResult()
+    batch = _schemas.PredictionBatchResult()
+    rows = []
+
+    async for index, raw in records:
+        try:
+            record = parse_record(raw)
+        except (ValueError, ValidationError) as e:
+            batch.rejected += 1
+            if len(batch.errors) < MAX_ERRORS_PER_BATCH:
+                batch.errors.append(_schemas.PredictionError(index=index, error=str(e)))
+        else:
+            rows.append(
+                {
+                    "model_id": model_id,
+                    "version": record.version,
+                    "input": record.input,
+                    "output": record.output,
+                    "timestamp": record.timestamp or dt.datetime.utcnow(),
+                }
+            )
+
+        if len(rows) + batch.rejected >= batch_size:
+            result.batches.append(await write_batch(db, rows, batch))
+            batch = _schemas.PredictionBatchResult()
+            rows = []
+
+    if rows or batch.rejected:
+        result.batches.append(await write_batch(db, rows, batch))
+
+    result.accepted = sum(batch.accepted for batch in result.batches)
+    result.rejected = sum(batch.rejected for batch in result.batches)
+    logger.info(
+        f"Ingested predictions for model with id: {model_id}: "
+        f"{result.accepted} accepted, {result.rejected} rejected"
+    )
+    return result
+
+
+def encode_cursor(prediction: _models.Prediction) -> str:
+    """Function to encode the position of a prediction as a page cursor.
+
+    Args:
+        prediction (_models.Prediction): The last prediction of a page.
+
+    Returns:
+        str: The opaque cursor.
+    """
+    position = f"{prediction.timestamp.isoformat()}|{prediction.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[dt.datetime, int]:
+    """Function to decode a page cursor.
+
+    Args:
+        cursor (str): The opaque cursor.
+
+    Returns:
+        Tuple[dt.datetime, int]: The timestamp and id of the last prediction of the previous page.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        timestamp, prediction_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return dt.datetime.fromisoformat(timestamp), int(prediction_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+async def read_predictions(
+    model_id: int,
+    db: AsyncSession,
+    limit: int,
+    start: Optional[dt.datetime] = None,
+    end: Optional[dt.datetime] = None,
+    version: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> _schemas.PredictionPage:
+    """Function to read the predictions of a model over a time window, newest first.
+
+    The query is bounded on `timestamp`, so PostgreSQL only scans the partitions of the window,
+    and within them walks the `(model_id, timestamp)` index. Pages are keyed on
+    `(timestamp, id)`, so reading a page costs the same whatever its position in the window.
+
+    Args:
+        model_id (int): The id of the model.
+        db (AsyncSession): The database session object.
+        limit (int): The maximum number of predictions to return.
+        start (Optional[dt.datetime]): The start of the window, inclusive.
+        end (Optional[dt.datetime]): The end of the window, exclusive.
+        version (Optional[int]): The model version of the returned predictions.
+        cursor (Optional[str]): The cursor returned with the previous page.
+
+    Returns:
+        _schemas.PredictionPage: The predictions of the page and the cursor of the next page.
+    """
+    prediction = _models.Prediction
+    query = select(prediction).where(prediction.model_id == model_id)
+
+    if start is not None:
+        query = query.where(prediction.timestamp >= start)
+    if end is not None:
+        query = query.where(prediction.timestamp < end)
+    if version is not None:
+        query = query.where(prediction.version == version)
+    if cursor is not None:
+        query = query.where(tuple_(prediction.timestamp, prediction.id) < decode_cursor(cursor))
+
+    # Fetch one extra row to know whether another page follows
+    result = await db.execute(
+        query.order_by(prediction.timestamp.desc(), prediction.id.desc()).limit(limit + 1)
+    )
+    predictions = result.scalars().all()
+
+    next_cursor = encode_cursor(predictions[limit - 1]) if len(predictions) > limit else None
+    return _schemas.PredictionPage(
+        predictions=[_schemas.Prediction.from_orm(p) for p in predictions[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+async def read_latest_predictions(
+    user_id: int, db: AsyncSession, model_ids: Optional[List[int]] = None
+) -> List[_schemas.Prediction]:
+    """Function to read the latest prediction of each model of a user.
+
+    On PostgreSQL each model is joined laterally to a single row read from the top of the
+    `(model_id, timestamp)` index, so the cost grows with the number of models, not predictions.
+
+    Args:
+        user_id (int): The id of the user owning the models.
+        db (AsyncSession): The database session object.
+        model_ids (Optional[List[int]]): The models to look up, all models of the user if None.
+
+    Returns:
+        List[_schemas.Prediction]: The latest prediction of every model having one.
+    """
+    model = _models.Model
+    prediction = _models.Prediction
+    models = select(model.id).where(model.user_id == user_id, model.deleted_at.is_(None))
+    if model_ids:
+        models = models.where(model.id.in_(model_ids))
+    models = models.subquery()
+
+    if db.bind.dialect.name == "postgresql":
+        latest = lateral(
+            select(prediction)
+            .where(prediction.model_id == models.c.id)
+            .order_by(prediction.timestamp.desc(), prediction.id.desc())
+            .limit(1)
+        )
+        query = select(latest).select_from(models).join(latest, true()).order_by(latest.c.model_id)
+    else:
+        ranked = (
+            select(
+                prediction,
+                func.row_number()
+                .over(
+                    partition_by=prediction.model_id,
+                    order_by=(prediction.timestamp.desc(), prediction.id.desc()),
+                )
+                .label("rank"),
+            )
+            .where(prediction.model_id.in_(select(models.c.id)))
+            .subquery()
+        )
+        query = (
+            select(*(ranked.c[c.key] for c in prediction.__table__.columns))
+            .where(ranked.c.rank == 1)
+            .order_by(ranked.c.model_id)
+        )
+
+    result = await db.execute(query)
+    return [_schemas.Prediction.from_orm(row) for row in result]
@@ -2,11 +2,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from canvass_api_model_store.api.admin import admin_router
 from canvass_api_model_store.api.auth import auth_router
 from canvass_api_model_store.api.health import health_router
+from canvass_api_model_store.api.metrics import metrics_router
 from canvass_api_model_store.api.model import model_router
+from canvass_api_model_store.api.prediction import prediction_router
 from canvass_api_model_store.api.v1 import v1_router
+from canvass_api_model_store.api.v1.model_store.purge import ModelPurger
 from canvass_api_model_store.core.config import settings
+from canvass_api_model_store.core.db import async_session, create_prediction_partitions
+from canvass_api_model_store.core.middleware import (
+    FORM_OVERHEAD_BYTES,
+    MaxBodySizeMiddleware,
+    MetricsMiddleware,
+)
+from canvass_api_model_store.core.storage import create_storage_backend
 
 
 def create_app() -> FastAPI:
@@ -39,9 +50,48 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Reject oversized artifact uploads before the form parser buffers them
+    app.add_middleware(
+        MaxBodySizeMiddleware,
+        max_body_size=settings.max_artifact_size + FORM_OVERHEAD_BYTES,
+    )
+
+    # Outermost, so the latency covers every other middleware
+    app.add_middleware(MetricsMiddleware, query_stats_header=settings.query_stats_header)
+
+    @app.on_event("startup")
+    async def open_storage():
+        app.state.storage = create_storage_backend(settings)
+
+    @app.on_event("startup")
+    async def prepare_prediction_partitions():
+        await create_prediction_partitions(settings.prediction_partition_months_ahead)
+
+    @app.on_event("startup")
+    async def start_purger():
+        app.state.purger = ModelPurger(
+            async_session,
+            app.state.storage,
+            batch_size=settings.purge_batch_size,
+            interval=settings.purge_interval,
+            grace_period=settings.purge_grace_period,
+        )
+        app.state.purger.start()
+
+    @app.on_event("shutdown")
+    async def stop_purger():
+        await app.state.purger.stop()
+
+    @app.on_event("shutdown")
+    async def close_storage():
+        await app.state.storage.close()
+
     app.router.include_router(health_router)
+    app.router.include_router(metrics_router)
     app.router.include_router(v1_router)
     app.router.include_router(auth_router)
     app.router.include_router(model_router)
+    app.router.include_router(prediction_router)
+    app.router.include_router(admin_router)
 
     return app
@@ -0,0 +1,107 @@
+"""Module containing a bounded in-process cache with LRU eviction and expiry."""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Cache keeping at most `maxsize` entries, each for at most `ttl` seconds.
+
+    The least recently used entry is evicted when the cache is full. The cache lives in the
+    memory of a single process and is meant to be used from the event loop thread.
+
+    Attributes:
+        maxsize (int): The maximum number of entries.
+        ttl (float): The number of seconds an entry stays valid.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that found no valid entry.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        """Initialize an empty cache.
+
+        Args:
+            maxsize (int): The maximum number of entries.
+            ttl (float): The number of seconds an entry stays valid.
+            timer (Callable[[], float]): The clock used to expire entries.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones not evicted yet."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get the value of a key.
+
+        Args:
+            key (Hashable): The key to look up.
+
+        Returns:
+            Optional[Any]: The cached value, or None if the key is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._timer():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Set the value of a key, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): The key to set.
+            value (Any): The value to cache.
+        """
+        if self.maxsize <= 0:
+            return
+
+        self._entries[key] = (self._timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache.
+
+        Args:
+            key (Hashable): The key to remove.
+        """
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove every key matching a predicate.
+
+        Args:
+            predicate (Callable[[Hashable], bool]): Returns True for the keys to remove.
+        """
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return the size and hit/miss counters of the cache.
+
+        Returns:
+            dict: The number of entries, hits and misses, and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
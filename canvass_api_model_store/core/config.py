@@ -15,6 +15,48 @@ class Settings(BaseSettings):
         backend_cors_origin: A list of strings representing allowed origins for resource sharing.
         database_url: A string indicating the connection string for the database.
         exclude_tables: A list of strings indicating tables to exclude from migrations.
+        db_pool_size: An integer indicating the number of connections kept in the database pool.
+        db_max_overflow: An integer indicating how many connections may be opened above the pool size.
+        azure_storage_connection_string: A string indicating the connection string for blob storage.
+        azure_storage_container_name: A string indicating the blob container holding artifacts.
+        storage_backend: A string indicating where artifacts are stored, either "azure" or "local".
+        storage_pool_size: An integer indicating the maximum number of open storage connections.
+        local_storage_path: A string indicating the directory holding artifacts for local storage.
+        bcrypt_rounds: An integer indicating the bcrypt cost factor of new password hashes.
+        password_hash_workers: An integer indicating the number of threads hashing passwords.
+        user_cache_size: An integer indicating the maximum number of cached authenticated users.
+        user_cache_ttl: A float indicating how many seconds an authenticated user stays cached. A
+            user changed by another worker is served stale for at most this long.
+        model_cache_size: An integer indicating the maximum number of cached model records.
+        model_cache_ttl: A float indicating how many seconds a model record stays cached. Records
+            are only served while their version is the current one in the database, so the TTL
+            bounds memory, not staleness.
+        model_version_ttl: A float indicating how many seconds the version of a model read from
+            the database is trusted. Reads within this window are served from memory without any
+            query, so a model changed by another worker is served stale for at most this long.
+            Zero checks the database on every read.
+        default_page_size: An integer indicating the number of items returned per page by default.
+        max_page_size: An integer indicating the maximum number of items returned per page.
+        prediction_batch_size: An integer indicating how many predictions are written per statement.
+        prediction_partition_months_ahead: An integer indicating how many months of prediction
+            partitions are created ahead of time.
+        max_bulk_size: An integer indicating the maximum number of models per bulk request.
+        purge_batch_size: An integer indicating how many predictions of a deleted model are
+            removed per statement.
+        purge_interval: A float indicating how many seconds pass between two purges of deleted
+            models.
+        purge_grace_period: A float indicating how many seconds a deleted model is kept before it is
+            purged, so requests writing to it can finish.
+        max_artifact_size: An integer indicating the maximum size in bytes of an uploaded artifact.
+        upload_block_size: An integer indicating the size in bytes of each staged upload block.
+        upload_concurrency: An integer indicating how many upload blocks are staged in parallel.
+        upload_max_retries: An integer indicating how many times a failed upload block is retried.
+        download_chunk_size: An integer indicating the size in bytes of each streamed download chunk.
+        admin_emails: A list of strings indicating the emails of the users allowed to profile the
+            running process.
+        profile_max_seconds: A float indicating the maximum duration of a profile of the process.
+        query_stats_header: A boolean to indicate if responses report their SQL statement count
+            and duration in a Server-Timing header.
     """
 
     api_v1_str: str = "v1"
@@ -25,6 +67,36 @@ class Settings(BaseSettings):
     backend_cors_origin: str | list[str] = []
     database_url: str
     exclude_tables: list[str] = []
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    azure_storage_connection_string: str | None = None
+    azure_storage_container_name: str = "models"
+    storage_backend: str | None = None
+    storage_pool_size: int = 32
+    local_storage_path: str = "artifacts"
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 60
+    model_cache_size: int = 10000
+    model_cache_ttl: float = 300
+    model_version_ttl: float = 1
+    default_page_size: int = 50
+    max_page_size: int = 500
+    prediction_batch_size: int = 1000
+    prediction_partition_months_ahead: int = 3
+    max_bulk_size: int = 1000
+    purge_batch_size: int = 5000
+    purge_interval: float = 60
+    purge_grace_period: float = 60
+    max_artifact_size: int = 5 * 1024**3
+    upload_block_size: int = 8 * 1024**2
+    upload_concurrency: int = 4
+    upload_max_retries: int = 3
+    download_chunk_size: int = 1024**2
+    admin_emails: str | list[str] = []
+    profile_max_seconds: float = 60
+    query_stats_header: bool = False
 
     @validator("api_prefix", pre=True)
     def assemble_api_prefix(cls, v: str | None) -> str | None:
@@ -44,7 +116,26 @@ class Settings(BaseSettings):
             return None
         return f"/{root_path}"
 
-    @validator("backend_cors_origin", pre=True)
+    @validator("storage_backend", always=True)
+    def select_storage_backend(cls, v: str | None, values: dict) -> str:
+        """Function that selects the storage backend when none is configured.
+
+        Args:
+            v - the configured storage backend, if any.
+            values - the settings validated so far.
+
+        Returns:
+            "azure" when a blob storage connection string is set, "local" otherwise.
+
+        Raises:
+            No Exceptions defined
+
+        """
+        if v:
+            return v
+        return "azure" if values.get("azure_storage_connection_string") else "local"
+
+    @validator("backend_cors_origin", "admin_emails", pre=True)
     def assemble_cors_origins(cls, v: str | list[str]) -> list[str] | str:
         """Function that assembles a list of accepted backend CORS origins.
 
@@ -1,10 +1,57 @@
-"""Module database connection generator."""
+"""Module database connection generator.
+
+The engine and session factory are created once per process, so every request shares the
+same connection pool.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from canvass_api_model_store.core.config import settings
+from canvass_api_model_store.core.metrics import TimedAsyncQueuePool, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+
+def get_engine_options() -> dict:
+    """Function to get the options of the async engine.
+
+    Args:
+        No arguments
+
+    Returns:
+        A dict of keyword arguments for `create_async_engine`.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    options = {"future": True, "echo": settings.debug}
+
+    # SQLite stand-ins don't use a queue pool, so sizing options only apply to real servers
+    if make_url(settings.database_url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedAsyncQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=True,
+        )
+
+    return options
 
-async_engine = create_async_engine(settings.database_url, future=True, echo=settings.debug)
+
+async_engine = create_async_engine(settings.database_url, **get_engine_options())
+instrument_engine(async_engine.sync_engine, "async")
+
+async_session = sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 
 async def get_async_session() -> AsyncSession:
@@ -20,11 +67,41 @@ async def get_async_session() -> AsyncSession:
         No Exceptions defined
 
     """
-    async_session = sessionmaker(
-        async_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
-
     async with async_session() as session:
         yield session
+
+
+async def create_prediction_partitions(months_ahead: int) -> None:
+    """Function to create the monthly prediction partitions of the coming months.
+
+    Partitions are created by the `create_predictions_partition` database function installed by
+    the migrations, which skips existing partitions and moves the predictions of the month out
+    of the default partition. Each month is created in its own transaction, so a month failing
+    does not hold back the others. Only PostgreSQL partitions predictions.
+
+    Args:
+        months_ahead (int): The number of months after the current one to create partitions for.
+
+    Returns:
+        No return value.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    if async_engine.dialect.name != "postgresql":
+        return
+
+    for months in range(months_ahead + 1):
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "SELECT create_predictions_partition("
+                        "date_trunc('month', now() AT TIME ZONE 'utc') "
+                        "+ make_interval(months => :months))"
+                    ),
+                    {"months": months},
+                )
+        except (SQLAlchemyError, OSError):
+            logger.exception(f"Could not create the prediction partition {months} months ahead")
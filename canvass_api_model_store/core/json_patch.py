@@ -0,0 +1,167 @@
+"""Module containing JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396) support.
+
+Patches are parsed and validated here, then either applied in PostgreSQL by the `jsonb_patch`
+and `jsonb_merge_patch` functions installed by the migrations, or applied in Python by
+`apply_json_patch` and `apply_merge_patch` on databases without them. Both implementations
+follow the same rules.
+
+Attributes:
+    JSON_PATCH_CONTENT_TYPE (str): The media type of JSON Patch documents.
+    MERGE_PATCH_CONTENT_TYPE (str): The media type of JSON Merge Patch documents.
+"""
+import copy
+from typing import Any, Dict, List
+
+JSON_PATCH_CONTENT_TYPE = "application/json-patch+json"
+MERGE_PATCH_CONTENT_TYPE = "application/merge-patch+json"
+
+OPERATIONS = {"add", "remove", "replace", "move", "copy", "test"}
+
+
+class JsonPatchError(Exception):
+    """Exception raised when a patch is malformed or cannot be applied to a document."""
+
+
+def parse_pointer(pointer: Any) -> List[str]:
+    """Function to split a JSON pointer (RFC 6901) into its reference tokens.
+
+    Args:
+        pointer (Any): The JSON pointer.
+
+    Returns:
+        List[str]: The unescaped reference tokens, empty for the whole document.
+
+    Raises:
+        JsonPatchError: If the pointer is not a valid JSON pointer.
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def parse_json_patch(operations: Any) -> List[Dict[str, Any]]:
+    """Function to validate a JSON Patch document.
+
+    Args:
+        operations (Any): The decoded JSON Patch document.
+
+    Returns:
+        List[Dict[str, Any]]: The operations, with `path` and `from` split into token lists.
+
+    Raises:
+        JsonPatchError: If the document is not a valid JSON Patch.
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("A JSON Patch must be an array of operations")
+
+    parsed = []
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            raise JsonPatchError(f"Invalid JSON Patch operation: {operation!r}")
+        op = operation["op"]
+        parsed_operation = {"op": op, "path": parse_pointer(operation.get("path"))}
+        if op in ("move", "copy"):
+            parsed_operation["from"] = parse_pointer(operation.get("from"))
+        if op in ("add", "replace", "test"):
+            if "value" not in operation:
+                raise JsonPatchError(f"Operation {op} requires a value")
+            parsed_operation["value"] = operation["value"]
+        parsed.append(parsed_operation)
+    return parsed
+
+
+def _resolve(document: Any, path: List[str]) -> Any:
+    """Return the value at a path, raising if it does not exist."""
+    for token in path:
+        if isinstance(document, dict) and token in document:
+            document = document[token]
+        elif isinstance(document, list) and token.isdigit() and int(token) < len(document):
+            document = document[int(token)]
+        else:
+            raise JsonPatchError(f"Path /{'/'.join(path)} does not exist")
+    return document
+
+
+def _add(document: Any, path: List[str], value: Any) -> Any:
+    """Add a value at a path and return the document."""
+    if not path:
+        return value
+    parent, token = _resolve(document, path[:-1]), path[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list) and token == "-":
+        parent.append(value)
+    elif isinstance(parent, list) and token.isdigit() and int(token) <= len(parent):
+        parent.insert(int(token), value)
+    else:
+        raise JsonPatchError(f"Cannot add at path /{'/'.join(path)}")
+    return document
+
+
+def _remove(document: Any, path: List[str]) -> Any:
+    """Remove the value at a path and return the document."""
+    _resolve(document, path)
+    if not path:
+        return None
+    parent, token = _resolve(document, path[:-1]), path[-1]
+    del parent[int(token) if isinstance(parent, list) else token]
+    return document
+
+
+def apply_json_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    """Function to apply parsed JSON Patch operations to a document.
+
+    The document is not modified; the patched copy is returned.
+
+    Args:
+        document (Any): The document to patch.
+        operations (List[Dict[str, Any]]): The operations returned by `parse_json_patch`.
+
+    Returns:
+        Any: The patched document.
+
+    Raises:
+        JsonPatchError: If an operation cannot be applied or a test fails.
+    """
+    document = copy.deepcopy(document)
+    for operation in operations:
+        op, path = operation["op"], operation["path"]
+        if op == "add":
+            document = _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            document = _remove(document, path)
+        elif op == "replace":
+            document = _add(_remove(document, path), path, copy.deepcopy(operation["value"]))
+        elif op == "test":
+            if _resolve(document, path) != operation["value"]:
+                raise JsonPatchError(f"Test failed at path /{'/'.join(path)}")
+        else:
+            value = copy.deepcopy(_resolve(document, operation["from"]))
+            if op == "move":
+                document = _remove(document, operation["from"])
+            document = _add(document, path, value)
+    return document
+
+
+def apply_merge_patch(document: Any, patch: Any) -> Any:
+    """Function to apply a JSON Merge Patch to a document.
+
+    Args:
+        document (Any): The document to patch.
+        patch (Any): The merge patch.
+
+    Returns:
+        Any: The patched document.
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+
+    result = copy.deepcopy(document) if isinstance(document, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
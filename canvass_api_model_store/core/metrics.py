@@ -0,0 +1,453 @@
+"""Module containing in-process metrics exposed in the Prometheus text format.
+
+Metrics are plain counters and histograms updated in memory, so recording a sample costs a
+lock and a few additions. They are rendered on demand by the `/metrics` route, and each worker
+process exposes its own values.
+
+Attributes:
+    registry (Registry): The metrics of the application.
+    http_request_duration (Histogram): Request latency by method, route and status.
+    db_query_duration (Histogram): SQL statement latency by statement type.
+    db_pool_checkout_wait (Histogram): Time spent waiting for a pooled database connection.
+    blob_bytes (Counter): Bytes uploaded to and downloaded from artifact storage.
+    blob_transfer_duration (Histogram): Duration of artifact uploads and downloads.
+    blob_throughput (Histogram): Throughput of artifact uploads and downloads.
+    password_hash_duration (Histogram): Time spent in bcrypt, by operation.
+    password_hash_wait (Histogram): Time spent waiting for a password hashing thread.
+    password_hash_calls (Gauge): Password hashing calls queued for or running on a thread.
+    http_request_statements (Histogram): SQL statements run per request, by method and route.
+    query_stats (ContextVar): The SQL statement counter of the current request, if any.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TRANSFER_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300)
+THROUGHPUT_BUCKETS = tuple(2**power for power in range(16, 32, 2))
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+STATEMENT_TYPES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    """Render the label set of a sample."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, with one value per label set.
+
+    Attributes:
+        name (str): The name of the metric.
+        documentation (str): The help text of the metric.
+        labelnames (Tuple[str, ...]): The names of the labels.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Initialize the counter.
+
+        Args:
+            name (str): The name of the metric.
+            documentation (str): The help text of the metric.
+            labelnames (Sequence[str]): The names of the labels.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, *labelvalues: str) -> None:
+        """Increment the counter of a label set.
+
+        Args:
+            amount (float): The increment.
+            *labelvalues (str): The values of the labels, in order.
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> List[str]:
+        """Render the samples of the counter.
+
+        Returns:
+            List[str]: The lines of the samples.
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Value going up and down, with one value per label set."""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1, *labelvalues: str) -> None:
+        """Decrement the gauge of a label set.
+
+        Args:
+            amount (float): The decrement.
+            *labelvalues (str): The values of the labels, in order.
+        """
+        self.inc(-amount, *labelvalues)
+
+
+class Histogram:
+    """Histogram of observations in cumulative buckets, with one histogram per label set.
+
+    Attributes:
+        name (str): The name of the metric.
+        documentation (str): The help text of the metric.
+        labelnames (Tuple[str, ...]): The names of the labels.
+        buckets (Tuple[float, ...]): The upper bounds of the buckets, without `+Inf`.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """Initialize the histogram.
+
+        Args:
+            name (str): The name of the metric.
+            documentation (str): The help text of the metric.
+            labelnames (Sequence[str]): The names of the labels.
+            buckets (Sequence[float]): The upper bounds of the buckets.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Per label set: the count of each bucket (not cumulative), then the sum
+        self._values: Dict[Tuple[str, ...], list] = {}
+        if not self.labelnames:
+            self._values[()] = [0] * (len(self.buckets) + 2)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record an observation.
+
+        Args:
+            value (float): The observed value.
+            *labelvalues (str): The values of the labels, in order.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(labelvalues)
+            if values is None:
+                values = self._values[labelvalues] = [0] * (len(self.buckets) + 2)
+            values[index] += 1
+            values[-1] += value
+
+    def collect(self) -> List[str]:
+        """Render the samples of the histogram.
+
+        Returns:
+            List[str]: The lines of the samples.
+        """
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+
+        lines = []
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_set = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_set} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_set} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of the metrics rendered by the `/metrics` route."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: list = []
+
+    def register(self, metric):
+        """Add a metric to the registry.
+
+        Args:
+            metric: The counter, gauge or histogram to expose.
+
+        Returns:
+            The metric.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition of the metrics.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Duration of HTTP requests until their response is sent.",
+        ["method", "route", "status"],
+    )
+)
+db_query_duration = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Duration of SQL statements, by statement type.",
+        ["engine", "statement"],
+    )
+)
+db_pool_checkout_wait = registry.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a connection from the database pool.",
+    )
+)
+blob_bytes = registry.register(
+    Counter(
+        "blob_bytes_total",
+        "Bytes transferred to and from artifact storage.",
+        ["direction"],
+    )
+)
+blob_transfer_duration = registry.register(
+    Histogram(
+        "blob_transfer_duration_seconds",
+        "Duration of artifact uploads and downloads.",
+        ["direction"],
+        buckets=TRANSFER_BUCKETS,
+    )
+)
+blob_throughput = registry.register(
+    Histogram(
+        "blob_throughput_bytes_per_second",
+        "Throughput of artifact uploads and downloads.",
+        ["direction"],
+        buckets=THROUGHPUT_BUCKETS,
+    )
+)
+password_hash_duration = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "Time spent in bcrypt, excluding the wait for a hashing thread.",
+        ["operation"],
+    )
+)
+password_hash_wait = registry.register(
+    Histogram(
+        "password_hash_wait_seconds",
+        "Time spent waiting for a password hashing thread.",
+    )
+)
+password_hash_calls = registry.register(
+    Gauge(
+        "password_hash_calls",
+        "Password hashing calls waiting for a hashing thread or running on one.",
+        ["state"],
+    )
+)
+http_request_statements = registry.register(
+    Histogram(
+        "http_request_statements",
+        "Number of SQL statements run per HTTP request.",
+        ["method", "route"],
+        buckets=STATEMENT_COUNT_BUCKETS,
+    )
+)
+
+
+class QueryStats:
+    """Number and total duration of the SQL statements run for a request.
+
+    Attributes:
+        count (int): The number of statements run.
+        seconds (float): The total duration of the statements.
+    """
+
+    def __init__(self):
+        """Initialize the counter at zero."""
+        self.count = 0
+        self.seconds = 0.0
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Function to count the SQL statements run by the current task and the tasks it starts.
+
+    Yields:
+        QueryStats: The counter, updated as statements complete.
+    """
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[List[str]]:
+    """Function to collect every SQL statement an engine runs, whichever task runs it.
+
+    Args:
+        engine (Engine): The engine, or the `sync_engine` of an async engine.
+
+    Yields:
+        List[str]: The statements, appended as they complete.
+    """
+    statements: List[str] = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "after_cursor_execute", collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "after_cursor_execute", collect)
+
+
+def observe_blob_transfer(direction: str, size: int, seconds: float) -> None:
+    """Function to record an artifact upload or download.
+
+    Args:
+        direction (str): Either "upload" or "download".
+        size (int): The number of bytes transferred.
+        seconds (float): The duration of the transfer.
+    """
+    blob_bytes.inc(size, direction)
+    blob_transfer_duration.observe(seconds, direction)
+    if seconds > 0:
+        blob_throughput.observe(size / seconds, direction)
+
+
+async def meter_download(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Function to record the bytes and duration of a download as it is streamed.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The chunks of the download.
+
+    Yields:
+        bytes: The same chunks.
+    """
+    size = 0
+    started_at = time.perf_counter()
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        observe_blob_transfer("download", size, time.perf_counter() - started_at)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Function to time the statements of an engine through its cursor events.
+
+    Args:
+        engine (Engine): The engine, or the `sync_engine` of an async engine.
+        name (str): The name of the engine in the `engine` label.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        db_query_duration.observe(elapsed, name, statement_type(statement))
+        stats = query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(context):
+        started_at = context.connection.info.get("query_started_at") if context.connection else None
+        if started_at:
+            started_at.pop()
+
+
+def statement_type(statement: str) -> str:
+    """Function to classify a SQL statement by its first keyword.
+
+    Args:
+        statement (str): The SQL statement.
+
+    Returns:
+        str: The keyword in upper case, such as SELECT or UPDATE, or OTHER.
+    """
+    head = statement.lstrip()[:6].upper()
+    for keyword in STATEMENT_TYPES:
+        if head.startswith(keyword):
+            return keyword
+    return "OTHER"
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async connection pool recording how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        """Check a connection out of the pool, timing the wait."""
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started_at)
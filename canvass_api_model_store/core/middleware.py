@@ -0,0 +1,145 @@
+"""Module containing ASGI middleware used by the FastAPI application."""
+import time
+
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from canvass_api_model_store.core import metrics
+
+# Room left on top of the artifact size for the multipart framing of an upload.
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+
+class MaxBodySizeMiddleware:
+    """Middleware rejecting request bodies larger than a given size.
+
+    Requests announcing a larger `Content-Length` are refused before any of the body is read.
+    Bodies without a length (chunked transfer) are counted as they arrive and aborted as soon as
+    the limit is crossed, so an oversized upload is never fully buffered by the form parser.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        """Initialize the middleware.
+
+        Args:
+            app (ASGIApp): The wrapped ASGI application.
+            max_body_size (int): The maximum number of body bytes accepted per request.
+        """
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process an ASGI request.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive callable.
+            send (Send): The ASGI send callable.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse(
+                {"detail": "Request body too large"},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Request body too large",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class MetricsMiddleware:
+    """Middleware recording the latency and SQL statements of every request.
+
+    Requests are labelled with the path template of the route that served them, such as
+    `/api/models/{model_id}`, so the number of label sets stays bounded. The duration runs
+    until the last byte of the response is sent.
+
+    With `query_stats_header`, responses carry a `Server-Timing` header with the number and
+    total duration of the SQL statements run before the response started.
+    """
+
+    def __init__(self, app: ASGIApp, query_stats_header: bool = False):
+        """Initialize the middleware.
+
+        Args:
+            app (ASGIApp): The wrapped ASGI application.
+            query_stats_header (bool): Whether to report SQL statements in a response header.
+        """
+        self.app = app
+        self.query_stats_header = query_stats_header
+        self._routes: dict = {}
+
+    def route_of(self, scope: Scope) -> str:
+        """Get the path template of the route that served a request.
+
+        Args:
+            scope (Scope): The ASGI connection scope, after routing.
+
+        Returns:
+            str: The path template, or "unmatched" if no route matched.
+        """
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            paths = {getattr(r, "endpoint", None): r.path for r in scope["app"].router.routes}
+            route = self._routes[endpoint] = paths.get(endpoint, "unmatched")
+        return route
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process an ASGI request.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive callable.
+            send (Send): The ASGI send callable.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        started_at = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.query_stats_header:
+                    noun = "query" if stats.count == 1 else "queries"
+                    timing = f'db;desc="{stats.count} {noun}";dur={stats.seconds * 1000:.3f}'
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timing)
+            await send(message)
+
+        with metrics.track_queries() as stats:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = self.route_of(scope)
+                metrics.http_request_duration.observe(
+                    time.perf_counter() - started_at, scope["method"], route, str(status_code)
+                )
+                metrics.http_request_statements.observe(stats.count, scope["method"], route)
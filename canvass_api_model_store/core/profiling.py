@@ -0,0 +1,153 @@
+"""Module containing the on-demand profilers of a live worker.
+
+The stack sampler reads the current frame of every thread of the process at a fixed interval
+from a thread of its own, so the event loop keeps serving requests while it is observed. The
+samples are returned as collapsed stacks, one `frame;frame;frame count` line per distinct
+stack, which flamegraph tools read directly. The allocation tracer runs tracemalloc for a
+while and reports the sites holding the most memory.
+
+Only one profile runs at a time in a process.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict
+
+from starlette.concurrency import run_in_threadpool
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    """Exception raised when a profile is requested while another one is running."""
+
+    def __init__(self):
+        """Initialize the exception."""
+        super().__init__("A profile is already running in this worker")
+
+
+def _short_path(filename: str, cache: Dict[str, str]) -> str:
+    """Strip the import root from a source path, remembering the result."""
+    short = cache.get(filename)
+    if short is None:
+        roots = [path for path in sys.path if path and filename.startswith(path + os.sep)]
+        short = filename[len(max(roots, key=len)) + 1 :] if roots else filename
+        cache[filename] = short
+    return short
+
+
+def sample_stacks(seconds: float, interval: float) -> Dict[str, int]:
+    """Function to sample the stacks of every other thread of the process.
+
+    Args:
+        seconds (float): How long to sample for.
+        interval (float): The number of seconds between two samples.
+
+    Returns:
+        Dict[str, int]: The number of samples of each collapsed stack, rooted at the name of
+        its thread.
+    """
+    sampler = threading.get_ident()
+    paths: Dict[str, str] = {}
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampler:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                path = _short_path(code.co_filename, paths)
+                frames.append(f"{code.co_name} ({path}:{frame.f_lineno})")
+                frame = frame.f_back
+            frames.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[";".join(reversed(frames))] += 1
+        time.sleep(interval)
+
+    return dict(stacks)
+
+
+async def profile_stacks(seconds: float, interval: float) -> str:
+    """Function to sample the stacks of the process, including the event loop thread.
+
+    Args:
+        seconds (float): How long to sample for.
+        interval (float): The number of seconds between two samples.
+
+    Returns:
+        str: The collapsed stacks, most sampled first.
+
+    Raises:
+        ProfilerBusyError: If another profile is running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError()
+    try:
+        stacks = await run_in_threadpool(sample_stacks, seconds, interval)
+    finally:
+        _profile_lock.release()
+
+    ordered = sorted(stacks.items(), key=lambda item: item[1], reverse=True)
+    return "".join(f"{stack} {count}\n" for stack, count in ordered)
+
+
+async def trace_allocations(seconds: float, top: int, frames: int) -> dict:
+    """Function to trace memory allocations for a while and report the largest sites.
+
+    Tracing slows every allocation down, so it only runs for the requested time unless it was
+    already enabled.
+
+    Args:
+        seconds (float): How long to trace for.
+        top (int): The number of allocation sites to report.
+        frames (int): The number of frames kept per allocation; sites are grouped by line
+            when 1 and by traceback otherwise.
+
+    Returns:
+        dict: The memory held by traced allocations, and the largest allocation sites with
+        their size, number of blocks and traceback, innermost frame first.
+
+    Raises:
+        ProfilerBusyError: If another profile is running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError()
+    try:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(frames)
+        try:
+            await asyncio.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+    finally:
+        _profile_lock.release()
+
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+    )
+    statistics = snapshot.statistics("lineno" if frames == 1 else "traceback")
+    return {
+        "traced_bytes": sum(statistic.size for statistic in statistics),
+        "top": [
+            {
+                "size": statistic.size,
+                "count": statistic.count,
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in statistic.traceback],
+            }
+            for statistic in statistics[:top]
+        ],
+    }
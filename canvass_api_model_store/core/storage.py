@@ -0,0 +1,580 @@
+"""Module containing the storage backends and upload engine for model artifacts.
+
+The storage backend is created once at application startup and kept on `app.state`, so every
+request shares the same pooled client. Routes get it through the `get_storage` dependency.
+"""
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, NamedTuple, Optional
+
+import aiohttp
+from azure.core import MatchConditions
+from azure.core.exceptions import AzureError, ResourceModifiedError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.storage.blob import BlobBlock
+from azure.storage.blob.aio import BlobServiceClient
+from fastapi import Request, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from canvass_api_model_store.core.config import Settings
+from canvass_api_model_store.core.metrics import observe_blob_transfer
+
+logger = logging.getLogger(__name__)
+
+# Errors after which staging a block is worth another attempt.
+RETRYABLE_ERRORS = (AzureError, OSError)
+
+
+class ArtifactTooLargeError(Exception):
+    """Exception raised when an artifact exceeds the configured maximum size."""
+
+    def __init__(self, max_size: int):
+        """Initialize the exception.
+
+        Args:
+            max_size (int): The maximum artifact size in bytes.
+        """
+        self.max_size = max_size
+        super().__init__(f"Artifact exceeds the maximum size of {max_size} bytes")
+
+
+class BlobNotFoundError(Exception):
+    """Exception raised when a blob does not exist, or changed while being read."""
+
+    def __init__(self, blob_name: str):
+        """Initialize the exception.
+
+        Args:
+            blob_name (str): The name of the blob.
+        """
+        self.blob_name = blob_name
+        super().__init__(f"Blob {blob_name} not found")
+
+
+class InvalidBlobNameError(ValueError):
+    """Exception raised when a blob name would resolve outside of the storage root."""
+
+    def __init__(self, blob_name: str):
+        """Initialize the exception.
+
+        Args:
+            blob_name (str): The name of the blob.
+        """
+        self.blob_name = blob_name
+        super().__init__(f"Invalid blob name {blob_name!r}")
+
+
+class BlobProperties(NamedTuple):
+    """Properties of a committed blob.
+
+    Attributes:
+        size (int): The size of the blob in bytes.
+        etag (str): The quoted entity tag of the blob, changing whenever its content does.
+    """
+
+    size: int
+    etag: str
+
+
+class StagedBlob(NamedTuple):
+    """Blocks of a blob staged by an upload but not committed yet.
+
+    Attributes:
+        blob_name (str): The name of the blob.
+        block_ids (list[str]): The ids of the staged blocks, in order.
+        size (int): The total size of the blocks in bytes.
+        digest (str): The hex SHA-256 digest of the content.
+    """
+
+    blob_name: str
+    block_ids: list[str]
+    size: int
+    digest: str
+
+
+def make_block_id(index: int) -> str:
+    """Function to build a block id for a staged block.
+
+    Azure requires every block id of a blob to have the same length, so the index is zero padded.
+
+    Args:
+        index (int): The position of the block in the blob.
+
+    Returns:
+        str: The base64 encoded block id.
+    """
+    return base64.b64encode(f"{index:08d}".encode()).decode()
+
+
+class StorageBackend(ABC):
+    """Interface of the blob stores holding model artifacts.
+
+    Blobs are written as a list of staged blocks which only becomes visible once committed.
+    """
+
+    @abstractmethod
+    async def stage_block(self, blob_name: str, block_id: str, data: bytes) -> None:
+        """Stage a block of a blob.
+
+        Args:
+            blob_name (str): The name of the blob.
+            block_id (str): The id of the block.
+            data (bytes): The content of the block.
+        """
+
+    @abstractmethod
+    async def commit_blocks(self, blob_name: str, block_ids: list[str]) -> None:
+        """Atomically replace the content of a blob with the given staged blocks.
+
+        Args:
+            blob_name (str): The name of the blob.
+            block_ids (list[str]): The ids of the staged blocks, in order.
+        """
+
+    @abstractmethod
+    async def delete(self, blob_name: str) -> None:
+        """Delete a blob if it exists.
+
+        Args:
+            blob_name (str): The name of the blob.
+        """
+
+    @abstractmethod
+    async def list_blobs(self, prefix: str) -> list[str]:
+        """List the committed blobs whose name starts with a prefix.
+
+        Args:
+            prefix (str): The start of the blob names.
+
+        Returns:
+            list[str]: The names of the blobs.
+        """
+
+    @abstractmethod
+    async def get_properties(self, blob_name: str) -> BlobProperties:
+        """Get the size and entity tag of a blob.
+
+        Args:
+            blob_name (str): The name of the blob.
+
+        Returns:
+            BlobProperties: The properties of the blob.
+
+        Raises:
+            BlobNotFoundError: If the blob does not exist.
+        """
+
+    @abstractmethod
+    def download(
+        self, blob_name: str, offset: int = 0, length: Optional[int] = None, etag: str = None
+    ) -> AsyncIterator[bytes]:
+        """Stream a byte range of a blob in chunks.
+
+        Args:
+            blob_name (str): The name of the blob.
+            offset (int): The position of the first byte to read.
+            length (Optional[int]): The number of bytes to read, up to the end of the blob if None.
+            etag (str): The entity tag the blob must still have, if given.
+
+        Yields:
+            bytes: The successive chunks of the range.
+
+        Raises:
+            BlobNotFoundError: If the blob does not exist or no longer has the given entity tag.
+        """
+
+    async def close(self) -> None:
+        """Release the resources held by the backend."""
+
+
+class AzureStorageBackend(StorageBackend):
+    """Storage backend on Azure Blob Storage using a pooled async client."""
+
+    def __init__(
+        self, connection_string: str, container_name: str, pool_size: int, chunk_size: int
+    ):
+        """Initialize the backend.
+
+        Args:
+            connection_string (str): The connection string of the storage account.
+            container_name (str): The container holding the artifacts.
+            pool_size (int): The maximum number of connections kept open to the storage account.
+            chunk_size (int): The number of bytes fetched per request when downloading.
+        """
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size))
+        self._service_client = BlobServiceClient.from_connection_string(
+            connection_string,
+            transport=AioHttpTransport(session=self._session, session_owner=False),
+            max_single_get_size=chunk_size,
+            max_chunk_get_size=chunk_size,
+        )
+        self._container_client = self._service_client.get_container_client(container_name)
+
+    async def stage_block(self, blob_name: str, block_id: str, data: bytes) -> None:
+        """Stage a block of a blob."""
+        await self._container_client.get_blob_client(blob_name).stage_block(block_id, data)
+
+    async def commit_blocks(self, blob_name: str, block_ids: list[str]) -> None:
+        """Atomically replace the content of a blob with the given staged blocks."""
+        blocks = [BlobBlock(block_id=block_id) for block_id in block_ids]
+        await self._container_client.get_blob_client(blob_name).commit_block_list(blocks)
+
+    async def delete(self, blob_name: str) -> None:
+        """Delete a blob if it exists."""
+        try:
+            await self._container_client.get_blob_client(blob_name).delete_blob()
+        except ResourceNotFoundError:
+            pass
+
+    async def list_blobs(self, prefix: str) -> list[str]:
+        """List the committed blobs whose name starts with a prefix."""
+        return [
+            blob.name async for blob in self._container_client.list_blobs(name_starts_with=prefix)
+        ]
+
+    async def get_properties(self, blob_name: str) -> BlobProperties:
+        """Get the size and entity tag of a blob."""
+        try:
+            properties = await self._container_client.get_blob_client(
+                blob_name
+            ).get_blob_properties()
+        except ResourceNotFoundError:
+            raise BlobNotFoundError(blob_name)
+        return BlobProperties(size=properties.size, etag=properties.etag)
+
+    async def download(
+        self, blob_name: str, offset: int = 0, length: Optional[int] = None, etag: str = None
+    ) -> AsyncIterator[bytes]:
+        """Stream a byte range of a blob in chunks."""
+        conditions = (
+            {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+        )
+        try:
+            downloader = await self._container_client.get_blob_client(blob_name).download_blob(
+                offset=offset, length=length, **conditions
+            )
+            async for chunk in downloader.chunks():
+                yield chunk
+        except (ResourceNotFoundError, ResourceModifiedError):
+            raise BlobNotFoundError(blob_name)
+
+    async def close(self) -> None:
+        """Close the client and its connection pool."""
+        await self._service_client.close()
+        await self._session.close()
+
+
+class LocalStorageBackend(StorageBackend):
+    """Storage backend on the local filesystem, for tests and air-gapped deployments.
+
+    Staged blocks are written under a hidden directory next to the blobs and concatenated on
+    commit. File operations run in the thread pool so they never block the event loop.
+    """
+
+    def __init__(self, root: str, chunk_size: int = 1024**2):
+        """Initialize the backend.
+
+        Args:
+            root (str): The directory holding the blobs.
+            chunk_size (int): The number of bytes read at a time when downloading.
+        """
+        self.root = root
+        self.chunk_size = chunk_size
+        os.makedirs(os.path.join(root, ".blocks"), exist_ok=True)
+
+    def _resolve(self, directory: str, blob_name: str) -> str:
+        """Return the path of a blob name in a directory of the root.
+
+        Names are single path components, so a client supplied name can never reach outside of
+        the root, nor clash with the hidden directory of the staged blocks.
+
+        Raises:
+            InvalidBlobNameError: If the name is empty, absolute, hidden, holds a separator or
+                resolves outside of the directory.
+        """
+        if (
+            not blob_name
+            or blob_name.startswith(".")
+            or os.path.isabs(blob_name)
+            or any(sep in blob_name for sep in ("/", "\\", os.sep))
+        ):
+            raise InvalidBlobNameError(blob_name)
+        directory = os.path.realpath(directory)
+        path = os.path.realpath(os.path.join(directory, blob_name))
+        if os.path.dirname(path) != directory:
+            raise InvalidBlobNameError(blob_name)
+        return path
+
+    def _blob_path(self, blob_name: str) -> str:
+        """Return the path of a blob."""
+        return self._resolve(self.root, blob_name)
+
+    def _blocks_path(self, blob_name: str) -> str:
+        """Return the directory holding the staged blocks of a blob."""
+        return self._resolve(os.path.join(self.root, ".blocks"), blob_name)
+
+    def _write_block(self, blob_name: str, block_id: str, data: bytes) -> None:
+        """Write a staged block to disk."""
+        directory = self._blocks_path(blob_name)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, block_id.replace("/", "_")), "wb") as f:
+            f.write(data)
+
+    def _concatenate_blocks(self, blob_name: str, block_ids: list[str]) -> None:
+        """Write the staged blocks to a temporary file and move it in place of the blob."""
+        directory = self._blocks_path(blob_name)
+        path = self._blob_path(blob_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as blob:
+            for block_id in block_ids:
+                with open(os.path.join(directory, block_id.replace("/", "_")), "rb") as f:
+                    shutil.copyfileobj(f, blob)
+        os.replace(f"{path}.tmp", path)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def _remove(self, blob_name: str) -> None:
+        """Remove a blob and its staged blocks from disk."""
+        try:
+            os.remove(self._blob_path(blob_name))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self._blocks_path(blob_name), ignore_errors=True)
+
+    def _list(self, prefix: str) -> list[str]:
+        """Return the names of the blobs on disk starting with a prefix."""
+        return [
+            name
+            for name in os.listdir(self.root)
+            if name.startswith(prefix) and not name.startswith(".")
+        ]
+
+    def _stat(self, blob_name: str) -> BlobProperties:
+        """Return the size and entity tag of a blob from its file metadata."""
+        try:
+            stat = os.stat(self._blob_path(blob_name))
+        except FileNotFoundError:
+            raise BlobNotFoundError(blob_name)
+        # Commits replace the file, so its inode and modification time change with the content
+        return BlobProperties(
+            size=stat.st_size, etag=f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        )
+
+    def _open(self, blob_name: str, etag: Optional[str]):
+        """Open a blob for reading, checking it still has the given entity tag."""
+        try:
+            f = open(self._blob_path(blob_name), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(blob_name)
+        if etag and self._stat(blob_name).etag != etag:
+            f.close()
+            raise BlobNotFoundError(blob_name)
+        return f
+
+    async def stage_block(self, blob_name: str, block_id: str, data: bytes) -> None:
+        """Stage a block of a blob."""
+        await run_in_threadpool(self._write_block, blob_name, block_id, data)
+
+    async def commit_blocks(self, blob_name: str, block_ids: list[str]) -> None:
+        """Atomically replace the content of a blob with the given staged blocks."""
+        await run_in_threadpool(self._concatenate_blocks, blob_name, block_ids)
+
+    async def delete(self, blob_name: str) -> None:
+        """Delete a blob if it exists."""
+        await run_in_threadpool(self._remove, blob_name)
+
+    async def list_blobs(self, prefix: str) -> list[str]:
+        """List the committed blobs whose name starts with a prefix."""
+        return await run_in_threadpool(self._list, prefix)
+
+    async def get_properties(self, blob_name: str) -> BlobProperties:
+        """Get the size and entity tag of a blob."""
+        return await run_in_threadpool(self._stat, blob_name)
+
+    async def download(
+        self, blob_name: str, offset: int = 0, length: Optional[int] = None, etag: str = None
+    ) -> AsyncIterator[bytes]:
+        """Stream a byte range of a blob in chunks."""
+        f = await run_in_threadpool(self._open, blob_name, etag)
+        try:
+            await run_in_threadpool(f.seek, offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await run_in_threadpool(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(f.close)
+
+
+def create_storage_backend(settings: Settings) -> StorageBackend:
+    """Function to create the storage backend selected in the settings.
+
+    Args:
+        settings (Settings): The application settings.
+
+    Returns:
+        StorageBackend: The storage backend.
+
+    Raises:
+        ValueError: If the configured backend is unknown.
+    """
+    if settings.storage_backend == "azure":
+        return AzureStorageBackend(
+            settings.azure_storage_connection_string,
+            settings.azure_storage_container_name,
+            settings.storage_pool_size,
+            settings.download_chunk_size,
+        )
+    if settings.storage_backend == "local":
+        return LocalStorageBackend(settings.local_storage_path, settings.download_chunk_size)
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+
+def get_storage(request: Request) -> StorageBackend:
+    """Function to get the storage backend shared by the application.
+
+    Args:
+        request (Request): The current request.
+
+    Returns:
+        StorageBackend: The storage backend created at startup.
+    """
+    return request.app.state.storage
+
+
+class BlockUploader:
+    """Engine uploading a file to a storage backend as blocks staged in parallel.
+
+    The file is read one block at a time and up to `concurrency` blocks are staged at once, so
+    peak memory is bounded by `block_size * concurrency` whatever the size of the artifact. A
+    block that fails is retried on its own, and the blob only becomes visible once the whole
+    block list is committed. The SHA-256 digest of the content is computed as it streams through.
+
+    Attributes:
+        block_size (int): The number of bytes read and staged per block.
+        max_size (int): The maximum number of bytes accepted for an artifact.
+        concurrency (int): The maximum number of blocks staged at the same time.
+        max_retries (int): The number of times a failed block is retried.
+        retry_backoff (float): The delay in seconds before the first retry, doubled on each retry.
+    """
+
+    def __init__(
+        self,
+        block_size: int,
+        max_size: int,
+        concurrency: int = 1,
+        max_retries: int = 0,
+        retry_backoff: float = 0.5,
+    ):
+        """Initialize the uploader.
+
+        Args:
+            block_size (int): The number of bytes read and staged per block.
+            max_size (int): The maximum number of bytes accepted for an artifact.
+            concurrency (int): The maximum number of blocks staged at the same time.
+            max_retries (int): The number of times a failed block is retried.
+            retry_backoff (float): The delay in seconds before the first retry.
+        """
+        self.block_size = block_size
+        self.max_size = max_size
+        self.concurrency = max(concurrency, 1)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    async def upload(self, file: UploadFile, storage: StorageBackend, blob_name: str) -> int:
+        """Upload a file to a blob.
+
+        Args:
+            file (UploadFile): The uploaded file to read from.
+            storage (StorageBackend): The destination storage backend.
+            blob_name (str): The name of the destination blob.
+
+        Returns:
+            int: The number of bytes uploaded.
+
+        Raises:
+            ArtifactTooLargeError: If the artifact exceeds `max_size` bytes.
+        """
+        staged = await self.stage(file, storage, blob_name)
+        await storage.commit_blocks(blob_name, staged.block_ids)
+        return staged.size
+
+    async def stage(self, file: UploadFile, storage: StorageBackend, blob_name: str) -> StagedBlob:
+        """Stage a file as the blocks of a blob, leaving the commit to the caller.
+
+        Args:
+            file (UploadFile): The uploaded file to read from.
+            storage (StorageBackend): The destination storage backend.
+            blob_name (str): The name of the destination blob.
+
+        Returns:
+            StagedBlob: The staged blocks, with the size and digest of the content.
+
+        Raises:
+            ArtifactTooLargeError: If the artifact exceeds `max_size` bytes.
+        """
+        block_ids = []
+        pending = set()
+        size = 0
+        sha256 = hashlib.sha256()
+        started_at = time.perf_counter()
+
+        try:
+            while chunk := await file.read(self.block_size):
+                size += len(chunk)
+                if size > self.max_size:
+                    raise ArtifactTooLargeError(self.max_size)
+                # hashlib releases the GIL on large buffers, so hashing overlaps with staging
+                await run_in_threadpool(sha256.update, chunk)
+
+                # Wait for a free slot so no more than `concurrency` blocks are held in memory
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+
+                block_id = make_block_id(len(block_ids))
+                block_ids.append(block_id)
+                pending.add(
+                    asyncio.create_task(self._stage_block(storage, blob_name, block_id, chunk))
+                )
+
+            await asyncio.gather(*pending)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        observe_blob_transfer("upload", size, time.perf_counter() - started_at)
+        return StagedBlob(blob_name, block_ids, size, sha256.hexdigest())
+
+    async def _stage_block(
+        self, storage: StorageBackend, blob_name: str, block_id: str, data: bytes
+    ) -> None:
+        """Stage a single block, retrying it on transient errors.
+
+        Args:
+            storage (StorageBackend): The destination storage backend.
+            blob_name (str): The name of the destination blob.
+            block_id (str): The id of the block.
+            data (bytes): The content of the block.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                await storage.stage_block(blob_name, block_id, data)
+                return
+            except RETRYABLE_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Retrying block {block_id} after attempt {attempt + 1} failed")
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
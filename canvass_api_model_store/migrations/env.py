@@ -5,12 +5,11 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncEngine
-from sqlmodel import SQLModel
 
 from alembic import context
 from alembic.script import ScriptDirectory
 from canvass_api_model_store.core.config import settings
-from canvass_api_model_store.models import *  # noqa: F401, F403
+from models.models import Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -22,7 +21,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 
-target_metadata = SQLModel.metadata
+target_metadata = Base.metadata
 
 target_metadata.naming_convention = {
     "ix": "ix_%(column_0_label)s",
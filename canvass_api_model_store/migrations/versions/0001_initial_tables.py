@@ -0,0 +1,66 @@
+"""initial tables
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("org", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_users")),
+        sa.UniqueConstraint("email", name=op.f("uq_users_email")),
+    )
+    op.create_table(
+        "models",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("tags", sa.String(), nullable=True),
+        sa.Column("custom_functions", sa.JSON(), nullable=True),
+        sa.Column("pre_model_order", sa.ARRAY(sa.String()), nullable=True),
+        sa.Column("post_model_order", sa.ARRAY(sa.String()), nullable=True),
+        sa.Column("predict_function", sa.String(), nullable=True),
+        sa.Column("storage_options", sa.JSON(), nullable=True),
+        sa.Column("container_options", sa.JSON(), nullable=True),
+        sa.Column("model_metadata", sa.JSON(), nullable=True),
+        sa.Column("model_version", sa.Integer(), nullable=True),
+        sa.Column("input_features_and_types", sa.JSON(), nullable=True),
+        sa.Column("output_names_and_types", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f("fk_models_user_id_users")),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_models")),
+    )
+    op.create_table(
+        "predictions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("model_id", sa.Integer(), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("input", sa.JSON(), nullable=True),
+        sa.Column("output", sa.JSON(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["model_id"], ["models.id"], name=op.f("fk_predictions_model_id_models")
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_predictions")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("predictions")
+    op.drop_table("models")
+    op.drop_table("users")
@@ -0,0 +1,24 @@
+"""models user_id index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 09:30:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_models_user_id_id", "models", ["user_id", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_models_user_id_id", table_name="models")
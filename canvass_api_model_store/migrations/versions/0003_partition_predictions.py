@@ -0,0 +1,166 @@
+"""partition predictions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 11:00:00.000000
+
+On PostgreSQL, predictions move to a table range partitioned by month on `timestamp`. Partitions
+are created by the `create_predictions_partition` function, which the migration calls for every
+month holding predictions and the application calls at startup for the coming months. Other
+databases only get the `(model_id, timestamp)` index.
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_predictions_partition(month timestamp) RETURNS void AS $$
+DECLARE
+    start_at timestamp := date_trunc('month', month);
+    partition_name text := 'predictions_' || to_char(start_at, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF predictions FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_at, start_at + interval '1 month'
+    );
+EXCEPTION WHEN duplicate_table THEN
+    -- Another worker created the partition concurrently
+    NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Databases created by `create_db.py` and stamped at 0001 have the default constraint names of
+# PostgreSQL, such as `predictions_pkey`, so the constraints are looked up rather than named
+RENAME_UNPARTITIONED_CONSTRAINTS = """
+DO $$
+DECLARE
+    constraint_row record;
+BEGIN
+    FOR constraint_row IN
+        SELECT conname,
+               CASE contype
+                   WHEN 'p' THEN 'pk_predictions_unpartitioned'
+                   ELSE 'fk_predictions_unpartitioned_model_id_models'
+               END AS new_name
+        FROM pg_constraint
+        WHERE conrelid = 'predictions_unpartitioned'::regclass
+          AND (contype = 'p' OR (contype = 'f' AND confrelid = 'models'::regclass))
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE predictions_unpartitioned RENAME CONSTRAINT %I TO %I',
+            constraint_row.conname, constraint_row.new_name
+        );
+    END LOOP;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(
+            "ix_predictions_model_id_timestamp", "predictions", ["model_id", "timestamp"]
+        )
+        return
+
+    op.execute("ALTER TABLE predictions RENAME TO predictions_unpartitioned")
+    op.execute(RENAME_UNPARTITIONED_CONSTRAINTS)
+    op.execute(
+        """
+        CREATE TABLE predictions (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            model_id INTEGER,
+            version INTEGER,
+            input JSON,
+            output JSON,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            CONSTRAINT pk_predictions PRIMARY KEY (id, timestamp),
+            CONSTRAINT fk_predictions_model_id_models FOREIGN KEY (model_id) REFERENCES models (id)
+        ) PARTITION BY RANGE (timestamp)
+        """
+    )
+    op.execute("CREATE TABLE predictions_default PARTITION OF predictions DEFAULT")
+    op.execute(
+        "CREATE INDEX ix_predictions_model_id_timestamp ON predictions (model_id, timestamp)"
+    )
+    op.execute(CREATE_PARTITION_FUNCTION)
+
+    # One partition per month holding predictions, plus the coming months
+    op.execute(
+        """
+        SELECT create_predictions_partition(month)
+        FROM (
+            SELECT DISTINCT date_trunc('month', timestamp) AS month
+            FROM predictions_unpartitioned
+            WHERE timestamp IS NOT NULL
+            UNION
+            SELECT generate_series(
+                date_trunc('month', now() AT TIME ZONE 'utc'),
+                date_trunc('month', now() AT TIME ZONE 'utc') + interval '3 months',
+                interval '1 month'
+            )
+        ) AS months
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO predictions (id, model_id, version, input, output, timestamp)
+        SELECT id, model_id, version, input, output, coalesce(timestamp, now() AT TIME ZONE 'utc')
+        FROM predictions_unpartitioned
+        """
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('predictions', 'id'), "
+        "coalesce((SELECT max(id) FROM predictions), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE predictions_unpartitioned")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index("ix_predictions_model_id_timestamp", table_name="predictions")
+        return
+
+    op.execute("ALTER TABLE predictions RENAME TO predictions_partitioned")
+    op.execute(
+        "ALTER TABLE predictions_partitioned "
+        "RENAME CONSTRAINT pk_predictions TO pk_predictions_partitioned"
+    )
+    op.execute(
+        "ALTER TABLE predictions_partitioned "
+        "RENAME CONSTRAINT fk_predictions_model_id_models TO fk_predictions_partitioned_model_id_models"
+    )
+    op.create_table(
+        "predictions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("model_id", sa.Integer(), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("input", sa.JSON(), nullable=True),
+        sa.Column("output", sa.JSON(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["model_id"], ["models.id"], name=op.f("fk_predictions_model_id_models")
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_predictions")),
+    )
+    op.execute(
+        """
+        INSERT INTO predictions (id, model_id, version, input, output, timestamp)
+        SELECT id, model_id, version, input, output, timestamp FROM predictions_partitioned
+        """
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('predictions', 'id'), "
+        "coalesce((SELECT max(id) FROM predictions), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE predictions_partitioned")
+    op.execute("DROP FUNCTION create_predictions_partition(timestamp)")
@@ -0,0 +1,27 @@
+"""models artifact name
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 13:00:00.000000
+
+Models created before this revision have no artifact name and their artifacts cannot be
+downloaded through the API until the column is filled in with the `model-{id}{ext}` blob name.
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("models", sa.Column("artifact_name", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("models", "artifact_name")
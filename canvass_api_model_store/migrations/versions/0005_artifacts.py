@@ -0,0 +1,45 @@
+"""artifacts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 14:00:00.000000
+
+Artifacts uploaded before this revision keep their per-model blob and have no digest.
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "artifacts",
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("blob_name", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("digest", name=op.f("pk_artifacts")),
+    )
+    op.add_column("models", sa.Column("artifact_digest", sa.String(length=64), nullable=True))
+    op.create_index(op.f("ix_models_artifact_digest"), "models", ["artifact_digest"], unique=False)
+    op.create_foreign_key(
+        op.f("fk_models_artifact_digest_artifacts"),
+        "models",
+        "artifacts",
+        ["artifact_digest"],
+        ["digest"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f("fk_models_artifact_digest_artifacts"), "models", type_="foreignkey")
+    op.drop_index(op.f("ix_models_artifact_digest"), table_name="models")
+    op.drop_column("models", "artifact_digest")
+    op.drop_table("artifacts")
@@ -0,0 +1,153 @@
+"""models jsonb patch
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 16:00:00.000000
+
+On PostgreSQL, the JSON columns of models become JSONB, and the `jsonb_patch` (RFC 6902) and
+`jsonb_merge_patch` (RFC 7396) functions are installed so patches are applied in the database.
+Both raise `data_exception` (SQLSTATE 22000) when a patch cannot be applied. Other databases
+apply patches in the application.
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+JSON_COLUMNS = [
+    "custom_functions",
+    "storage_options",
+    "container_options",
+    "model_metadata",
+    "input_features_and_types",
+    "output_names_and_types",
+]
+
+# Operations are sent with `path` and `from` already split into arrays of reference tokens
+CREATE_JSONB_PATCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION jsonb_patch(target jsonb, operations jsonb) RETURNS jsonb AS $$
+DECLARE
+    operation jsonb;
+    op text;
+    path text[];
+    from_path text[];
+    parent_path text[];
+    parent jsonb;
+    token text;
+    value jsonb;
+BEGIN
+    FOR operation IN SELECT jsonb_array_elements(operations) LOOP
+        op := operation ->> 'op';
+        path := ARRAY(SELECT jsonb_array_elements_text(operation -> 'path'));
+        value := operation -> 'value';
+
+        IF op IN ('move', 'copy') THEN
+            from_path := ARRAY(SELECT jsonb_array_elements_text(operation -> 'from'));
+            value := target #> from_path;
+            IF value IS NULL THEN
+                RAISE EXCEPTION 'Path % does not exist', from_path USING ERRCODE = 'data_exception';
+            END IF;
+            IF op = 'move' THEN
+                target := target #- from_path;
+            END IF;
+            op := 'add';
+        END IF;
+
+        IF op = 'test' THEN
+            IF (target #> path) IS DISTINCT FROM value THEN
+                RAISE EXCEPTION 'Test failed at path %', path USING ERRCODE = 'data_exception';
+            END IF;
+            CONTINUE;
+        END IF;
+
+        IF op IN ('remove', 'replace') AND target #> path IS NULL THEN
+            RAISE EXCEPTION 'Path % does not exist', path USING ERRCODE = 'data_exception';
+        END IF;
+
+        IF cardinality(path) = 0 THEN
+            target := CASE WHEN op = 'remove' THEN NULL ELSE value END;
+        ELSIF op = 'remove' THEN
+            target := target #- path;
+        ELSIF op = 'replace' THEN
+            target := jsonb_set(target, path, value, false);
+        ELSE
+            parent_path := path[1:cardinality(path) - 1];
+            parent := target #> parent_path;
+            token := path[cardinality(path)];
+            IF jsonb_typeof(parent) = 'object' THEN
+                target := jsonb_set(target, path, value, true);
+            ELSIF jsonb_typeof(parent) = 'array' AND token = '-' THEN
+                target := jsonb_set(target, parent_path, parent || jsonb_build_array(value), false);
+            ELSIF jsonb_typeof(parent) = 'array' AND token ~ '^[0-9]+$'
+                    AND token::int <= jsonb_array_length(parent) THEN
+                target := CASE
+                    WHEN token::int = jsonb_array_length(parent)
+                    THEN jsonb_set(target, parent_path, parent || jsonb_build_array(value), false)
+                    ELSE jsonb_insert(target, path, value)
+                END;
+            ELSE
+                RAISE EXCEPTION 'Cannot add at path %', path USING ERRCODE = 'data_exception';
+            END IF;
+        END IF;
+    END LOOP;
+    RETURN target;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+CREATE_JSONB_MERGE_PATCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION jsonb_merge_patch(target jsonb, patch jsonb) RETURNS jsonb AS $$
+DECLARE
+    key text;
+    value jsonb;
+BEGIN
+    IF jsonb_typeof(patch) IS DISTINCT FROM 'object' THEN
+        RETURN patch;
+    END IF;
+    IF jsonb_typeof(target) IS DISTINCT FROM 'object' THEN
+        target := '{}'::jsonb;
+    END IF;
+    FOR key, value IN SELECT * FROM jsonb_each(patch) LOOP
+        IF jsonb_typeof(value) = 'null' THEN
+            target := target - key;
+        ELSE
+            target := jsonb_set(target, ARRAY[key], jsonb_merge_patch(target -> key, value));
+        END IF;
+    END LOOP;
+    RETURN target;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            "models",
+            column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f"{column}::jsonb",
+        )
+    op.execute(CREATE_JSONB_PATCH_FUNCTION)
+    op.execute(CREATE_JSONB_MERGE_PATCH_FUNCTION)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP FUNCTION jsonb_merge_patch(jsonb, jsonb)")
+    op.execute("DROP FUNCTION jsonb_patch(jsonb, jsonb)")
+    for column in JSON_COLUMNS:
+        op.alter_column("models", column, type_=sa.JSON(), postgresql_using=f"{column}::json")
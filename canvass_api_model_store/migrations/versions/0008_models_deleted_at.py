@@ -0,0 +1,28 @@
+"""models deleted at
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 17:00:00.000000
+
+Deleted models are tombstoned with `deleted_at` and removed later by the background purger.
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("models", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index(op.f("ix_models_deleted_at"), "models", ["deleted_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_models_deleted_at"), table_name="models")
+    op.drop_column("models", "deleted_at")
@@ -0,0 +1,77 @@
+"""model tags
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16 18:00:00.000000
+
+The comma separated tags of every model are copied into `model_tags`, one row per distinct
+tag, indexed by user and tag for tag lookups.
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_MODEL_TAGS = """
+INSERT INTO model_tags (model_id, tag, user_id)
+SELECT DISTINCT models.id, btrim(tag), models.user_id
+FROM models, unnest(string_to_array(models.tags, ',')) AS tag
+WHERE models.user_id IS NOT NULL AND btrim(tag) <> ''
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "model_tags",
+        sa.Column("model_id", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["model_id"],
+            ["models.id"],
+            name=op.f("fk_model_tags_model_id_models"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name=op.f("fk_model_tags_user_id_users")
+        ),
+        sa.PrimaryKeyConstraint("model_id", "tag", name=op.f("pk_model_tags")),
+    )
+    op.create_index(
+        "ix_model_tags_user_id_tag_model_id",
+        "model_tags",
+        ["user_id", "tag", "model_id"],
+        unique=False,
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(BACKFILL_MODEL_TAGS)
+        return
+
+    model_tags = sa.table(
+        "model_tags", sa.column("model_id"), sa.column("tag"), sa.column("user_id")
+    )
+    rows = [
+        {"model_id": model_id, "tag": tag, "user_id": user_id}
+        for model_id, user_id, tags in bind.execute(
+            sa.text("SELECT id, user_id, tags FROM models WHERE user_id IS NOT NULL")
+        )
+        for tag in dict.fromkeys(tag.strip() for tag in (tags or "").split(","))
+        if tag
+    ]
+    if rows:
+        op.bulk_insert(model_tags, rows)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_model_tags_user_id_tag_model_id", table_name="model_tags")
+    op.drop_table("model_tags")
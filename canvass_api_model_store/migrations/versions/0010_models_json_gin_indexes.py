@@ -0,0 +1,42 @@
+"""models json gin indexes
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16 19:00:00.000000
+
+On PostgreSQL, the metadata and feature schemas of models get GIN indexes, which serve the
+containment (`@>`) and key existence (`?`, `?&`) queries of the model search. Other databases
+filter searches in the application.
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+SEARCH_COLUMNS = ["model_metadata", "input_features_and_types", "output_names_and_types"]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for column in SEARCH_COLUMNS:
+        op.create_index(
+            op.f(f"ix_models_{column}"), "models", [column], unique=False, postgresql_using="gin"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for column in SEARCH_COLUMNS:
+        op.drop_index(op.f(f"ix_models_{column}"), table_name="models")
@@ -0,0 +1,98 @@
+"""predictions partition default rows
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 09:00:00.000000
+
+On PostgreSQL, predictions of a month logged before its partition existed land in the default
+partition, and creating the partition then fails on them. `create_predictions_partition` now
+creates the partition detached, moves the rows of its month out of the default partition into
+it, and attaches it. Other databases do not partition predictions.
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_predictions_partition(month timestamp) RETURNS void AS $$
+DECLARE
+    start_at timestamp := date_trunc('month', month);
+    end_at timestamp := start_at + interval '1 month';
+    partition_name text := 'predictions_' || to_char(start_at, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    -- Holds back inserts routed to the default partition, and other workers creating partitions
+    LOCK TABLE predictions_default IN SHARE ROW EXCLUSIVE MODE;
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE predictions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS ('
+        '    DELETE FROM predictions_default WHERE timestamp >= %L AND timestamp < %L RETURNING *'
+        ') INSERT INTO %I SELECT * FROM moved',
+        start_at, end_at, partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE predictions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_at, end_at
+    );
+END;
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_predictions_partition(month timestamp) RETURNS void AS $$
+DECLARE
+    start_at timestamp := date_trunc('month', month);
+    partition_name text := 'predictions_' || to_char(start_at, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF predictions FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_at, start_at + interval '1 month'
+    );
+EXCEPTION WHEN duplicate_table THEN
+    -- Another worker created the partition concurrently
+    NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(CREATE_PARTITION_FUNCTION)
+
+    # Months stranded in the default partition so far get their partition
+    op.execute(
+        """
+        SELECT create_predictions_partition(month)
+        FROM (SELECT DISTINCT date_trunc('month', timestamp) AS month FROM predictions_default)
+            AS months
+        """
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(PREVIOUS_PARTITION_FUNCTION)
@@ -5,6 +5,8 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from canvass_api_model_store.core.metrics import instrument_engine
+
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
 engine = create_engine(
@@ -12,4 +14,6 @@ engine = create_engine(
     echo=True,
 )
 
+instrument_engine(engine, "sync")
+
 SessionLocal = sessionmaker(bind=engine)
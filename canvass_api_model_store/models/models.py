@@ -3,11 +3,27 @@
 import datetime as dt
 
 from passlib.hash import bcrypt
-from sqlalchemy import ARRAY, Column, DateTime, ForeignKey, Integer, String, JSON
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    JSON,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
 
+# JSON documents of models are stored as JSONB on PostgreSQL so they can be patched in place
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+# SQLite stand-ins have no array type, so lists of strings are stored as JSON there
+StringList = ARRAY(String).with_variant(JSON(), "sqlite")
+
 
 class User(Base):
     """User Model for table."""
@@ -18,6 +34,8 @@ class User(Base):
     name = Column(String)
     org = Column(String)
     hashed_password = Column(String)
+    # Bumped by every change to the models of the user, to tag model listings
+    model_changes = Column(Integer, nullable=False, default=0, server_default="0")
 
     models = relationship("Model", order_by="Model.id", back_populates="user")
 
@@ -38,33 +56,89 @@ class Model(Base):
     """MLModel Model for table."""
 
     __tablename__ = "models"
+    __table_args__ = (
+        Index("ix_models_user_id_id", "user_id", "id"),
+        # GIN indexes serving the containment and key existence queries of the model search
+        Index("ix_models_model_metadata", "model_metadata", postgresql_using="gin"),
+        Index(
+            "ix_models_input_features_and_types", "input_features_and_types", postgresql_using="gin"
+        ),
+        Index("ix_models_output_names_and_types", "output_names_and_types", postgresql_using="gin"),
+    )
+
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     tags = Column(String)
-    custom_functions = Column(JSON)
-    pre_model_order = Column(ARRAY(String))
-    post_model_order = Column(ARRAY(String))
+    custom_functions = Column(JSONDocument)
+    pre_model_order = Column(StringList)
+    post_model_order = Column(StringList)
     predict_function = Column(String)
-    storage_options = Column(JSON)
-    container_options = Column(JSON)
-    model_metadata = Column(JSON)
+    storage_options = Column(JSONDocument)
+    container_options = Column(JSONDocument)
+    model_metadata = Column(JSONDocument)
     model_version = Column(Integer)
-    input_features_and_types = Column(JSON)
-    output_names_and_types = Column(JSON)
+    input_features_and_types = Column(JSONDocument)
+    output_names_and_types = Column(JSONDocument)
+    artifact_name = Column(String)
+    artifact_digest = Column(String(64), ForeignKey("artifacts.digest"), index=True)
+    # Set when the model is deleted, the row is removed later by the background purger
+    deleted_at = Column(DateTime, index=True)
 
     user = relationship("User", back_populates="models")
+    artifact = relationship("Artifact", back_populates="models")
+    tag_rows = relationship("ModelTag", back_populates="model")
     predictions = relationship("Prediction", order_by="Prediction.id", back_populates="model")
 
 
+class ModelTag(Base):
+    """ModelTag Model for table.
+
+    Holds one row per distinct tag of a model, kept in sync with the comma separated
+    `Model.tags`, so models are found by tag through an index instead of matching strings.
+    """
+
+    __tablename__ = "model_tags"
+    __table_args__ = (Index("ix_model_tags_user_id_tag_model_id", "user_id", "tag", "model_id"),)
+
+    model_id = Column(Integer, ForeignKey("models.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    model = relationship("Model", back_populates="tag_rows")
+
+
+class Artifact(Base):
+    """Artifact Model for table.
+
+    Artifacts are addressed by the SHA-256 digest of their content, so models registered with
+    the same file share a single blob.
+    """
+
+    __tablename__ = "artifacts"
+
+    digest = Column(String(64), primary_key=True)
+    blob_name = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
+
+    models = relationship("Model", back_populates="artifact")
+
+
 class Prediction(Base):
-    """Prediction Model for table."""
+    """Prediction Model for table.
+
+    On PostgreSQL the table is range partitioned by month on `timestamp` by the migrations, with
+    a primary key on `(id, timestamp)`.
+    """
 
     __tablename__ = "predictions"
-    id = Column(Integer, primary_key=True)
+    __table_args__ = (Index("ix_predictions_model_id_timestamp", "model_id", "timestamp"),)
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
     model_id = Column(Integer, ForeignKey("models.id"))
     version = Column(Integer)
     input = Column(JSON)
     output = Column(JSON)
-    timestamp = Column(DateTime, default=dt.datetime.utcnow)
+    timestamp = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
 
     model = relationship("Model", back_populates="predictions")
@@ -1,6 +1,7 @@
 """Module containing schemas for auth models."""
 
 import datetime as dt
+from enum import Enum
 from fastapi import FastAPI, File, UploadFile
 from typing import Any, Dict, List, Optional
 
@@ -87,6 +88,30 @@ class ModelBase(BaseModel):
     output_names_and_types: str
 
 
+class ModelView(str, Enum):
+    """Views of a model returned by the read endpoints.
+
+    Attributes:
+        full: Every column of the model.
+        summary: Only the id, tags, version and predict function of the model.
+    """
+
+    full = "full"
+    summary = "summary"
+
+
+class TagMatch(str, Enum):
+    """Ways of matching the tags of a model against the tags of a query.
+
+    Attributes:
+        all: The model has every tag of the query.
+        any: The model has at least one tag of the query.
+    """
+
+    all = "all"
+    any = "any"
+
+
 class ModelCreate(ModelBase):
     """ModelCreate Schema for new Model.
 
@@ -145,6 +170,52 @@ class ModelUpdate(BaseModel):
     output_names_and_types: Optional[Dict[str, str]] = None
 
 
+class ModelBulkUpdate(ModelUpdate):
+    """ModelBulkUpdate Schema for one update of a bulk model update.
+
+    Attributes:
+        id (int): ID of the model to update.
+        expected_version (Optional[int]): Version the update is based on, if any.
+    """
+
+    id: int
+    expected_version: Optional[int] = None
+
+
+class BulkItemResult(BaseModel):
+    """BulkItemResult Schema for the outcome of one item of a bulk model operation.
+
+    Attributes:
+        index (int): Position of the item in the request, starting at 0.
+        status (int): HTTP status the item would have had as a single request.
+        model_id (Optional[int]): ID of the model, once known.
+        model_version (Optional[int]): Version of the model after the operation.
+        digest (Optional[str]): SHA-256 digest of the artifact of a registered model.
+        error (Optional[str]): Reason the item failed.
+    """
+
+    index: int
+    status: int
+    model_id: Optional[int] = None
+    model_version: Optional[int] = None
+    digest: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    """BulkResult Schema for a bulk model operation.
+
+    Attributes:
+        succeeded (int): Number of items applied.
+        failed (int): Number of items rejected.
+        results (List[BulkItemResult]): Outcome of each item, in request order.
+    """
+
+    succeeded: int = 0
+    failed: int = 0
+    results: List[BulkItemResult] = []
+
+
 class PredictionBase(BaseModel):
     """BaseModel Schema for Prediction.
 
@@ -197,3 +268,71 @@ class Prediction(PredictionBase):
         """Config for ORM mode."""
 
         orm_mode = True
+
+
+class PredictionRecord(BaseModel):
+    """PredictionRecord Schema for a prediction ingested for a known model.
+
+    Attributes:
+        version (int): Model version for the prediction.
+        input (Dict[str, Any]): Input data for the prediction.
+        output (Dict[str, Any]): Output data from the prediction.
+        timestamp (dt.datetime, optional): Timestamp of the prediction, defaults to ingestion time.
+    """
+
+    version: int
+    input: Dict[str, Any]
+    output: Dict[str, Any]
+    timestamp: Optional[dt.datetime] = None
+
+
+class PredictionError(BaseModel):
+    """PredictionError Schema for a rejected prediction.
+
+    Attributes:
+        index (int): Position of the prediction in the request, starting at 0.
+        error (str): Reason the prediction was rejected.
+    """
+
+    index: int
+    error: str
+
+
+class PredictionBatchResult(BaseModel):
+    """PredictionBatchResult Schema for a batch of ingested predictions.
+
+    Attributes:
+        accepted (int): Number of predictions written.
+        rejected (int): Number of predictions rejected.
+        errors (List[PredictionError]): The first errors of the batch.
+    """
+
+    accepted: int = 0
+    rejected: int = 0
+    errors: List[PredictionError] = []
+
+
+class PredictionIngestResult(BaseModel):
+    """PredictionIngestResult Schema for an ingestion request.
+
+    Attributes:
+        accepted (int): Number of predictions written.
+        rejected (int): Number of predictions rejected.
+        batches (List[PredictionBatchResult]): Results of each batch, in order.
+    """
+
+    accepted: int = 0
+    rejected: int = 0
+    batches: List[PredictionBatchResult] = []
+
+
+class PredictionPage(BaseModel):
+    """PredictionPage Schema for a page of predictions.
+
+    Attributes:
+        predictions (List[Prediction]): The predictions of the page, newest first.
+        next_cursor (str, optional): Cursor of the next page, None on the last page.
+    """
+
+    predictions: List[Prediction]
+    next_cursor: Optional[str] = None
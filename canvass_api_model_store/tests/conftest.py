@@ -1,12 +1,38 @@
 """Module containing fixture function definitions used by test suite."""
-import pytest
-from canvass_fastapi.models import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import contextmanager
 
+import pytest
+from api.v1.auth import services as auth_serv
+from api.v1.model_store import services as model_serv
+from models.models import Base
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from canvass_api_model_store.core.config import settings
 from canvass_api_model_store.core.db import async_engine
-from canvass_api_model_store.models import *  # noqa: F401, F403
+from canvass_api_model_store.core.metrics import count_statements
 from canvass_api_model_store.tests.factories import register_factories
 
+MODEL_PARAMS = {
+    "tags": "test,fixture",
+    "custom_functions": "{}",
+    "pre_model_order": ["scale"],
+    "post_model_order": ["round"],
+    "predict_function": "predict",
+    "storage_options": "{}",
+    "container_options": "{}",
+    "model_metadata": '{"team": "test"}',
+    "model_version": 1,
+    "input_features_and_types": '{"x": "float"}',
+    "output_names_and_types": '{"y": "float"}',
+}
+
+
+def in_memory_database() -> bool:
+    """Return whether the tests run against an in-memory SQLite database."""
+    return make_url(settings.database_url).database in (None, "", ":memory:")
+
 
 @pytest.fixture(scope="module")
 def app():
@@ -31,6 +57,9 @@ def app():
 def client(app):
     """A test client for the FastAPI app.
 
+    Against an in-memory database, the background purger of the app is stopped, since it
+    would run on the event loop of the client while the tests use the same connection.
+
     Args:
         app - An instance of the FastAPI app
 
@@ -44,13 +73,23 @@ def client(app):
     from fastapi.testclient import TestClient
 
     with TestClient(app) as c:
+        if in_memory_database():
+            # The purger of the app would share the single connection with the tests
+            c.portal.call(app.state.purger.stop)
         yield c
+        # The pooled connections of the app belong to the event loop of the client
+        c.portal.call(async_engine.dispose)
 
 
 @pytest.fixture(scope="session")
 def engine():
     """Create a test database engine.
 
+    The engine does not pool connections, so each test opens its own on its own event loop
+    rather than sharing those the app opened on the event loop of the client. An in-memory
+    SQLite database only lives in the single connection of the app engine, so the tests use
+    that engine instead.
+
     Args:
         No arguments
 
@@ -61,8 +100,12 @@ def engine():
         No Exceptions defined
 
     """
-    yield async_engine
-    async_engine.sync_engine.dispose()
+    if in_memory_database():
+        yield async_engine
+        return
+    engine = create_async_engine(settings.database_url, poolclass=NullPool, future=True)
+    yield engine
+    engine.sync_engine.dispose()
 
 
 @pytest.fixture(autouse=True)
@@ -80,10 +123,81 @@ async def create(engine):
 
     """
     async with engine.begin() as conn:
-        await conn.run_sync(BaseModel.metadata.create_all)
+        await conn.run_sync(Base.metadata.create_all)
     yield
     async with engine.begin() as conn:
-        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Empty the per-process caches, whose entries would outlive the tables of a test.
+
+    Args:
+        No arguments
+
+    Yields:
+        No return value.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    auth_serv.user_cache.clear()
+    model_serv.model_cache.clear()
+    model_serv.model_versions.clear()
+    yield
+
+
+@pytest.fixture
+def headers(client):
+    """Register a user and log them in.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+
+    Returns:
+        A dict with the authorization headers of the user.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    response = client.post(
+        "/auth/api/users",
+        json={"email": "test@example.com", "name": "n", "org": "o", "hashed_password": "pw"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def create_model(client, headers):
+    """A function registering a model of the logged in user.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+
+    Returns:
+        A function taking the content of the artifact and the parameters overriding
+        `MODEL_PARAMS`, and returning the created model.
+
+    Raises:
+        No Exceptions defined
+
+    """
+
+    def register_model(content: bytes = b"model", **params) -> dict:
+        response = client.post(
+            "/api/models",
+            params={**MODEL_PARAMS, **params},
+            files={"file": ("model.bin", content)},
+            headers=headers,
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return register_model
 
 
 @pytest.fixture
@@ -103,3 +217,36 @@ async def session(engine):
     async with AsyncSession(engine) as session:
         register_factories(session)
         yield session
+
+
+@pytest.fixture
+def statement_budget():
+    """A context manager asserting that a block runs at most a number of SQL statements.
+
+    Statements are collected from the application engine whichever event loop runs them, so
+    the block should send a single request. The failure message lists every statement, which
+    shows a statement repeated per row.
+
+    Args:
+        No arguments
+
+    Returns:
+        A function taking the maximum number of statements and returning the context manager,
+        which yields the list of statements run so far.
+
+    Raises:
+        No Exceptions defined
+
+    """
+
+    @contextmanager
+    def assert_statement_budget(max_statements: int):
+        with count_statements(async_engine.sync_engine) as statements:
+            yield statements
+        listing = "\n".join(statements)
+        message = (
+            f"{len(statements)} SQL statements run, the budget is {max_statements}:\n{listing}"
+        )
+        assert len(statements) <= max_statements, message
+
+    return assert_statement_budget
@@ -0,0 +1,191 @@
+"""Module containing function definitions to test the bulk model routes."""
+import json
+
+import pytest
+
+from canvass_api_model_store.core.config import settings
+
+
+def bulk_model(**values) -> dict:
+    """Return a valid model of a bulk registration."""
+    model = {
+        "tags": "bulk",
+        "custom_functions": "{}",
+        "pre_model_order": [],
+        "post_model_order": [],
+        "predict_function": "predict",
+        "storage_options": "{}",
+        "container_options": "{}",
+        "model_metadata": "{}",
+        "model_version": 1,
+        "input_features_and_types": '{"x": "float"}',
+        "output_names_and_types": '{"y": "float"}',
+    }
+    return {**model, **values}
+
+
+def bulk_create(client, headers, models: list, contents: list):
+    """Register models with one bulk request, sending one artifact per content."""
+    return client.post(
+        "/api/models/bulk",
+        data={"models": json.dumps(models)},
+        files=[("files", (f"model-{i}.bin", content)) for i, content in enumerate(contents)],
+        headers=headers,
+    )
+
+
+@pytest.mark.integration
+def test_bulk_create_reports_each_model(client, headers):
+    """Function to test that a bulk registration reports the outcome of each model.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+
+    Asserts:
+        Valid models are registered and readable, invalid models get a 422 without failing the
+        request, and models sent with the same content share its digest.
+
+    Raises:
+        No Exceptions defined
+    """
+    models = [bulk_model(), bulk_model(model_metadata="not json"), bulk_model()]
+
+    response = bulk_create(client, headers, models, [b"same", b"other", b"same"])
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert [item["status"] for item in result["results"]] == [201, 422, 201]
+    assert result["results"][1]["model_id"] is None
+    first, _, last = result["results"]
+    assert first["digest"] == last["digest"]
+    for item in (first, last):
+        response = client.get(f"/api/models/{item['model_id']}", headers=headers)
+        assert response.json()["model"]["tags"] == "bulk"
+
+
+@pytest.mark.integration
+def test_bulk_create_requires_one_file_per_model(client, headers):
+    """Function to test that a bulk registration must send the artifact of every model.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+
+    Asserts:
+        The request is rejected with a 400 and registers nothing.
+
+    Raises:
+        No Exceptions defined
+    """
+    response = bulk_create(client, headers, [bulk_model(), bulk_model()], [b"model"])
+
+    assert response.status_code == 400
+    assert client.get("/api/models/", headers=headers).json()["model"] == []
+
+
+@pytest.mark.integration
+def test_bulk_update_applies_valid_items(client, headers, create_model):
+    """Function to test that a bulk update applies valid items and reports the others.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Updates based on the current version are applied, while updates of missing models,
+        stale versions and models updated twice get a 404, 412 and 409 and change nothing.
+
+    Raises:
+        No Exceptions defined
+    """
+    first = create_model()["model_id"]
+    second = create_model(b"second")["model_id"]
+    updates = [
+        {"id": first, "predict_function": "v2", "expected_version": 1},
+        {"id": second, "predict_function": "lost", "expected_version": 7},
+        {"id": second + 100, "predict_function": "lost"},
+        {"id": first, "predict_function": "lost"},
+        {"id": second, "tags": "updated"},
+    ]
+
+    response = client.patch("/api/models/bulk", json=updates, headers=headers)
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 3)
+    assert [item["status"] for item in result["results"]] == [200, 412, 404, 409, 200]
+    assert "at version 7" in result["results"][1]["error"]
+    assert [result["results"][i]["model_version"] for i in (0, 4)] == [2, 2]
+    model = client.get(f"/api/models/{first}", headers=headers).json()["model"]
+    assert (model["predict_function"], model["model_version"]) == ("v2", 2)
+    model = client.get(f"/api/models/{second}", headers=headers).json()["model"]
+    assert (model["predict_function"], model["tags"]) == ("predict", "updated")
+
+
+@pytest.mark.integration
+def test_bulk_delete_reports_missing_models(client, headers, create_model):
+    """Function to test that a bulk delete removes the models found and reports the others.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Existing models are deleted and no longer read, and missing models get a 404.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    client.get(f"/api/models/{model_id}", headers=headers)
+
+    response = client.delete(
+        "/api/models/bulk", params={"model_id": [model_id, model_id + 100]}, headers=headers
+    )
+
+    assert response.status_code == 200, response.text
+    assert [item["status"] for item in response.json()["results"]] == [200, 404]
+    assert client.get(f"/api/models/{model_id}", headers=headers).json()["model"] is None
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("count", [0, 3])
+def test_bulk_requests_are_bounded(client, headers, create_model, monkeypatch, count):
+    """Function to test that bulk requests hold between one and `max_bulk_size` models.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        monkeypatch - The pytest fixture patching the settings.
+        count - A number of models outside the bounds.
+
+    Asserts:
+        Bulk registrations, updates and deletes of that many models are rejected, with a 400
+        once the models are read, and change nothing.
+
+    Raises:
+        No Exceptions defined
+    """
+    monkeypatch.setattr(settings, "max_bulk_size", 2)
+    model_id = create_model()["model_id"]
+    updates = [{"id": model_id, "predict_function": "lost"}] * count
+
+    created = bulk_create(client, headers, [bulk_model()] * count, [b"model"] * count)
+    updated = client.patch("/api/models/bulk", json=updates, headers=headers)
+    deleted = client.delete(
+        "/api/models/bulk", params={"model_id": [model_id] * count}, headers=headers
+    )
+
+    statuses = [created.status_code, updated.status_code, deleted.status_code]
+    if count == 0:
+        # Without models, the required form field and query parameter are missing
+        assert statuses == [422, 400, 422]
+    else:
+        assert statuses == [400, 400, 400]
+    models = client.get("/api/models/", headers=headers).json()["model"]
+    assert [(m["id"], m["predict_function"]) for m in models] == [(model_id, "predict")]
@@ -0,0 +1,175 @@
+"""Module containing function definitions to test the model cache of the service layer."""
+import datetime as dt
+
+import models.models as _models
+import models.schemas as _schemas
+import pytest
+from api.v1.model_store import services as model_serv
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from canvass_api_model_store.core.cache import TTLCache
+from canvass_api_model_store.core.metrics import count_statements
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Trust model versions for one second of a clock moved by the test.
+
+    Args:
+        monkeypatch - The pytest fixture replacing the cache of model versions.
+
+    Returns:
+        A list holding the current time in seconds, to be moved forward by the test.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    now = [0.0]
+    monkeypatch.setattr(model_serv, "model_versions", TTLCache(100, ttl=1, timer=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+async def owner(engine):
+    """Register a user owning a model, straight in the database.
+
+    Args:
+        engine - An instance of the AsyncEngine.
+
+    Returns:
+        A tuple of the user and the id of the model.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        user = _models.User(email="cache@example.com", name="n", org="o")
+        user.hashed_password = "not-a-hash"
+        db.add(user)
+        await db.flush()
+        model = _models.Model(user_id=user.id, predict_function="predict", model_version=1)
+        db.add(model)
+        await db.commit()
+        return _schemas.User.from_orm(user), model.id
+
+
+async def read(engine, user: _schemas.User, model_id: int):
+    """Read a model through the cache in a session of its own, as a request would."""
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        return await model_serv.read_model(user.id, model_id, db)
+
+
+async def change_elsewhere(engine, model_id: int, **values):
+    """Change a model without going through this process, as another worker would."""
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await db.execute(update(_models.Model).where(_models.Model.id == model_id).values(**values))
+        await db.commit()
+
+
+@pytest.mark.integration
+async def test_read_model_serves_current_version_from_cache(engine, owner, clock):
+    """Function to test that a model read again at the same version is served from the cache.
+
+    Args:
+        engine - An instance of the AsyncEngine.
+        owner - The user and the id of their model.
+        clock - The clock of the cache of model versions.
+
+    Asserts:
+        A read within the window in which versions are trusted runs no statement, and a later
+        read only checks the version of the model and returns the cached record.
+
+    Raises:
+        No Exceptions defined
+    """
+    user, model_id = owner
+    await read(engine, user, model_id)
+    # Not a change the application makes, as it would bump the version, so only the cache has it
+    await change_elsewhere(engine, model_id, predict_function="uncached")
+
+    with count_statements(engine.sync_engine) as statements:
+        record = await read(engine, user, model_id)
+    assert record["predict_function"] == "predict"
+    assert len(statements) == 0
+
+    clock[0] += 1
+    with count_statements(engine.sync_engine) as statements:
+        record = await read(engine, user, model_id)
+    assert record["predict_function"] == "predict"
+    assert len(statements) == 1
+
+
+@pytest.mark.integration
+async def test_read_model_reloads_updated_model(engine, owner, clock):
+    """Function to test that an updated model is read at its new version.
+
+    Args:
+        engine - An instance of the AsyncEngine.
+        owner - The user and the id of their model.
+        clock - The clock of the cache of model versions.
+
+    Asserts:
+        A model updated by this process is read with its new values right away, and the
+        replaced version leaves the cache. A model updated by another worker is read with its
+        new values once the window in which versions are trusted has passed.
+
+    Raises:
+        No Exceptions defined
+    """
+    user, model_id = owner
+    await read(engine, user, model_id)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        changes = _schemas.ModelUpdate(predict_function="here")
+        await model_serv.update_model(user, db, changes, model_id)
+    assert (await read(engine, user, model_id))["predict_function"] == "here"
+    assert model_serv.model_cache.get((user.id, model_id, 1)) is None
+
+    await change_elsewhere(
+        engine,
+        model_id,
+        predict_function="elsewhere",
+        model_version=_models.Model.model_version + 1,
+    )
+    assert (await read(engine, user, model_id))["predict_function"] == "here"
+    clock[0] += 1
+    record = await read(engine, user, model_id)
+    assert (record["predict_function"], record["model_version"]) == ("elsewhere", 3)
+
+
+@pytest.mark.integration
+async def test_read_model_misses_deleted_model(engine, owner, clock):
+    """Function to test that a deleted model is no longer read.
+
+    Args:
+        engine - An instance of the AsyncEngine.
+        owner - The user and the id of their model.
+        clock - The clock of the cache of model versions.
+
+    Asserts:
+        A model deleted by this process is not found right away, and one deleted by another
+        worker once the window in which versions are trusted has passed, although their
+        current versions were cached.
+
+    Raises:
+        No Exceptions defined
+    """
+    user, model_id = owner
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        other = _models.Model(user_id=user.id, predict_function="predict", model_version=1)
+        db.add(other)
+        await db.commit()
+        other_id = other.id
+    await read(engine, user, model_id)
+    await read(engine, user, other_id)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await model_serv.delete_model(model_id, user, db)
+    await change_elsewhere(engine, other_id, deleted_at=dt.datetime.utcnow())
+
+    assert await read(engine, user, model_id) is None
+    clock[0] += 1
+    assert await read(engine, user, other_id) is None
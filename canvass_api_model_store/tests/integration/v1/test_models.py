@@ -0,0 +1,507 @@
+"""Module containing function definitions to test the model routes."""
+import json
+import os
+
+import models.models as _models
+import pytest
+from api.v1.model_store import services as model_serv
+from sqlalchemy import func, select, update
+
+
+def stored_blobs(client) -> set:
+    """Return the names of the blobs held by the local storage backend of the app."""
+    return {name for name in os.listdir(client.app.state.storage.root) if not name.startswith(".")}
+
+
+@pytest.mark.integration
+async def test_same_content_is_stored_once(client, create_model, session):
+    """Function to test that models registered with the same artifact share it.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        create_model - A function registering a model of the user.
+        session - A database session.
+
+    Asserts:
+        Both models get the digest of the content, and a single blob and artifact row are
+        stored for it.
+
+    Raises:
+        No Exceptions defined
+    """
+    blobs = stored_blobs(client)
+
+    first = create_model(b"shared content")
+    second = create_model(b"shared content")
+
+    assert first["digest"] == second["digest"]
+    assert len(stored_blobs(client) - blobs) == 1
+    artifacts = await session.execute(
+        select(func.count())
+        .select_from(_models.Artifact)
+        .where(_models.Artifact.digest == first["digest"])
+    )
+    assert artifacts.scalar() == 1
+    names = await session.execute(
+        select(_models.Model.artifact_name).where(
+            _models.Model.id.in_([first["model_id"], second["model_id"]])
+        )
+    )
+    assert set(names.scalars()) == stored_blobs(client) - blobs
+
+
+@pytest.mark.integration
+def test_same_content_is_not_committed_again(client, create_model, monkeypatch):
+    """Function to test that content already stored is not written to a new blob.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        create_model - A function registering a model of the user.
+        monkeypatch - The pytest fixture patching the storage backend.
+
+    Asserts:
+        Only the first registration of a content commits its blocks, and the blocks staged by
+        the second one are discarded.
+
+    Raises:
+        No Exceptions defined
+    """
+    storage = client.app.state.storage
+    commit_blocks = storage.commit_blocks
+    committed = []
+
+    async def record_commit(blob_name, block_ids):
+        committed.append(blob_name)
+        await commit_blocks(blob_name, block_ids)
+
+    monkeypatch.setattr(storage, "commit_blocks", record_commit)
+    blobs = stored_blobs(client)
+    staged = os.path.join(storage.root, ".blocks")
+
+    create_model(b"content stored once")
+    create_model(b"content stored once")
+
+    assert len(committed) == 1
+    assert stored_blobs(client) - blobs == set(committed)
+    assert not os.path.isdir(staged) or os.listdir(staged) == []
+
+
+@pytest.mark.integration
+async def test_read_model_etag_follows_database_version(client, headers, create_model, session):
+    """Function to test conditional reads of a model.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        session - A database session.
+
+    Asserts:
+        A model is tagged with its version, a read with the current tag gets a 304, and an
+        update through the API or straight in the database makes the tag stale.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    url = f"/api/models/{model_id}"
+
+    response = client.get(url, headers=headers)
+    etag = response.headers["ETag"]
+    assert etag == f'W/"{model_id}-1"'
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    updated = client.patch(url, json={"predict_function": "v2"}, headers=headers)
+    assert updated.headers["ETag"] == f'W/"{model_id}-2"'
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == updated.headers["ETag"]
+
+    # As another worker would, bypassing the caches of the app
+    await session.execute(
+        update(_models.Model)
+        .where(_models.Model.id == model_id)
+        .values(predict_function="v3", model_version=3)
+    )
+    await session.commit()
+    # Once the window in which this worker trusts the version it read has passed
+    model_serv.model_versions.clear()
+    response = client.get(url, headers={**headers, "If-None-Match": updated.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json()["model"]["predict_function"] == "v3"
+
+
+@pytest.mark.integration
+def test_read_all_models_etag_follows_changes(client, headers, create_model):
+    """Function to test conditional reads of the model listing.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        A listing read with its current tag gets a 304 until a model is registered.
+
+    Raises:
+        No Exceptions defined
+    """
+    create_model()
+    etag = client.get("/api/models/", headers=headers).headers["ETag"]
+
+    response = client.get("/api/models/", headers={**headers, "If-None-Match": f'"x", {etag}'})
+    assert response.status_code == 304
+
+    create_model(b"another model")
+    response = client.get("/api/models/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["model"]) == 2
+
+
+@pytest.mark.integration
+def test_update_model_then_read(client, headers, create_model):
+    """Function to test that an update is read back at its new version.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        The update returns the new values and version, which the next read returns too.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    url = f"/api/models/{model_id}"
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    response = client.patch(
+        url, json={"predict_function": "v2"}, headers={**headers, "If-Match": etag}
+    )
+
+    assert response.status_code == 200, response.text
+    assert (response.json()["predict_function"], response.json()["model_version"]) == ("v2", 2)
+    model = client.get(url, headers=headers).json()["model"]
+    assert (model["predict_function"], model["model_version"]) == ("v2", 2)
+
+
+@pytest.mark.integration
+async def test_update_model_with_stale_version_fails(client, headers, create_model, session):
+    """Function to test that an update based on a stale version is refused.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        session - A database session.
+
+    Asserts:
+        An update whose `If-Match` holds a replaced version, including one replaced straight in
+        the database, gets a 412 naming the current version and changes nothing.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    url = f"/api/models/{model_id}"
+    etag = client.get(url, headers=headers).headers["ETag"]
+    client.patch(url, json={"predict_function": "v2"}, headers=headers)
+
+    response = client.patch(
+        url, json={"predict_function": "lost"}, headers={**headers, "If-Match": etag}
+    )
+    assert response.status_code == 412
+    assert "at version 2" in response.json()["detail"]
+
+    # As another worker would, bypassing the caches of the app
+    await session.execute(
+        update(_models.Model).where(_models.Model.id == model_id).values(model_version=5)
+    )
+    await session.commit()
+    response = client.patch(
+        url, json={"predict_function": "lost"}, headers={**headers, "If-Match": "2"}
+    )
+    assert response.status_code == 412
+    assert "at version 5" in response.json()["detail"]
+    assert client.get(url, headers=headers).json()["model"]["predict_function"] == "v2"
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("if_match", [None, "1"])
+def test_update_missing_model_fails(client, headers, create_model, if_match):
+    """Function to test that updating a missing or deleted model is a 404, whatever If-Match.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        if_match - The `If-Match` header of the update, if any.
+
+    Asserts:
+        Updates of a model that never existed and of a deleted model get a 404.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    client.get(f"/api/models/{model_id}", headers=headers)
+    client.delete(f"/api/models/{model_id}", headers=headers)
+    if if_match:
+        headers = {**headers, "If-Match": if_match}
+
+    for missing_id in (model_id, model_id + 100):
+        response = client.patch(
+            f"/api/models/{missing_id}", json={"predict_function": "v2"}, headers=headers
+        )
+        assert response.status_code == 404, response.text
+
+
+@pytest.mark.integration
+def test_patch_model_json_fields_round_trip(client, headers, create_model):
+    """Function to test that merge patches and JSON Patches of a model are read back.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Each media type is applied to the fields it names, leaves the other fields and columns
+        alone, bumps the version, and is returned by the next read.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    url = f"/api/models/{model_id}/json"
+
+    response = client.patch(
+        url,
+        content=json.dumps({"model_metadata": {"owner": "ops", "team": None}}),
+        headers={**headers, "Content-Type": "application/merge-patch+json", "If-Match": "1"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] == f'W/"{model_id}-2"'
+
+    response = client.patch(
+        url,
+        content=json.dumps(
+            [
+                {"op": "add", "path": "/model_metadata/tier", "value": 1},
+                {"op": "add", "path": "/custom_functions/scale", "value": "x * 2"},
+                {"op": "test", "path": "/model_metadata/owner", "value": "ops"},
+            ]
+        ),
+        headers={**headers, "Content-Type": "application/json-patch+json"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["model_version"] == 3
+
+    model = client.get(f"/api/models/{model_id}", headers=headers).json()["model"]
+    assert model["model_metadata"] == {"owner": "ops", "tier": 1}
+    assert model["custom_functions"] == {"scale": "x * 2"}
+    assert model["input_features_and_types"] == {"x": "float"}
+    assert (model["predict_function"], model["model_version"]) == ("predict", 3)
+
+
+@pytest.mark.integration
+async def test_patch_model_merge_null_removes_field(client, headers, create_model, session):
+    """Function to test that a merge patch of null removes a JSON field.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        session - A database session.
+
+    Asserts:
+        The field is stored as SQL NULL rather than a JSON null, reads back as missing, and a
+        later merge patch starts the field from an empty object.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    url = f"/api/models/{model_id}/json"
+    merge_patch = {**headers, "Content-Type": "application/merge-patch+json"}
+
+    response = client.patch(url, content=json.dumps({"model_metadata": None}), headers=merge_patch)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["model_metadata"] is None
+    stored = await session.execute(
+        select(func.count())
+        .select_from(_models.Model)
+        .where(_models.Model.id == model_id, _models.Model.model_metadata.is_(None))
+    )
+    assert stored.scalar() == 1
+
+    response = client.patch(
+        url, content=json.dumps({"model_metadata": {"a": 1}}), headers=merge_patch
+    )
+    assert response.json()["model_metadata"] == {"a": 1}
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "content_type,body,status_code",
+    [
+        ("application/json", '{"model_metadata": {}}', 415),
+        ("text/plain", "model_metadata", 415),
+        ("application/merge-patch+json", "{not json", 400),
+        ("application/json-patch+json", '[{"op": "test", "path": "/model_metadata/team"}]', 400),
+        ("application/json-patch+json", '[{"op": "remove", "path": "/model_metadata/x"}]', 409),
+    ],
+)
+def test_patch_model_rejects_bad_patches(
+    client, headers, create_model, content_type, body, status_code
+):
+    """Function to test that a patch is only applied if its media type and content are valid.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        content_type - The media type the patch is sent with.
+        body - The patch.
+        status_code - The status of the response.
+
+    Asserts:
+        Unknown media types get a 415, malformed patches a 400 and patches that do not apply a
+        409, and the model keeps its version.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+
+    response = client.patch(
+        f"/api/models/{model_id}/json",
+        content=body,
+        headers={**headers, "Content-Type": content_type},
+    )
+
+    assert response.status_code == status_code, response.text
+    model = client.get(f"/api/models/{model_id}", headers=headers).json()["model"]
+    assert model["model_version"] == 1
+
+
+def listed_ids(client, headers, **params) -> list:
+    """Return the ids of the models of the user listed with the given filters."""
+    response = client.get("/api/models/", params=params, headers=headers)
+    return [model["id"] for model in response.json()["model"]]
+
+
+@pytest.mark.integration
+def test_read_all_models_matches_all_or_any_tag(client, headers, create_model):
+    """Function to test the tag filter of the model listing.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        With `tag_match=all` only models having every tag are listed, with `tag_match=any`
+        models having one of them, and tags are matched whole, not as substrings.
+
+    Raises:
+        No Exceptions defined
+    """
+    both = create_model(b"1", tags="cpu, prod")["model_id"]
+    prod = create_model(b"2", tags="prod")["model_id"]
+    create_model(b"3", tags="gpu,production")
+
+    assert listed_ids(client, headers, tags=["prod", "cpu"]) == [both]
+    assert listed_ids(client, headers, tags=["prod", "cpu"], tag_match="all") == [both]
+    assert listed_ids(client, headers, tags=["prod", "cpu"], tag_match="any") == [both, prod]
+    assert listed_ids(client, headers, tags=["prod,cpu", "prod"]) == [both]
+    assert listed_ids(client, headers, tags=["prod", "missing"], tag_match="all") == []
+
+
+@pytest.mark.integration
+def test_update_model_replaces_tags(client, headers, create_model):
+    """Function to test that updated tags replace the tags the listing filters on.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        A single or bulk update of the tags drops the previous tags from the filter, and an
+        update leaving the tags out keeps them.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model(tags="old,kept")["model_id"]
+
+    client.patch(f"/api/models/{model_id}", json={"tags": "new,kept"}, headers=headers)
+    assert listed_ids(client, headers, tags=["old"]) == []
+    assert listed_ids(client, headers, tags=["new", "kept"]) == [model_id]
+
+    client.patch(f"/api/models/{model_id}", json={"predict_function": "v3"}, headers=headers)
+    assert listed_ids(client, headers, tags=["new"]) == [model_id]
+
+    client.patch("/api/models/bulk", json=[{"id": model_id, "tags": "bulk"}], headers=headers)
+    assert listed_ids(client, headers, tags=["new", "kept"], tag_match="any") == []
+    assert listed_ids(client, headers, tags=["bulk"]) == [model_id]
+
+
+@pytest.mark.integration
+def test_search_models_by_json_fields(client, headers, create_model):
+    """Function to test the search of models by the content of their JSON fields.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Models are found by nested objects, array elements and keys of their JSON fields, all
+        conditions must hold, results are paged with a cursor and malformed objects get a 400.
+
+    Raises:
+        No Exceptions defined
+    """
+    plain = create_model(b"1")["model_id"]
+    labelled = create_model(
+        b"2",
+        model_metadata='{"team": "ml", "owner": {"name": "a", "site": "b"}, "labels": ["x", "y"]}',
+        input_features_and_types='{"x": "float", "z": "int"}',
+    )["model_id"]
+
+    def search(**params) -> list:
+        response = client.get("/api/models/search", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        return [model["id"] for model in response.json()["model"]]
+
+    assert search(model_metadata='{"owner": {"name": "a"}}') == [labelled]
+    assert search(model_metadata='{"labels": ["y"]}') == [labelled]
+    assert search(model_metadata='{"team": "test"}') == [plain]
+    assert search(input_feature=["x"]) == [plain, labelled]
+    assert search(input_feature=["x", "z"]) == [labelled]
+    assert search(input_feature=["x"], metadata_key=["owner"], output_name=["y"]) == [labelled]
+    assert search(input_feature=["x"], model_metadata='{"team": "other"}') == []
+
+    page = client.get(
+        "/api/models/search",
+        params={"input_feature": "x", "limit": 1, "fields": ["id"]},
+        headers=headers,
+    ).json()
+    assert page["model"] == [{"id": plain}]
+    page = client.get(
+        "/api/models/search",
+        params={"input_feature": "x", "limit": 1, "cursor": page["next_cursor"]},
+        headers=headers,
+    ).json()
+    assert ([model["id"] for model in page["model"]], page["next_cursor"]) == ([labelled], None)
+
+    response = client.get("/api/models/search", params={"model_metadata": "[1]"}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,273 @@
+"""Module containing function definitions to test the prediction routes."""
+import json
+
+import pytest
+from api.v1.prediction import services as prediction_serv
+from sqlalchemy import event
+
+from canvass_api_model_store.core.config import settings
+from canvass_api_model_store.core.db import async_engine
+
+
+def prediction(x: int) -> dict:
+    """Return a valid prediction of the model."""
+    return {"version": 1, "input": {"x": x}, "output": {"y": x * 2}}
+
+
+@pytest.mark.integration
+def test_ingest_ndjson_rejects_malformed_lines(client, headers, create_model):
+    """Function to test that malformed NDJSON lines are rejected without failing the stream.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Valid lines are written, undecodable lines and lines not matching the schema are
+        rejected with their position, and blank lines are skipped. Lines split across chunks of
+        the stream are reassembled.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    body = b"\n".join(
+        [
+            json.dumps(prediction(0)).encode(),
+            b"{not json",
+            b"",
+            json.dumps({"version": "first", "input": {}, "output": {}}).encode(),
+            json.dumps(prediction(1)).encode(),
+        ]
+    )
+    # Chunks of 7 bytes cut through every line
+    chunks = [body[start : start + 7] for start in range(0, len(body), 7)]
+
+    response = client.post(
+        f"/api/models/{model_id}/predictions",
+        content=iter(chunks),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 201, response.text
+    result = response.json()
+    assert (result["accepted"], result["rejected"]) == (2, 2)
+    assert [error["index"] for error in result["batches"][0]["errors"]] == [1, 2]
+
+    page = client.get(f"/api/models/{model_id}/predictions", headers=headers).json()
+    assert sorted(p["input"]["x"] for p in page["predictions"]) == [0, 1]
+
+
+@pytest.mark.integration
+def test_ingest_writes_bounded_batches(client, headers, create_model, monkeypatch):
+    """Function to test that predictions are written in batches of the configured size.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        monkeypatch - The pytest fixture patching the settings.
+
+    Asserts:
+        Every batch holds `prediction_batch_size` predictions but the last, rejected predictions
+        count towards the size of their batch, and the totals add up the batches.
+
+    Raises:
+        No Exceptions defined
+    """
+    monkeypatch.setattr(settings, "prediction_batch_size", 3)
+    model_id = create_model()["model_id"]
+    records = [prediction(x) for x in range(7)]
+    records[4] = {"version": 1, "input": "not an object", "output": {}}
+
+    response = client.post(f"/api/models/{model_id}/predictions", json=records, headers=headers)
+
+    assert response.status_code == 201, response.text
+    result = response.json()
+    assert [(batch["accepted"], batch["rejected"]) for batch in result["batches"]] == [
+        (3, 0),
+        (2, 1),
+        (1, 0),
+    ]
+    assert result["batches"][1]["errors"][0]["index"] == 4
+    assert (result["accepted"], result["rejected"]) == (6, 1)
+
+    page = client.get(
+        f"/api/models/{model_id}/predictions", params={"limit": 100}, headers=headers
+    ).json()
+    assert len(page["predictions"]) == 6
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("body", [b'{"version": 1}', b"[{"])
+def test_ingest_rejects_body_not_an_array(client, headers, create_model, body):
+    """Function to test that a JSON body must be an array of predictions.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        body - A JSON body which is not an array.
+
+    Asserts:
+        The request is rejected with a 400.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+
+    response = client.post(
+        f"/api/models/{model_id}/predictions",
+        content=body,
+        headers={**headers, "Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.integration
+def test_read_predictions_pages_with_cursor(client, headers, create_model):
+    """Function to test that predictions are read newest first, one page after another.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Following the cursors returns every prediction of the window once, predictions logged
+        at the same time are ordered by id, and the last page has no cursor.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    timestamps = ["2026-01-01T00:00:00", "2026-01-02T00:00:00", "2026-01-02T00:00:00"]
+    timestamps += ["2026-01-03T00:00:00", "2026-02-01T00:00:00"]
+    records = [{**prediction(x), "timestamp": ts} for x, ts in enumerate(timestamps)]
+    client.post(f"/api/models/{model_id}/predictions", json=records, headers=headers)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, "start": "2026-01-01T00:00:00", "end": "2026-02-01T00:00:00"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get(
+            f"/api/models/{model_id}/predictions", params=params, headers=headers
+        ).json()
+        pages.append([p["input"]["x"] for p in page["predictions"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == [[3, 2], [1, 0]]
+
+
+@pytest.mark.integration
+def test_read_predictions_rejects_malformed_cursor(client, headers, create_model):
+    """Function to test that a malformed cursor is rejected.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        The request is rejected with a 400.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+
+    response = client.get(
+        f"/api/models/{model_id}/predictions", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.integration
+def test_read_latest_predictions(client, headers, create_model):
+    """Function to test that the latest prediction of each model of the user is read.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+
+    Asserts:
+        Every model having predictions gets its latest one, ordered by model, models without
+        predictions are left out, and the lookup can be narrowed to given models.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_ids = [create_model(f"model {i}".encode())["model_id"] for i in range(3)]
+    for model_id, latest in zip(model_ids[:2], ["2026-03-01T00:00:00", "2026-01-01T00:00:00"]):
+        records = [
+            {**prediction(0), "timestamp": "2025-12-01T00:00:00"},
+            {**prediction(model_id), "timestamp": latest},
+        ]
+        client.post(f"/api/models/{model_id}/predictions", json=records, headers=headers)
+
+    everything = client.get("/api/models/predictions/latest", headers=headers).json()
+    narrowed = client.get(
+        "/api/models/predictions/latest", params={"model_id": model_ids[1:]}, headers=headers
+    ).json()
+
+    assert [(p["model_id"], p["input"]["x"]) for p in everything] == [
+        (model_ids[0], model_ids[0]),
+        (model_ids[1], model_ids[1]),
+    ]
+    assert [p["model_id"] for p in narrowed] == [model_ids[1]]
+
+
+@pytest.mark.integration
+def test_ingest_reads_body_without_holding_connection(client, headers, create_model, monkeypatch):
+    """Function to test that the body of an ingestion is read without a database connection.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        monkeypatch - The pytest fixture patching the body parser.
+
+    Asserts:
+        The connection of the ownership check is returned before the first prediction is read,
+        and the predictions are still written.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    checked_out, while_reading = [0], []
+    iter_records = prediction_serv.iter_records
+
+    def checkout(*args):
+        checked_out[0] += 1
+
+    def checkin(*args):
+        checked_out[0] -= 1
+
+    async def record_connections(request):
+        async for index, raw in iter_records(request):
+            while_reading.append(checked_out[0])
+            yield index, raw
+
+    monkeypatch.setattr(prediction_serv, "iter_records", record_connections)
+    event.listen(async_engine.sync_engine, "checkout", checkout)
+    event.listen(async_engine.sync_engine, "checkin", checkin)
+    try:
+        response = client.post(
+            f"/api/models/{model_id}/predictions", json=[prediction(0)], headers=headers
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "checkout", checkout)
+        event.remove(async_engine.sync_engine, "checkin", checkin)
+
+    assert response.status_code == 201, response.text
+    assert response.json()["accepted"] == 1
+    assert while_reading == [0]
@@ -0,0 +1,228 @@
+"""Module containing function definitions to test the background purger of deleted models."""
+import os
+
+import models.models as _models
+import pytest
+from api.v1.model_store.purge import ModelPurger
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from canvass_api_model_store.core.metrics import count_statements
+
+
+def prediction(x: int) -> dict:
+    """Return a valid prediction of the model."""
+    return {"version": 1, "input": {"x": x}, "output": {"y": x * 2}}
+
+
+@pytest.fixture
+def purger(client, engine):
+    """Create a purger of the test database, purging deleted models right away.
+
+    Args:
+        client - An instance of the FastAPI TestClient, whose storage backend is purged.
+        engine - An instance of the AsyncEngine.
+
+    Returns:
+        A ModelPurger without grace period, deleting two predictions per statement.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return ModelPurger(
+        session_factory, client.app.state.storage, batch_size=2, interval=60, grace_period=0
+    )
+
+
+async def count_rows(session, table, **values) -> int:
+    """Count the rows of a table holding the given values."""
+    conditions = [getattr(table, column) == value for column, value in values.items()]
+    result = await session.execute(select(func.count()).select_from(table).where(*conditions))
+    return result.scalar()
+
+
+def blob_exists(client, name: str) -> bool:
+    """Return whether the local storage backend of the app holds a blob."""
+    return os.path.exists(os.path.join(client.app.state.storage.root, name))
+
+
+@pytest.mark.integration
+async def test_purge_deletes_predictions_in_batches(
+    client, headers, create_model, purger, engine, session
+):
+    """Function to test that the predictions of a deleted model are removed in batches.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        purger - A purger without grace period.
+        engine - An instance of the AsyncEngine.
+        session - A database session.
+
+    Asserts:
+        Every prediction of the model is removed by statements of at most `batch_size` rows,
+        then the model, its tags, artifact and blob, while other models keep their predictions.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    kept_id = create_model(b"kept model")["model_id"]
+    for id_ in (model_id, kept_id):
+        records = [prediction(x) for x in range(5)]
+        client.post(f"/api/models/{id_}/predictions", json=records, headers=headers)
+    name = (await session.get(_models.Model, model_id)).artifact_name
+    client.delete(f"/api/models/{model_id}", headers=headers)
+
+    with count_statements(engine.sync_engine) as statements:
+        assert await purger.purge() == 1
+
+    deletes = [s for s in statements if s.startswith("DELETE FROM predictions")]
+    assert len(deletes) == 4
+    assert await count_rows(session, _models.Prediction, model_id=model_id) == 0
+    assert await count_rows(session, _models.Prediction, model_id=kept_id) == 5
+    assert await count_rows(session, _models.ModelTag, model_id=model_id) == 0
+    assert await count_rows(session, _models.Model, id=model_id) == 0
+    assert await count_rows(session, _models.Artifact) == 1
+    assert not blob_exists(client, name)
+
+
+@pytest.mark.integration
+async def test_purge_deletes_predictions_written_after_batches(
+    client, headers, create_model, purger, session, monkeypatch
+):
+    """Function to test that predictions written while a model is purged are removed with it.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        purger - A purger without grace period.
+        session - A database session.
+        monkeypatch - The pytest fixture patching the purger.
+
+    Asserts:
+        A prediction written once the batches are deleted does not keep the model from being
+        purged, and is deleted along with it.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    client.delete(f"/api/models/{model_id}", headers=headers)
+    delete_predictions = purger.delete_predictions
+
+    async def delete_then_write(id_: int) -> int:
+        deleted = await delete_predictions(id_)
+        session.add(_models.Prediction(model_id=id_, version=1, input={}, output={}))
+        await session.commit()
+        return deleted
+
+    monkeypatch.setattr(purger, "delete_predictions", delete_then_write)
+
+    assert await purger.purge() == 1
+    assert await count_rows(session, _models.Prediction, model_id=model_id) == 0
+    assert await count_rows(session, _models.Model, id=model_id) == 0
+
+
+@pytest.mark.integration
+async def test_purge_waits_for_grace_period(client, headers, create_model, purger, session):
+    """Function to test that models are only purged once their grace period is over.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        purger - A purger without grace period.
+        session - A database session.
+
+    Asserts:
+        A model deleted more recently than the grace period is kept with its predictions, and
+        purged once the grace period is over.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    client.post(f"/api/models/{model_id}/predictions", json=[prediction(0)], headers=headers)
+    client.delete(f"/api/models/{model_id}", headers=headers)
+
+    purger.grace_period = 3600
+    assert await purger.purge() == 0
+    assert await count_rows(session, _models.Prediction, model_id=model_id) == 1
+
+    purger.grace_period = 0
+    assert await purger.purge() == 1
+    assert await count_rows(session, _models.Model, id=model_id) == 0
+
+
+@pytest.mark.integration
+async def test_purge_keeps_shared_artifact(client, headers, create_model, purger, session):
+    """Function to test that an artifact is only purged with the last model referencing it.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        purger - A purger without grace period.
+        session - A database session.
+
+    Asserts:
+        Purging one of two models sharing an artifact keeps its row and blob, which the second
+        model can still download, and purging the second model removes both.
+
+    Raises:
+        No Exceptions defined
+    """
+    first = create_model(b"shared content")
+    second = create_model(b"shared content")
+    name = (await session.get(_models.Model, first["model_id"])).artifact_name
+
+    client.delete(f"/api/models/{first['model_id']}", headers=headers)
+    assert await purger.purge() == 1
+    assert await count_rows(session, _models.Artifact, digest=first["digest"]) == 1
+    assert blob_exists(client, name)
+
+    client.delete(f"/api/models/{second['model_id']}", headers=headers)
+    assert await purger.purge() == 1
+    assert await count_rows(session, _models.Artifact, digest=first["digest"]) == 0
+    assert not blob_exists(client, name)
+
+
+@pytest.mark.integration
+async def test_purge_deletes_legacy_blob(client, headers, create_model, purger, session):
+    """Function to test that the blob of a model registered before artifact names is purged.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        headers - The authorization headers of the user.
+        create_model - A function registering a model of the user.
+        purger - A purger without grace period.
+        session - A database session.
+
+    Asserts:
+        Purging a model without artifact name deletes its `model-{id}{ext}` blob, while the
+        blob of a model whose id starts with the same digits is kept.
+
+    Raises:
+        No Exceptions defined
+    """
+    model_id = create_model()["model_id"]
+    model = _models.Model
+    await session.execute(
+        update(model).where(model.id == model_id).values(artifact_name=None, artifact_digest=None)
+    )
+    await session.commit()
+    legacy, other = f"model-{model_id}.pkl", f"model-{model_id}0.pkl"
+    for name in (legacy, other):
+        with open(os.path.join(client.app.state.storage.root, name), "wb") as file:
+            file.write(b"legacy model")
+    client.delete(f"/api/models/{model_id}", headers=headers)
+
+    assert await purger.purge() == 1
+    assert not blob_exists(client, legacy)
+    assert blob_exists(client, other)
@@ -0,0 +1,119 @@
+"""Module containing function definitions to test the SQL statement budget of each endpoint.
+
+Requests are sent with cold caches against a registry holding several models with predictions,
+so an endpoint running a statement per model or per prediction exceeds its budget.
+"""
+import pytest
+from api.v1.auth import services as auth_serv
+from api.v1.model_store import services as model_serv
+
+MODELS = 5
+PREDICTIONS_PER_MODEL = 20
+
+MODEL_PARAMS = {
+    "tags": "budget,test",
+    "custom_functions": "{}",
+    "pre_model_order": ["scale"],
+    "post_model_order": ["round"],
+    "predict_function": "predict",
+    "storage_options": "{}",
+    "container_options": "{}",
+    "model_metadata": '{"team": "budget"}',
+    "model_version": 1,
+    "input_features_and_types": '{"x": "float"}',
+    "output_names_and_types": '{"y": "float"}',
+}
+
+# Method, path, request options and the maximum number of SQL statements, with cold caches
+BUDGETS = [
+    ("GET", "/auth/api/users/me", {}, 1),
+    ("POST", "/auth/api/token", {"data": {"username": "budget@example.com", "password": "pw"}}, 1),
+    ("GET", "/api/models/", {}, 3),
+    ("GET", "/api/models/", {"params": {"tags": ["budget", "test"]}}, 3),
+    ("GET", "/api/models/", {"params": {"view": "summary"}}, 3),
+    ("GET", "/api/models/search", {"params": {"metadata_key": ["team"]}}, 2),
+    ("GET", "/api/models/{model_id}", {}, 3),
+    ("GET", "/api/models/{model_id}/artifact", {}, 2),
+    ("PATCH", "/api/models/{model_id}", {"json": {"predict_function": "predict_v2"}}, 4),
+    ("POST", "/api/models", {"params": MODEL_PARAMS, "files": {"file": ("m.bin", b"new")}}, 8),
+    ("GET", "/api/models/{model_id}/predictions", {}, 3),
+    ("GET", "/api/models/predictions/latest", {}, 2),
+    (
+        "POST",
+        "/api/models/{model_id}/predictions",
+        {"json": [{"version": 1, "input": {"x": 1}, "output": {"y": 1}}] * 10},
+        3,
+    ),
+]
+
+
+@pytest.fixture
+def registry(client):
+    """Register a user owning models with predictions.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+
+    Returns:
+        A dict with the authorization headers of the user and the id of one of its models.
+
+    Raises:
+        No Exceptions defined
+
+    """
+    response = client.post(
+        "/auth/api/users",
+        json={"email": "budget@example.com", "name": "n", "org": "o", "hashed_password": "pw"},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    model_ids = []
+    for index in range(MODELS):
+        response = client.post(
+            "/api/models",
+            params=MODEL_PARAMS,
+            files={"file": ("m.bin", f"model {index}".encode())},
+            headers=headers,
+        )
+        model_id = response.json()["model_id"]
+        predictions = [
+            {"version": 1, "input": {"x": x}, "output": {"y": x}}
+            for x in range(PREDICTIONS_PER_MODEL)
+        ]
+        client.post(f"/api/models/{model_id}/predictions", json=predictions, headers=headers)
+        model_ids.append(model_id)
+
+    return {"headers": headers, "model_id": model_ids[0]}
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("method,path,options,budget", BUDGETS)
+def test_endpoint_statement_budget(
+    client, registry, statement_budget, method, path, options, budget
+):
+    """Function to test that an endpoint runs at most its budget of SQL statements.
+
+    Args:
+        client - An instance of the FastAPI TestClient.
+        registry - The user and models of the registry.
+        statement_budget - The statement budget context manager.
+        method - The method of the request.
+        path - The path template of the request.
+        options - The options of the request.
+        budget - The maximum number of SQL statements.
+
+    Asserts:
+        The request succeeds within its statement budget.
+
+    Raises:
+        No Exceptions defined
+    """
+    auth_serv.user_cache.clear()
+    model_serv.model_cache.clear()
+    model_serv.model_versions.clear()
+    url = path.format(model_id=registry["model_id"])
+
+    with statement_budget(budget):
+        response = client.request(method, url, headers=registry["headers"], **options)
+
+    assert response.status_code < 400, response.text
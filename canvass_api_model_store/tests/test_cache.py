@@ -0,0 +1,86 @@
+"""Module containing function definitions to test the in-process TTL cache."""
+from canvass_api_model_store.core.cache import TTLCache
+
+
+class FakeTimer:
+    """Clock stand-in advanced manually by the tests."""
+
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+def test_cache_evicts_least_recently_used():
+    """Function to test that a full cache evicts its least recently used entry.
+
+    Args:
+        No arguments
+
+    Asserts:
+        The entry that was not read is evicted, and hits and misses are counted.
+
+    Raises:
+        No Exceptions defined
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+def test_cache_expires_entries():
+    """Function to test that entries expire after their time to live.
+
+    Args:
+        No arguments
+
+    Asserts:
+        An entry is returned until its time to live has elapsed.
+
+    Raises:
+        No Exceptions defined
+    """
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+
+    timer.now = 4.9
+    assert cache.get("a") == 1
+
+    timer.now = 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_invalidates_matching_keys():
+    """Function to test that entries can be invalidated by predicate.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Only the entries matching the predicate are removed.
+
+    Raises:
+        No Exceptions defined
+    """
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set((1, "token-a"), "user 1")
+    cache.set((1, "token-b"), "user 1")
+    cache.set((2, "token-c"), "user 2")
+
+    cache.invalidate_where(lambda key: key[0] == 1)
+
+    assert cache.get((1, "token-a")) is None
+    assert cache.get((1, "token-b")) is None
+    assert cache.get((2, "token-c")) == "user 2"
@@ -0,0 +1,124 @@
+"""Module containing function definitions to test the password hasher."""
+import asyncio
+import threading
+
+from canvass_api_model_store.core.hashing import PasswordHasher
+from canvass_api_model_store.core.metrics import registry
+
+
+class BlockingBcrypt:
+    """Stand-in for bcrypt recording the threads it runs on, until it is released."""
+
+    def __init__(self):
+        """Initialize the stand-in."""
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.running = 0
+        self.peak = 0
+
+    def hash(self, password: str) -> str:
+        """Record the calling thread and wait to be released."""
+        with self.lock:
+            self.threads.append(threading.current_thread())
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return f"hashed-{password}"
+
+
+def hash_calls(state: str) -> float:
+    """Return the value of the `password_hash_calls` gauge for a state."""
+    sample = f'password_hash_calls{{state="{state}"}} '
+    for line in registry.render().splitlines():
+        if line.startswith(sample):
+            return float(line[len(sample) :])
+    return 0
+
+
+async def test_hashing_runs_on_bounded_pool_and_reports_queue_depth():
+    """Function to test that hashing runs off the event loop on at most `max_workers` threads.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Calls run on the hashing threads, never more than `max_workers` at once, and the calls
+        waiting for a thread are reported as queued until they run.
+
+    Raises:
+        No Exceptions defined
+    """
+    hasher = PasswordHasher(rounds=4, max_workers=2)
+    hasher._bcrypt = fake = BlockingBcrypt()
+    queued, running = hash_calls("queued"), hash_calls("running")
+
+    tasks = [asyncio.create_task(hasher.hash(f"pw{i}")) for i in range(5)]
+    while fake.running < 2:
+        await asyncio.sleep(0.01)
+
+    assert hash_calls("queued") == queued + 3
+    assert hash_calls("running") == running + 2
+
+    fake.release.set()
+    hashes = await asyncio.gather(*tasks)
+
+    assert hashes == [f"hashed-pw{i}" for i in range(5)]
+    assert fake.peak == 2
+    assert threading.current_thread() not in fake.threads
+    assert all(thread.name.startswith("bcrypt") for thread in fake.threads)
+    assert hash_calls("queued") == queued
+    assert hash_calls("running") == running
+
+
+async def test_cancelled_call_leaves_queue():
+    """Function to test that a call cancelled while queued is no longer reported as queued.
+
+    Args:
+        No arguments
+
+    Asserts:
+        The queue depth is back to its value once the waiting call is cancelled and the running
+        one completes.
+
+    Raises:
+        No Exceptions defined
+    """
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    hasher._bcrypt = fake = BlockingBcrypt()
+    queued = hash_calls("queued")
+
+    first = asyncio.create_task(hasher.hash("first"))
+    second = asyncio.create_task(hasher.hash("second"))
+    while fake.running < 1:
+        await asyncio.sleep(0.01)
+    second.cancel()
+    await asyncio.sleep(0)
+    fake.release.set()
+
+    assert await first == "hashed-first"
+    assert hash_calls("queued") == queued
+
+
+async def test_hash_and_verify_round_trip():
+    """Function to test that a password verifies against its own hash only.
+
+    Args:
+        No arguments
+
+    Asserts:
+        The hash is a bcrypt hash of the configured cost, verifying the password it was made
+        from and rejecting another.
+
+    Raises:
+        No Exceptions defined
+    """
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+
+    hashed = await hasher.hash("secret")
+
+    assert hashed.startswith("$2b$04$")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("other", hashed)
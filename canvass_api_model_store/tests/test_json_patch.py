@@ -0,0 +1,76 @@
+"""Module containing function definitions to test JSON Patch and merge patch support."""
+import pytest
+
+from canvass_api_model_store.core.json_patch import (
+    JsonPatchError,
+    apply_json_patch,
+    apply_merge_patch,
+    parse_json_patch,
+)
+
+
+def test_json_patch_applies_operations_in_order():
+    """Function to test that JSON Patch operations are applied in order.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Every operation is applied, escaped pointers are decoded and the input is not modified.
+
+    Raises:
+        No Exceptions defined
+    """
+    document = {"a": {"b": 1}, "l": [1, 2], "x/y": 0}
+    operations = parse_json_patch(
+        [
+            {"op": "add", "path": "/l/-", "value": 3},
+            {"op": "add", "path": "/l/0", "value": 0},
+            {"op": "move", "from": "/a/b", "path": "/c"},
+            {"op": "replace", "path": "/x~1y", "value": 5},
+            {"op": "remove", "path": "/l/1"},
+            {"op": "test", "path": "/c", "value": 1},
+        ]
+    )
+
+    assert apply_json_patch(document, operations) == {"a": {}, "l": [0, 2, 3], "x/y": 5, "c": 1}
+    assert document == {"a": {"b": 1}, "l": [1, 2], "x/y": 0}
+
+
+def test_json_patch_rejects_inapplicable_operations():
+    """Function to test that operations on missing paths and failed tests are rejected.
+
+    Args:
+        No arguments
+
+    Asserts:
+        JsonPatchError is raised for a failed test, a missing path and a malformed pointer.
+
+    Raises:
+        No Exceptions defined
+    """
+    with pytest.raises(JsonPatchError):
+        apply_json_patch({"a": 1}, parse_json_patch([{"op": "test", "path": "/a", "value": 2}]))
+    with pytest.raises(JsonPatchError):
+        apply_json_patch({"a": 1}, parse_json_patch([{"op": "remove", "path": "/b"}]))
+    with pytest.raises(JsonPatchError):
+        parse_json_patch([{"op": "add", "path": "a", "value": 1}])
+
+
+def test_merge_patch_removes_nulls_and_merges_objects():
+    """Function to test that a merge patch merges nested objects and removes null members.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Nested objects are merged, null members removed and other values replaced.
+
+    Raises:
+        No Exceptions defined
+    """
+    document = {"a": {"b": 1, "c": 2}, "l": [1], "d": 1}
+
+    patched = apply_merge_patch(document, {"a": {"c": None, "e": 3}, "l": [2], "d": None})
+
+    assert patched == {"a": {"b": 1, "e": 3}, "l": [2]}
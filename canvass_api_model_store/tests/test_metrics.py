@@ -0,0 +1,111 @@
+"""Module containing function definitions to test the Prometheus metrics."""
+from sqlalchemy import create_engine, text
+
+from canvass_api_model_store.core.metrics import (
+    Counter,
+    Histogram,
+    Registry,
+    count_statements,
+    instrument_engine,
+    statement_type,
+    track_queries,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Function to test that a histogram is rendered in the Prometheus text format.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Bucket counts are cumulative, values on a bound fall in its bucket, and the sum and
+        count of each label set are rendered.
+
+    Raises:
+        No Exceptions defined
+    """
+    registry = Registry()
+    histogram = registry.register(Histogram("latency", "Latency.", ["route"], buckets=[0.1, 1]))
+    histogram.observe(0.1, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP latency Latency.", "# TYPE latency histogram"]
+    assert lines[2:] == [
+        'latency_bucket{route="/a",le="0.1"} 1',
+        'latency_bucket{route="/a",le="1"} 2',
+        'latency_bucket{route="/a",le="+Inf"} 3',
+        'latency_sum{route="/a"} 5.6',
+        'latency_count{route="/a"} 3',
+    ]
+
+
+def test_counter_escapes_labels_and_starts_unlabelled_at_zero():
+    """Function to test counter samples and label escaping.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Unlabelled counters are rendered before any increment, and quotes in label values are
+        escaped.
+
+    Raises:
+        No Exceptions defined
+    """
+    registry = Registry()
+    registry.register(Counter("idle", "Idle."))
+    labelled = registry.register(Counter("bytes", "Bytes.", ["name"]))
+    labelled.inc(3, 'a"b')
+
+    lines = registry.render().splitlines()
+
+    assert "idle 0" in lines
+    assert 'bytes{name="a\\"b"} 3' in lines
+
+
+def test_statement_type_classifies_sql():
+    """Function to test that SQL statements are labelled by their first keyword.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Known statements are labelled by keyword, others as OTHER.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert statement_type("  select 1") == "SELECT"
+    assert statement_type("UPDATE models SET tags = 'x'") == "UPDATE"
+    assert statement_type("BEGIN") == "OTHER"
+    assert statement_type("") == "OTHER"
+
+
+def test_statements_are_counted_per_request_and_per_engine():
+    """Function to test that SQL statements are counted while tracked.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Statements are added to the tracked counter and collected from the engine only inside
+        their blocks.
+
+    Raises:
+        No Exceptions defined
+    """
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, "test")
+
+    with engine.connect() as conn:
+        with count_statements(engine) as statements, track_queries() as stats:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+
+    assert statements == ["SELECT 1", "SELECT 2"]
+    assert stats.count == 2 and stats.seconds > 0
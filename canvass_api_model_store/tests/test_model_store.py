@@ -0,0 +1,267 @@
+"""Module containing function definitions to test the helpers of the model store services."""
+import pytest
+from api.v1.model_store import services as model_serv
+from fastapi import HTTPException
+
+
+def test_make_etag_is_weak_and_quoted():
+    """Function to test the entity tags built for models and listings.
+
+    Args:
+        No arguments
+
+    Asserts:
+        The parts are joined in a quoted weak entity tag.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert model_serv.make_etag(7, 3) == 'W/"7-3"'
+    assert model_serv.make_etag("models", 1, 12) == 'W/"models-1-12"'
+
+
+@pytest.mark.parametrize(
+    "if_none_match,expected",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('W/"7-3"', True),
+        ('"7-3"', True),
+        ('"7-2", W/"7-3"', True),
+        (' W/"7-2" ,"7-4"', False),
+        ('W/"17-3"', False),
+    ],
+)
+def test_etag_matches_compares_weakly(if_none_match, expected):
+    """Function to test `If-None-Match` parsing.
+
+    Args:
+        if_none_match - The value of the header.
+        expected - Whether the header matches the current entity tag.
+
+    Asserts:
+        Any tag of the list matches, strong and weak tags compare equal, and `*` matches
+        any tag.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert model_serv.etag_matches(if_none_match, 'W/"7-3"') is expected
+
+
+@pytest.mark.parametrize(
+    "if_match,expected", [(None, None), ("*", None), ('W/"7-3"', 3), ('"7-3"', 3), ("3", 3)]
+)
+def test_parse_if_match_reads_version(if_match, expected):
+    """Function to test that the expected version is read from an `If-Match` header.
+
+    Args:
+        if_match - The value of the header.
+        expected - The version expected by the client, if any.
+
+    Asserts:
+        The version is taken from a model entity tag or a bare number.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert model_serv.parse_if_match(if_match) == expected
+
+
+def test_parse_if_match_rejects_other_tags():
+    """Function to test that an `If-Match` header must hold a model version.
+
+    Args:
+        No arguments
+
+    Asserts:
+        A tag without a version is rejected with a 400.
+
+    Raises:
+        No Exceptions defined
+    """
+    with pytest.raises(HTTPException) as error:
+        model_serv.parse_if_match('"abc"')
+
+    assert error.value.status_code == 400
+
+
+def test_split_patch_groups_json_patch_by_field():
+    """Function to test that JSON Patch operations are grouped by the field they change.
+
+    Args:
+        No arguments
+
+    Asserts:
+        Each field gets its operations in order, with the field dropped from their paths.
+
+    Raises:
+        No Exceptions defined
+    """
+    document = [
+        {"op": "add", "path": "/model_metadata/owner", "value": "ops"},
+        {"op": "remove", "path": "/custom_functions/scale"},
+        {"op": "move", "from": "/model_metadata/team", "path": "/model_metadata/group"},
+    ]
+
+    patches = model_serv.split_patch(model_serv.JSON_PATCH_CONTENT_TYPE, document)
+
+    assert patches == {
+        "model_metadata": [
+            {"op": "add", "path": ["owner"], "value": "ops"},
+            {"op": "move", "path": ["group"], "from": ["team"]},
+        ],
+        "custom_functions": [{"op": "remove", "path": ["scale"]}],
+    }
+
+
+def test_split_patch_keeps_merge_patch_by_field():
+    """Function to test that a merge patch is already keyed by the field it changes.
+
+    Args:
+        No arguments
+
+    Asserts:
+        The merge patch of each field is returned as sent.
+
+    Raises:
+        No Exceptions defined
+    """
+    document = {"model_metadata": {"owner": "ops", "team": None}, "storage_options": {}}
+
+    patches = model_serv.split_patch(model_serv.MERGE_PATCH_CONTENT_TYPE, document)
+
+    assert patches == document
+
+
+@pytest.mark.parametrize(
+    "content_type,document",
+    [
+        ("application/merge-patch+json", {"predict_function": "other"}),
+        ("application/merge-patch+json", ["model_metadata"]),
+        ("application/merge-patch+json", None),
+        ("application/json-patch+json", [{"op": "replace", "path": "/tags", "value": "a"}]),
+        ("application/json-patch+json", [{"op": "remove", "path": ""}]),
+        ("application/json-patch+json", {"op": "remove", "path": "/model_metadata/team"}),
+        (
+            "application/json-patch+json",
+            [{"op": "copy", "from": "/custom_functions/a", "path": "/model_metadata/a"}],
+        ),
+    ],
+)
+def test_split_patch_rejects_other_fields(content_type, document):
+    """Function to test that only the JSON fields of a model can be patched.
+
+    Args:
+        content_type - The media type of the patch.
+        document - A patch changing a column, the whole model, or values across fields.
+
+    Asserts:
+        The patch is rejected with a 400.
+
+    Raises:
+        No Exceptions defined
+    """
+    with pytest.raises(HTTPException) as error:
+        model_serv.split_patch(content_type, document)
+
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "tags,expected",
+    [(None, []), ("", []), ("a", ["a"]), (" b , a,, b ", ["b", "a"]), ("a,A", ["a", "A"])],
+)
+def test_parse_tags_splits_distinct_tags(tags, expected):
+    """Function to test the splitting of the comma separated tags of a model.
+
+    Args:
+        tags - The tags of the model.
+        expected - The tag rows written for the model.
+
+    Asserts:
+        Tags are stripped, empty tags are dropped and repeated tags are kept once, in order.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert model_serv.parse_tags(tags) == expected
+
+
+@pytest.mark.parametrize(
+    "document,pattern,expected",
+    [
+        ({"a": {"b": 1, "c": 2}, "d": 3}, {"a": {"b": 1}}, True),
+        ({"a": {"b": 1}}, {"a": {"b": 2}}, False),
+        ({"a": {"b": 1}}, {"a": {"c": None}}, False),
+        ({"a": 1}, {}, True),
+        ({"a": 1}, {"a": {}}, False),
+        ([1, 2, 3], [3, 1], True),
+        ([1, 2], [1, 1], True),
+        ([1], [1, 2], False),
+        ([{"a": 1, "b": 2}, {"c": 3}], [{"a": 1}], True),
+        ({"a": [1, 2]}, {"a": 1}, False),
+        ({"a": [[1, 2], 3]}, {"a": [[2]]}, True),
+        ("x", "x", True),
+        ("1", 1, False),
+        (1, 1.0, True),
+        (True, 1, False),
+        (0, False, False),
+        (None, None, True),
+        ({"a": None}, {"a": None}, True),
+    ],
+)
+def test_json_contains_follows_jsonb_containment(document, pattern, expected):
+    """Function to test the containment of JSON documents tested outside PostgreSQL.
+
+    Args:
+        document - The JSON document searched.
+        pattern - The JSON document it must contain.
+        expected - Whether the JSONB `@>` operator finds the pattern.
+
+    Asserts:
+        Nested objects, arrays and scalars are contained as with the JSONB `@>` operator.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert model_serv.json_contains(document, pattern) is expected
+
+
+def test_parse_search_document_decodes_objects():
+    """Function to test the decoding of the JSON objects of a search.
+
+    Args:
+        No arguments
+
+    Asserts:
+        A missing parameter is no condition and an object is decoded whole.
+
+    Raises:
+        No Exceptions defined
+    """
+    assert model_serv.parse_search_document("model_metadata", None) is None
+    assert model_serv.parse_search_document("model_metadata", '{"a": {"b": [1]}}') == {
+        "a": {"b": [1]}
+    }
+
+
+@pytest.mark.parametrize("document", ["[1]", "1", '"a"', "null", "{not json"])
+def test_parse_search_document_rejects_other_documents(document):
+    """Function to test that a search parameter must be a JSON object.
+
+    Args:
+        document - A parameter which is not a JSON object.
+
+    Asserts:
+        The parameter is rejected with a 400 naming the searched column.
+
+    Raises:
+        No Exceptions defined
+    """
+    with pytest.raises(HTTPException) as error:
+        model_serv.parse_search_document("model_metadata", document)
+
+    assert error.value.status_code == 400
+    assert "model_metadata" in error.value.detail
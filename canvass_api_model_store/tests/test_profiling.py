@@ -0,0 +1,62 @@
+"""Module containing function definitions to test the profilers of a live worker."""
+import asyncio
+import threading
+
+import pytest
+
+from canvass_api_model_store.core import profiling
+
+
+def test_sample_stacks_collapses_stacks_of_other_threads():
+    """Function to test that stacks are collapsed root first under their thread name.
+
+    Args:
+        No arguments
+
+    Asserts:
+        The stack of a waiting thread is sampled, and the sampler thread is left out.
+
+    Raises:
+        No Exceptions defined
+    """
+    done = threading.Event()
+
+    def wait_for_done():
+        done.wait()
+
+    thread = threading.Thread(target=wait_for_done, name="waiter")
+    thread.start()
+    try:
+        stacks = profiling.sample_stacks(0.05, 0.005)
+    finally:
+        done.set()
+        thread.join()
+
+    waiter = [stack for stack in stacks if stack.startswith("waiter;")]
+    assert waiter and all("wait_for_done (" in stack for stack in waiter)
+    assert not any("sample_stacks (" in stack for stack in stacks)
+
+
+def test_profiles_do_not_overlap():
+    """Function to test that a profile is refused while another one is running.
+
+    Args:
+        No arguments
+
+    Asserts:
+        ProfilerBusyError is raised for the second of two concurrent profiles.
+
+    Raises:
+        No Exceptions defined
+    """
+
+    async def profile_twice():
+        first = asyncio.ensure_future(profiling.trace_allocations(0.05, 1, 1))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(profiling.ProfilerBusyError):
+                await profiling.profile_stacks(0.01, 0.005)
+        finally:
+            await first
+
+    asyncio.run(profile_twice())
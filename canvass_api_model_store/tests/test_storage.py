@@ -0,0 +1,184 @@
+"""Module containing function definitions to test the artifact storage and upload engine."""
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from canvass_api_model_store.core.storage import (
+    ArtifactTooLargeError,
+    BlobNotFoundError,
+    BlockUploader,
+    InvalidBlobNameError,
+    LocalStorageBackend,
+)
+
+
+class FlakyStorageBackend(LocalStorageBackend):
+    """Local storage backend failing the first staged blocks."""
+
+    def __init__(self, root, failures=0):
+        """Initialize the backend."""
+        super().__init__(root)
+        self.failures = failures
+
+    async def stage_block(self, blob_name, block_id, data):
+        """Stage a block, failing the first `failures` calls."""
+        if self.failures:
+            self.failures -= 1
+            raise OSError("Connection reset")
+        await super().stage_block(blob_name, block_id, data)
+
+
+async def test_upload_stages_blocks(tmp_path):
+    """Function to test that an artifact is uploaded as a list of blocks.
+
+    Args:
+        tmp_path - A temporary directory used as blob storage.
+
+    Asserts:
+        The artifact is split into blocks of the given size and committed in order.
+
+    Raises:
+        No Exceptions defined
+    """
+    data = bytes(range(256)) * 10
+    storage = LocalStorageBackend(str(tmp_path))
+    uploader = BlockUploader(block_size=1000, max_size=10_000, concurrency=2)
+
+    size = await uploader.upload(UploadFile("model.pkl", io.BytesIO(data)), storage, "model-1")
+
+    assert size == len(data)
+    assert (tmp_path / "model-1").read_bytes() == data
+
+
+async def test_stage_computes_digest(tmp_path):
+    """Function to test that staging an artifact computes its digest without committing it.
+
+    Args:
+        tmp_path - A temporary directory used as blob storage.
+
+    Asserts:
+        The SHA-256 digest and size of the content are returned and the blob is not visible.
+
+    Raises:
+        No Exceptions defined
+    """
+    data = bytes(range(256)) * 10
+    storage = LocalStorageBackend(str(tmp_path))
+    uploader = BlockUploader(block_size=1000, max_size=10_000, concurrency=2)
+
+    staged = await uploader.stage(UploadFile("model.pkl", io.BytesIO(data)), storage, "model-1")
+
+    assert staged.digest == hashlib.sha256(data).hexdigest()
+    assert staged.size == len(data)
+    assert len(staged.block_ids) == 3
+    assert not (tmp_path / "model-1").exists()
+
+
+async def test_upload_retries_failed_blocks(tmp_path):
+    """Function to test that a failed block is retried on its own.
+
+    Args:
+        tmp_path - A temporary directory used as blob storage.
+
+    Asserts:
+        The artifact is committed once the failed blocks succeed on retry.
+
+    Raises:
+        No Exceptions defined
+    """
+    data = b"x" * 5000
+    storage = FlakyStorageBackend(str(tmp_path), failures=2)
+    uploader = BlockUploader(
+        block_size=1000, max_size=10_000, concurrency=4, max_retries=2, retry_backoff=0
+    )
+
+    await uploader.upload(UploadFile("model.pkl", io.BytesIO(data)), storage, "model-1")
+
+    assert (tmp_path / "model-1").read_bytes() == data
+
+
+async def test_upload_rejects_oversized_artifact(tmp_path):
+    """Function to test that an oversized artifact is never committed.
+
+    Args:
+        tmp_path - A temporary directory used as blob storage.
+
+    Asserts:
+        The upload stops once the maximum size is crossed.
+
+    Raises:
+        No Exceptions defined
+    """
+    storage = LocalStorageBackend(str(tmp_path))
+    uploader = BlockUploader(block_size=1000, max_size=2500)
+
+    with pytest.raises(ArtifactTooLargeError):
+        await uploader.upload(UploadFile("model.pkl", io.BytesIO(b"x" * 5000)), storage, "model-1")
+
+    assert not (tmp_path / "model-1").exists()
+
+
+async def test_download_streams_byte_range(tmp_path):
+    """Function to test that a byte range of a blob is streamed in chunks.
+
+    Args:
+        tmp_path - A temporary directory used as blob storage.
+
+    Asserts:
+        The range is returned in chunks of the given size, and the download fails once the blob
+        no longer has the expected entity tag.
+
+    Raises:
+        No Exceptions defined
+    """
+    data = bytes(range(256)) * 10
+    storage = LocalStorageBackend(str(tmp_path), chunk_size=100)
+    await BlockUploader(block_size=1000, max_size=10_000).upload(
+        UploadFile("model.pkl", io.BytesIO(data)), storage, "model-1"
+    )
+    properties = await storage.get_properties("model-1")
+
+    chunks = [chunk async for chunk in storage.download("model-1", 50, 250, etag=properties.etag)]
+
+    assert properties.size == len(data)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert b"".join(chunks) == data[50:300]
+
+    await BlockUploader(block_size=1000, max_size=10_000).upload(
+        UploadFile("model.pkl", io.BytesIO(data[::-1])), storage, "model-1"
+    )
+    with pytest.raises(BlobNotFoundError):
+        async for _ in storage.download("model-1", etag=properties.etag):
+            pass
+
+
+@pytest.mark.parametrize(
+    "blob_name",
+    ["../escaped.txt", "nested/../../escaped.txt", "/tmp/escaped.txt", "..", ".blocks", ""],
+)
+async def test_upload_rejects_names_outside_root(tmp_path, blob_name):
+    """Function to test that a blob name can not reach outside of the storage root.
+
+    Args:
+        tmp_path - A temporary directory holding the blob storage.
+        blob_name - A blob name escaping the root or clashing with the staged blocks.
+
+    Asserts:
+        The upload is rejected before anything is written.
+
+    Raises:
+        No Exceptions defined
+    """
+    root = tmp_path / "root"
+    storage = LocalStorageBackend(str(root))
+
+    with pytest.raises(InvalidBlobNameError):
+        await BlockUploader(block_size=1000, max_size=10_000).upload(
+            UploadFile("model.pkl", io.BytesIO(b"x" * 10)), storage, blob_name
+        )
+
+    assert [path.name for path in tmp_path.iterdir()] == ["root"]
+    assert [path.name for path in root.iterdir()] == [".blocks"]
+    assert not any((root / ".blocks").iterdir())
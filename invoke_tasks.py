@@ -1,6 +1,9 @@
 """Module to create kubernetes deployment config."""
+import os
+import shlex
+
 from canvass_deployer import tasks
-from invoke import Collection
+from invoke import Collection, task
 
 CONFIG = {
     "azure_container_repo_name": "canvass-api-model-store",
@@ -12,4 +15,29 @@ CONFIG = {
     ],  # Has to be a list of strings.
 }
 
+
+@task(
+    help={
+        "users": "Number of concurrent virtual users.",
+        "duration": "Duration of the test in seconds.",
+        "mix": "Weights of the scenarios, such as read=8,patch=2,upload=1.",
+        "url": "URL of a running server to test instead of an in-process one.",
+        "output": "JSON file to write the summary to.",
+    }
+)
+def load_test(c, users=10, duration=30, mix=None, url=None, output=None):
+    """Run the load test of the API against local stand-ins, or a running server."""
+    command = ["python", "-m", "benchmarks.load_test", "--users", users, "--duration", duration]
+    for option, value in (("--mix", mix), ("--url", url), ("--output", output)):
+        if value:
+            command += [option, value]
+    pythonpath = [os.environ.get("PYTHONPATH"), "canvass_api_model_store"]
+    c.run(
+        " ".join(shlex.quote(str(part)) for part in command),
+        env={"PYTHONPATH": os.pathsep.join(filter(None, pythonpath))},
+        pty=True,
+    )
+
+
 ns = Collection.from_module(tasks, config={"project_config": CONFIG})
+ns.add_task(load_test)